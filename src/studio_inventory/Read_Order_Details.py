@@ -1,9 +1,11 @@
 import re
+from contextlib import closing
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from typing import Optional, Union
 
-import pdfplumber
+from studio_inventory.pdf_text import iter_page_texts
+from studio_inventory.vendors.rules import FieldRule, RuleSet
 
 
 @dataclass
@@ -58,73 +60,81 @@ def extract_first(pattern: str, text: str, flags=re.I) -> Optional[str]:
     return m.group(1).strip() if m else None
 
 
-def extract_invoice(text: str) -> Optional[Union[int, str]]:
-    raw = extract_first(r"\bInvoice\b\s*([A-Z0-9\-]+)\b", text)
-    if raw is None:
-        return None
+def _invoice(m: re.Match) -> Union[int, str]:
+    raw = m.group(1).strip()
     return int(raw) if raw.isdigit() else raw
 
 
-def extract_purchase_order(text: str) -> Optional[str]:
-    return extract_first(r"\bPurchase\s+Order\b\s*([A-Z0-9\-]+)\b", text)
+def _date(m: re.Match) -> Optional[datetime]:
+    return parse_mmddyy(m.group(1))
 
 
-def extract_invoice_date(text: str) -> Optional[datetime]:
-    raw = extract_first(r"\bInvoice\s+Date\b\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{2,4})\b", text)
-    return parse_mmddyy(raw) if raw else None
+def _credit_card(m: re.Match) -> str:
+    brand = m.group(1).strip().title()
+    last4 = m.group(2)
+    return f"{brand} ****{last4}"
 
 
-def extract_account_number(text: str) -> Optional[str]:
-    return extract_first(r"\bYour\s+Account\b\s*([A-Z0-9\-]+)\b", text)
+def _payment_block_date(m: re.Match) -> Optional[datetime]:
+    m2 = re.search(r"\bDate\b\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{2,4})\b", m.group(0), re.I)
+    return parse_mmddyy(m2.group(1)) if m2 else None
 
 
-def extract_credit_card(text: str) -> Optional[str]:
-    # Matches: "Credit Card Amex Ending- 2008"
-    m = re.search(r"\bCredit\s+Card\s+([A-Za-z]+)\s+Ending-\s*([0-9]{4})\b", text, re.I)
-    if m:
-        brand = m.group(1).strip().title()
-        last4 = m.group(2)
-        return f"{brand} ****{last4}"
-    return None
+def _line_money(m: re.Match) -> Optional[float]:
+    end = m.string.find("\n", m.start())
+    return money_to_float(m.string[m.start():end if end != -1 else None])
 
 
-def extract_payment_date(text: str) -> Optional[datetime]:
+_DATE = r"([0-9]{1,2}/[0-9]{1,2}/[0-9]{2,4})\b"
+_LINE_START = r"^[^\S\n]*"  # start of a line, ignoring indentation
+
+# Every field, compiled into one pattern: a page is scanned once for whatever is still missing.
+ORDER_RULES = RuleSet("mcmaster", [
+    FieldRule("purchase_order", r"\bPurchase\s+Order\b\s*([A-Z0-9\-]+)\b"),
+    FieldRule("invoice", r"\bInvoice\b\s*([A-Z0-9\-]+)\b", _invoice),
+    FieldRule("invoice_date", r"\bInvoice\s+Date\b\s*" + _DATE, _date, first_only=True),
+    FieldRule("account_number", r"\bYour\s+Account\b\s*([A-Z0-9\-]+)\b"),
+    # Matches: "Credit Card Amex Ending- 2008"
+    FieldRule("credit_card", r"\bCredit\s+Card\s+([A-Za-z]+)\s+Ending-\s*([0-9]{4})\b", _credit_card),
     # Prefer: "Payment Received 11/11/25 (146.41)"
-    m = re.search(r"\bPayment\s+Received\b\s+([0-9]{1,2}/[0-9]{1,2}/[0-9]{2,4})\b", text, re.I)
-    if m:
-        return parse_mmddyy(m.group(1))
-
-    # Fallback: within payment-info block
-    block_idx = text.lower().find("information about your payment")
-    if block_idx != -1:
-        window = text[block_idx:block_idx + 500]
-        m2 = re.search(r"\bDate\b\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{2,4})\b", window, re.I)
-        if m2:
-            return parse_mmddyy(m2.group(1))
+    FieldRule("payment_date", r"\bPayment\s+Received\b\s+" + _DATE, _date, first_only=True),
+    # Fallback: a "Date" within the first payment-info block (500 chars from its heading)
+    FieldRule("payment_date", r"information about your payment(?s:.){0,470}", _payment_block_date, first_only=True),
+    # Totals lines; each line counts for the first of these still missing that it matches
+    FieldRule("merchandise", _LINE_START + r"merchandise", _line_money, re.I | re.M, claim="totals"),
+    FieldRule("shipping", _LINE_START + r"(?:shipping|freight)", _line_money, re.I | re.M, claim="totals"),
+    FieldRule("sales_tax", r"^[^\n]*sales tax", _line_money, re.I | re.M, claim="totals"),
+    FieldRule("total", _LINE_START + r"total", _line_money, re.I | re.M, claim="totals"),
+])
 
-    return None
 
+def extract_invoice(text: str) -> Optional[Union[int, str]]:
+    return ORDER_RULES.scan(text, ["invoice"])["invoice"]
 
-def extract_totals(text: str):
-    merch = ship = tax = total = None
-    for line in text.splitlines():
-        low = line.strip().lower()
 
-        if merch is None and low.startswith("merchandise"):
-            merch = money_to_float(line)
+def extract_purchase_order(text: str) -> Optional[str]:
+    return ORDER_RULES.scan(text, ["purchase_order"])["purchase_order"]
 
-        elif ship is None and (low.startswith("shipping") or low.startswith("freight")):
-            ship = money_to_float(line)
 
-        elif tax is None and ("sales tax" in low):
-            val = money_to_float(line)
-            if val is not None:
-                tax = val
+def extract_invoice_date(text: str) -> Optional[datetime]:
+    return ORDER_RULES.scan(text, ["invoice_date"])["invoice_date"]
 
-        elif total is None and low.startswith("total"):
-            total = money_to_float(line)
 
-    return merch, ship, tax, total
+def extract_account_number(text: str) -> Optional[str]:
+    return ORDER_RULES.scan(text, ["account_number"])["account_number"]
+
+
+def extract_credit_card(text: str) -> Optional[str]:
+    return ORDER_RULES.scan(text, ["credit_card"])["credit_card"]
+
+
+def extract_payment_date(text: str) -> Optional[datetime]:
+    return ORDER_RULES.scan(text, ["payment_date"])["payment_date"]
+
+
+def extract_totals(text: str):
+    f = ORDER_RULES.scan(text, ["merchandise", "shipping", "sales_tax", "total"])
+    return f["merchandise"], f["shipping"], f["sales_tax"], f["total"]
 
 
 def is_complete(info: OrderInfo) -> bool:
@@ -158,41 +168,23 @@ def extract_order_info_by_page(pdf_path: str, debug: bool = False) -> OrderInfo:
     """
     info = OrderInfo()
 
-    with pdfplumber.open(pdf_path) as p:
-        for i, page in enumerate(p.pages):
-            text = normalize_text(page.extract_text() or "")
+    # pages come lazily from the vendor's text backend (pdf_text), so we can stop early
+    with closing(iter_page_texts(pdf_path, vendor="mcmaster")) as pages:
+        for i, page_text in enumerate(pages):
+            text = normalize_text(page_text)
             if not text:
                 continue
 
-            # Pull candidates from THIS page
-            po = extract_purchase_order(text)
-            inv = extract_invoice(text)
-            inv_date = extract_invoice_date(text)
-            acct = extract_account_number(text)
-            cc = extract_credit_card(text)
-            pay_date = extract_payment_date(text)
-            merch, ship, tax, total = extract_totals(text)
-
-            # Merge into the global info (only fill missing fields)
-            merge_if_missing(
-                info,
-                purchase_order=po,
-                invoice=inv,
-                invoice_date=inv_date,
-                account_number=acct,
-                credit_card=cc,
-                payment_date=pay_date,
-                merchandise=merch,
-                shipping=ship,
-                sales_tax=tax,   # keep None if not present
-                total=total,
-            )
+            # One scan of THIS page for the fields still missing (whole claim groups, so each
+            # totals line goes to the same field as on a fresh page)
+            missing = [k for k, v in asdict(info).items() if v is None]
+            found = ORDER_RULES.scan(text, missing)
+
+            # Merge into the global info (only fill missing fields; sales_tax stays None if not present)
+            merge_if_missing(info, **found)
 
             if debug:
-                print(f"page {i}: filled -> "
-                      f"po={po is not None}, inv={inv is not None}, inv_date={inv_date is not None}, "
-                      f"acct={acct is not None}, cc={cc is not None}, pay_date={pay_date is not None}, "
-                      f"merch={merch is not None}, ship={ship is not None}, tax={tax is not None}, total={total is not None}")
+                print(f"page {i}: filled -> " + ", ".join(f"{k}={v is not None}" for k, v in found.items()))
 
             if is_complete(info):
                 break
@@ -0,0 +1,155 @@
+"""
+Archiving original receipt PDFs into the workspace imports/ folder without copying bytes.
+
+materialize() tries, in order: a hardlink (os.link), a copy-on-write clone (FICLONE ioctl),
+an in-kernel copy (os.copy_file_range), and only then shutil.copy2. Hardlinks and clones
+cost no data writes; copy_file_range at least skips the userspace round-trip and can be
+offloaded by the filesystem.
+
+Layouts (STUDIO_INV_ARCHIVE_LAYOUT):
+  dated    (default) imports/YYYY-MM-DD/<name>.pdf
+  objects  content-addressed imports/objects/ab/cdef….pdf keyed by the file's sha256,
+           with imports/YYYY-MM-DD/<name>.pdf kept as a symlink view onto the object.
+           Re-dropping the same bytes never writes the object again.
+"""
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from studio_inventory.paths import imports_objects_dir
+
+ARCHIVE_LAYOUT = os.environ.get("STUDIO_INV_ARCHIVE_LAYOUT", "dated").strip().lower()
+
+# linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+# errors that mean "this strategy isn't available here", not "the copy failed"
+_UNSUPPORTED = {errno.EXDEV, errno.EPERM, errno.EACCES, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOSYS, errno.EMLINK}
+if hasattr(errno, "ETXTBSY"):
+    _UNSUPPORTED.add(errno.ETXTBSY)
+
+
+def _reflink(src: Path, dest: Path) -> None:
+    import fcntl
+
+    with src.open("rb") as fsrc, dest.open("wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+
+
+def _copy_file_range(src: Path, dest: Path) -> None:
+    with src.open("rb") as fsrc, dest.open("wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        while remaining > 0:
+            n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+            if n == 0:
+                break
+            remaining -= n
+
+
+def materialize(src: Path, dest: Path) -> str:
+    """
+    Make dest hold src's bytes as cheaply as the filesystem allows.
+
+    Returns the strategy used: "link", "reflink", "copy_file_range" or "copy".
+    dest must not exist; partial copies never appear under dest's name.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dest)
+        return "link"
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED:
+            raise
+
+    tmp = dest.with_name(f".{dest.name}.part")
+    strategies = []
+    if sys.platform.startswith("linux"):
+        strategies.append(("reflink", _reflink))
+    if hasattr(os, "copy_file_range"):
+        strategies.append(("copy_file_range", _copy_file_range))
+
+    for name, fn in strategies:
+        try:
+            fn(src, tmp)
+        except OSError as e:
+            tmp.unlink(missing_ok=True)
+            if e.errno not in _UNSUPPORTED:
+                raise
+            continue
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dest)
+        return name
+
+    try:
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return "copy"
+
+
+def _same_file(a: Path, b: Path) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def _unique_dest(run_dir: Path, original_path: Path) -> Path:
+    dest = run_dir / original_path.name
+    if not dest.exists() and not dest.is_symlink():
+        return dest
+    stem, suffix = original_path.stem, original_path.suffix
+    i = 2
+    while True:
+        cand = run_dir / f"{stem}__{i}{suffix}"
+        if not cand.exists() and not cand.is_symlink():
+            return cand
+        i += 1
+
+
+def object_path(file_hash: str, suffix: str = ".pdf") -> Path:
+    """Content-addressed location for a file: imports/objects/ab/cdef…<suffix>."""
+    h = file_hash.lower()
+    return imports_objects_dir() / h[:2] / f"{h[2:]}{suffix.lower()}"
+
+
+def _archive_object(original_path: Path, run_dir: Path, file_hash: str) -> Path:
+    obj = object_path(file_hash, original_path.suffix or ".pdf")
+    if not obj.exists():
+        try:
+            materialize(original_path, obj)
+        except FileExistsError:
+            pass  # raced with another ingest of the same bytes
+
+    # Date-folder view: reuse an existing entry for this object, else add a relative symlink
+    view = run_dir / original_path.name
+    if view.exists() and _same_file(view, obj):
+        return view
+    view = _unique_dest(run_dir, original_path)
+    try:
+        view.symlink_to(os.path.relpath(obj, run_dir))
+    except OSError:
+        # no symlink support (e.g. Windows without developer mode): fall back to link/copy
+        materialize(obj, view)
+    return view
+
+
+def archive_pdf_to_imports(original_path: Path, run_dir: Path, file_hash: str | None = None) -> Path:
+    """Archive an original PDF into workspace imports/YYYY-MM-DD/, returning the archived path."""
+    original_path = Path(original_path)
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    if ARCHIVE_LAYOUT == "objects" and file_hash:
+        return _archive_object(original_path, run_dir, file_hash)
+
+    existing = run_dir / original_path.name
+    if existing.exists() and _same_file(existing, original_path):
+        return existing  # already linked in by an earlier run
+    dest = _unique_dest(run_dir, original_path)
+    materialize(original_path, dest)
+    return dest
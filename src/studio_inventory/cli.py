@@ -6,6 +6,7 @@ from uuid import uuid4
 
 import csv
 import os
+import sqlite3
 import subprocess
 import sys
 
@@ -34,9 +35,15 @@ from rich.prompt import Prompt, IntPrompt, FloatPrompt, Confirm
 from rich.table import Table
 
 from studio_inventory.db import DB, default_db_path
+from studio_inventory.part_identity import resolve_part_key
+from studio_inventory.short_codes import assign_short_codes, resolve_short_code, short_code_target
 
-from studio_inventory.labels.make_pdf import make_labels_pdf, LabelTemplate
-from studio_inventory.labels.presets import list_label_presets, load_label_preset, save_label_preset
+# Heavy dependencies (pandas, reportlab, requests, pdfplumber) are imported inside the commands
+# that use them, so --help and light commands start fast (checked by studio_inventory.startup_budget).
+from studio_inventory.labels.render import DEFAULT_DPI as ZPL_DEFAULT_DPI, LABEL_FORMATS, format_for_path, render_labels
+from studio_inventory.labels.source import LabelRowQuery
+from studio_inventory.labels.presets import save_label_preset
+from studio_inventory.vendors.mcmaster_enrich import DEFAULT_RATE, DEFAULT_WORKERS, enrich_mcmaster, pending_parts
 
 app = typer.Typer(add_completion=False, no_args_is_help=False)
 console = Console()
@@ -48,6 +55,20 @@ console = Console()
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
+def resolve_part_key_input(db: DB, ident: str) -> str:
+    """Typed part keys may be aliases (mfg part number, SKU variant, pre-migration key) or scanned short codes."""
+    if not _table_exists(db, "parts_received"):
+        return ident
+    with db.connect() as con:
+        return resolve_part_key(con, ident) or resolve_short_code(con, ident) or ident
+
+def ensure_label_short_codes(db: DB) -> None:
+    """Parts added since the last ingest (or before short codes existed) get their code."""
+    if not _table_exists(db, "parts_received"):
+        return
+    with db.connect() as con:
+        assign_short_codes(con)
+
 def ensure_inventory_events_table(db: DB) -> None:
     # Unified audit log for manual receive/remove actions
     db.execute(
@@ -295,6 +316,127 @@ def export_sqlite_object_to_csv(
 
     console.print(f"[green]Exported[/green] {name} → [cyan]{out_path}[/cyan] ({len(rows)} rows)")
 
+
+# Objects offered by the "changes since last export" menu entry (tables only; views have no updated_utc)
+DELTA_EXPORT_OBJECTS = ["orders", "line_items", "parts_removed", "ingested_files"]
+
+# Rebuilt with DELETE+INSERT (every ingest for inventory; purge/rebuild for parts_received): each
+# row gets a fresh updated_utc and deleted rows leave no trace, so these are always exported in full.
+FULL_EXPORT_OBJECTS = ["parts_received", "inventory"]
+
+
+def ensure_export_state_table(db: DB) -> None:
+    # Per-object watermark for incremental (delta) exports
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS export_state (
+            object_name      TEXT PRIMARY KEY,
+            last_updated_utc TEXT,   -- highest updated_utc written by the last delta export
+            last_export_utc  TEXT NOT NULL,
+            last_out_path    TEXT,
+            last_rows        INTEGER
+        )
+        """
+    )
+
+
+def ensure_updated_utc_index(db: DB, name: str) -> bool:
+    """Index updated_utc so delta exports are a range scan. False if `name` has no updated_utc column."""
+    if "updated_utc" not in _table_columns(db, name):
+        return False
+    db.execute(f'CREATE INDEX IF NOT EXISTS "idx_{name}_updated_utc" ON "{name}"(updated_utc);')
+    return True
+
+
+def normalize_utc(value: Optional[str]) -> Optional[str]:
+    """
+    One comparable form (YYYY-MM-DDTHH:MM:SS.ffffff, UTC) for the updated_utc spellings in use:
+    utc_now_iso()'s "+00:00", utcnow().isoformat()'s naive microseconds, and plain dates.
+    """
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise RuntimeError(f"not an ISO timestamp: {value!r}")
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+def export_watermark(db: DB, name: str) -> Optional[str]:
+    ensure_export_state_table(db)
+    return db.scalar("SELECT last_updated_utc FROM export_state WHERE object_name = ?", [name])
+
+
+def export_sqlite_object_delta_to_csv(
+    db: DB,
+    name: str,
+    out_path: Path,
+    since: Optional[str] = None,
+    advance: bool = True,
+) -> int:
+    """
+    Export only rows whose updated_utc is newer than `since`.
+
+    - since=None uses the watermark stored in export_state (first run exports everything).
+    - advance=True moves the watermark to the newest updated_utc written, so the next
+      delta export picks up where this one stopped.
+    - Timestamps are compared after normalize_utc(), not as raw strings.
+    Returns the number of rows written.
+    """
+    if name in FULL_EXPORT_OBJECTS:
+        raise RuntimeError(f"{name} is rebuilt on every ingest; export it in full (without --since/--incremental)")
+    if not ensure_updated_utc_index(db, name):
+        raise RuntimeError(f"{name} has no updated_utc column (views can't be exported incrementally)")
+
+    cols = object_columns(db, name)
+    if since is None:
+        since = export_watermark(db, name)
+    since = normalize_utc(since)
+
+    sql = f'SELECT * FROM "{name}"'
+    params: list[Any] = []
+    if since:
+        # every spelling starts with the date, so the index narrows it down to since's day onward
+        sql += " WHERE updated_utc >= ?"
+        params.append(since[:10])
+    sql += " ORDER BY updated_utc"
+
+    n = 0
+    high = since
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with db.connect() as con, open(out_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(cols)
+        for r in con.execute(sql, params):
+            ts = normalize_utc(r["updated_utc"])
+            if since and (ts is None or ts <= since):
+                continue
+            w.writerow([r[c] for c in cols])
+            if ts and (high is None or ts > high):
+                high = ts
+            n += 1
+
+    if advance:
+        ensure_export_state_table(db)
+        db.execute(
+            """
+            INSERT INTO export_state (object_name, last_updated_utc, last_export_utc, last_out_path, last_rows)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(object_name) DO UPDATE SET
+                last_updated_utc = excluded.last_updated_utc,
+                last_export_utc = excluded.last_export_utc,
+                last_out_path = excluded.last_out_path,
+                last_rows = excluded.last_rows
+            """,
+            [name, high, utc_now_iso(), str(out_path), n],
+        )
+
+    since_s = since or "beginning"
+    console.print(f"[green]Exported[/green] {name} changes since {since_s} → [cyan]{out_path}[/cyan] ({n} rows)")
+    return n
+
 # ----------------------------
 # Menu-first entry
 # ----------------------------
@@ -1027,10 +1169,11 @@ def menu_export():
         menu.add_row("5.", "Export parts_removed")
         menu.add_row("6.", "Export ingested_files")
         menu.add_row("7.", "Export ALL of the above")
+        menu.add_row("8.", "Export changes since last export (delta tables; inventory/parts_received in full)")
         menu.add_row("0.", "Back")
         console.print(menu)
 
-        choice = Prompt.ask("\nChoose", choices=[str(i) for i in range(0, 8)], default="1")
+        choice = Prompt.ask("\nChoose", choices=[str(i) for i in range(0, 9)], default="1")
         if choice == "0":
             return
 
@@ -1073,6 +1216,15 @@ def menu_export():
                 export_sqlite_object_to_csv(db, "parts_received", outdir / "parts_received.csv", order_by="vendor, sku")
                 export_sqlite_object_to_csv(db, "parts_removed", outdir / "parts_removed.csv", order_by="ts_utc DESC")
                 export_sqlite_object_to_csv(db, "ingested_files", outdir / "ingested_files.csv", order_by="first_seen_utc DESC")
+            elif choice == "8":
+                for name in DELTA_EXPORT_OBJECTS:
+                    if "updated_utc" not in _table_columns(db, name):
+                        console.print(f"[dim]Skipping {name} (no updated_utc column yet).[/dim]")
+                        continue
+                    export_sqlite_object_delta_to_csv(db, name, outdir / f"{name}_delta.csv")
+                for name in FULL_EXPORT_OBJECTS:
+                    if _table_exists(db, name):
+                        export_sqlite_object_to_csv(db, name, outdir / f"{name}.csv")
 
             console.print(f"\n[cyan]Export folder:[/cyan] {outdir}")
         except Exception as e:
@@ -1126,6 +1278,18 @@ def menu_inventory():
 def inv_list(db: DB):
         inv_browse(db, title="Inventory (all)", order_by="vendor, sku")
 
+INVENTORY_SEARCH_COLS = [
+    "vendor", "sku", "part_key", "description", "desc_clean",
+    "label_line1", "label_line2", "label_short",
+    "purchase_url", "last_invoice",
+]
+
+def _search_clause(term: str) -> tuple[str, list]:
+    """Free-text match over inventory_view's descriptive columns (browse filter / labels --search)."""
+    like = f"%{term}%"
+    clause = "(" + " OR ".join([f"COALESCE({c}, '') LIKE ? COLLATE NOCASE" for c in INVENTORY_SEARCH_COLS]) + ")"
+    return clause, [like] * len(INVENTORY_SEARCH_COLS)
+
 def inv_browse(
     db: DB,
     where_sql: str | None = None,
@@ -1179,7 +1343,7 @@ def inv_browse(
             SELECT part_key, vendor, sku, label_short, on_hand, avg_unit_cost, last_invoice
             FROM inventory_view
             {_combined_where()}
-            ORDER BY {order_by}
+            ORDER BY {order_by}, part_key
             LIMIT ? OFFSET ?
         """
         return db.rows(sql, params + dyn_params + [ps, offset])
@@ -1326,15 +1490,9 @@ def inv_browse(
                 new_params.append(f"%{flt_vendor}%")
 
             if flt_term:
-                like = f"%{flt_term}%"
-                search_cols = [
-                    "vendor", "sku", "part_key", "description", "desc_clean",
-                    "label_line1", "label_line2", "label_short",
-                    "purchase_url", "last_invoice",
-                ]
-                clauses.append(
-                    "(" + " OR ".join([f"COALESCE({c}, '') LIKE ? COLLATE NOCASE" for c in search_cols]) + ")")
-                new_params.extend([like] * len(search_cols))
+                clause, term_params = _search_clause(flt_term)
+                clauses.append(clause)
+                new_params.extend(term_params)
 
             if flt_min_hand is not None:
                 clauses.append("on_hand >= ?")
@@ -1417,6 +1575,7 @@ def inv_show(db: DB, part_key: str | None = None):
         part_key = Prompt.ask("part_key (e.g. mcmaster:1234K56)", default="").strip()
     if not part_key:
         return
+    part_key = resolve_part_key_input(db, part_key)
 
     rows = db.rows("SELECT * FROM inventory_view WHERE part_key = ?", [part_key])
     if not rows:
@@ -1653,6 +1812,7 @@ def inv_edit_labels(db: DB):
     part_key = Prompt.ask("part_key").strip()
     if not part_key:
         return
+    part_key = resolve_part_key_input(db, part_key)
 
     rows = db.rows("SELECT * FROM parts_received WHERE part_key = ?", [part_key])
     if not rows:
@@ -1883,10 +2043,19 @@ def _reset_database_contents(db: DB) -> None:
 
 # ----------------------------
 def menu_vendors():
+    from studio_inventory.vendors.registry import default_registry
+
     console.clear()
     header()
     console.print("[bold]Vendors[/bold]\n")
-    console.print("Next: DigiKey OAuth + product/media enrichment, then McMaster cert-based API enrichment.")
+    t = Table(title="Receipt parsers", title_justify="left")
+    for col in ("Name", "Version", "Parses", "Source"):
+        t.add_column(col)
+    for spec in default_registry().specs:
+        t.add_row(spec.name, spec.version, ", ".join(sorted(spec.capabilities)), spec.source)
+    console.print(t)
+    console.print("McMaster: run [bold]studio-inventory enrich[/bold] to fetch product info for all mcmaster parts.")
+    console.print("Next: DigiKey OAuth + product/media enrichment.")
     pause()
 
 # ----------------------------
@@ -1903,6 +2072,11 @@ LABEL_SOURCES = [
     ("purchase_url", "Purchase URL"),
     ("label_qr_text", "Label QR text"),
     ("part_key", "Part key"),
+    ("on_hand", "On hand"),
+    ("avg_unit_cost", "Avg unit cost"),
+    ("qr_short", "Short code (compact QR)"),
+    ("product_description", "Vendor description (enriched)"),
+    ("product_family", "Vendor product family (enriched)"),
 ]
 
 ANCHORS = ["UL","UC","UR","ML","MC","MR","LL","LC","LR"]
@@ -1928,6 +2102,8 @@ def list_label_templates() -> list[Path]:
     return sorted(d.glob("*.json"))
 
 def pick_label_template() -> Path | None:
+    from studio_inventory.labels.registry import template_catalog  # reportlab-backed
+
     templates = list_label_templates()
     if not templates:
         console.print("[red]No templates found in label_templates/*.json[/red]")
@@ -1940,14 +2116,13 @@ def pick_label_template() -> Path | None:
     t.add_column("label size", justify="right")
     t.add_column("grid", justify="right")
 
-    for i, p in enumerate(templates, 1):
-        try:
-            tpl = LabelTemplate.from_json(p)
+    for i, (p, tpl, err) in enumerate(template_catalog(templates), 1):
+        if tpl is not None:
             size = f'{tpl.label_w/72:.2f}"×{tpl.label_h/72:.2f}"'
             grid = f"{tpl.cols}×{tpl.rows}"
             name = tpl.name
-        except Exception:
-            name = p.name
+        else:
+            name = p.name + f" [red]{err}[/red]"
             size = ""
             grid = ""
         t.add_row(str(i), name + f" [dim]({p.name})[/dim]", size, grid)
@@ -1986,7 +2161,7 @@ def _fetch_selected_part_keys(db: DB, sel: dict) -> list[str]:
         SELECT part_key
         FROM inventory_view
         {where}
-        ORDER BY {order_by}
+        ORDER BY {order_by}, part_key
         LIMIT ?
     """, list(base_params) + list(dyn_params) + [max_n])
 
@@ -1996,24 +2171,21 @@ def _fetch_selected_part_keys(db: DB, sel: dict) -> list[str]:
             part_keys.append(key_rows[n - 1]["part_key"])
     return part_keys
 
-def _fetch_label_rows(db: DB, part_keys: list[str]) -> list[dict]:
-    if not part_keys:
-        return []
-    qmarks = ",".join(["?"] * len(part_keys))
-    got = db.rows(f"""
-        SELECT
-            part_key, vendor, sku,
-            label_line1, label_line2, label_short,
-            purchase_url, label_qr_text
-        FROM parts_received
-        WHERE part_key IN ({qmarks})
-    """, part_keys)
-    by_key = {r["part_key"]: dict(r) for r in got}
-    return [by_key[k] for k in part_keys if k in by_key]
+def _label_row_query(db: DB, sel: dict) -> LabelRowQuery:
+    """Selected browse rows as a streaming label source (no IN-list, rows read in chunks)."""
+    return LabelRowQuery.from_selection(
+        db.path,
+        where=_combine_where(sel.get("base_where", "") or "", sel.get("dyn_where", "") or ""),
+        params=list(sel.get("base_params", []) or []) + list(sel.get("dyn_params", []) or []),
+        order_by=(sel.get("order_by", "vendor, sku") or "vendor, sku") + ", part_key",
+        row_nums=sel.get("row_nums", []) or [],
+    )
 
 def _default_layout_for_template(tpl_path: Path) -> dict:
+    from studio_inventory.labels.registry import load_template  # reportlab-backed
+
     try:
-        t = LabelTemplate.from_json(tpl_path)
+        t = load_template(tpl_path)
         base_size = int(t.font_size)
     except Exception:
         base_size = 8
@@ -2027,7 +2199,9 @@ def _default_layout_for_template(tpl_path: Path) -> dict:
     }
 
 def _pick_or_create_layout(tpl_path: Path) -> tuple[dict, str | None]:
-    presets = list_label_presets(project_root(), tpl_path)
+    from studio_inventory.labels.registry import load_preset, preset_paths  # reportlab-backed
+
+    presets = preset_paths(project_root(), tpl_path)
     console.print("\n[bold]Layout preset[/bold]")
     if presets:
         t = Table(show_header=True, header_style="bold magenta")
@@ -2043,7 +2217,12 @@ def _pick_or_create_layout(tpl_path: Path) -> tuple[dict, str | None]:
         if 1 <= idx <= len(presets):
             p = presets[idx - 1]
             try:
-                return load_label_preset(p), p.stem
+                return load_preset(p, tpl_path), p.stem
+            except ValueError as e:
+                console.print(f"[red]Preset {p.stem} is invalid:[/red] {e}")
+                console.print("[dim]Starting from the default layout instead.[/dim]")
+                pause()
+                return _default_layout_for_template(tpl_path), None
             except Exception:
                 return _default_layout_for_template(tpl_path), None
         return _default_layout_for_template(tpl_path), None
@@ -2226,6 +2405,9 @@ def _layout_summary(layout: dict) -> None:
     )
 
 def labels_generate(db: DB):
+    from studio_inventory.labels.preview import make_labels_preview  # reportlab-backed
+    from studio_inventory.labels.registry import load_template
+
     console.clear()
     header()
     console.print("[bold]Labels → Generate PDF[/bold]\n")
@@ -2241,24 +2423,20 @@ def labels_generate(db: DB):
     if not sel:
         return
 
-    part_keys = _fetch_selected_part_keys(db, sel)
-    if not part_keys:
+    ensure_label_short_codes(db)
+    rows = _label_row_query(db, sel)
+    n_selected = len(rows)
+    if not n_selected:
         console.print("[yellow]No valid rows selected.[/yellow]")
         pause()
         return
 
-    rows = _fetch_label_rows(db, part_keys)
-    if not rows:
-        console.print("[yellow]No label data found for selected items.[/yellow]")
-        pause()
-        return
-
     # layout preset
     layout, loaded_name = _pick_or_create_layout(tpl_path)
 
     # template font size for defaults
     try:
-        tpl_obj = LabelTemplate.from_json(tpl_path)
+        tpl_obj = load_template(tpl_path)
         tpl_font_size = int(tpl_obj.font_size)
         per_sheet = int(tpl_obj.cols * tpl_obj.rows)
     except Exception:
@@ -2271,7 +2449,7 @@ def labels_generate(db: DB):
         console.clear()
         header()
         console.print("[bold]Labels → Layout & Preview[/bold]")
-        console.print(f"[dim]Template:[/dim] {tpl_path.name}  |  [dim]Selected:[/dim] {len(rows)}  |  [dim]Used labels on sheet:[/dim] {used} / {per_sheet}")
+        console.print(f"[dim]Template:[/dim] {tpl_path.name}  |  [dim]Selected:[/dim] {n_selected}  |  [dim]Used labels on sheet:[/dim] {used} / {per_sheet}")
         if loaded_name:
             console.print(f"[dim]Preset:[/dim] {loaded_name}")
         _layout_summary(layout)
@@ -2280,7 +2458,7 @@ def labels_generate(db: DB):
         menu.add_row("1.", "Edit elements")
         menu.add_row("2.", "Edit QR")
         menu.add_row("3.", "Set used labels on sheet")
-        menu.add_row("4.", "Preview (opens PDF)")
+        menu.add_row("4.", "Preview first sheet")
         menu.add_row("5.", "Save preset")
         menu.add_row("6.", "Export final PDF")
         menu.add_row("0.", "Back")
@@ -2306,35 +2484,47 @@ def labels_generate(db: DB):
                 console.print(f"[red]Failed to save preset:[/red] {e}")
             pause()
         elif choice == "4":
-            preview_path = exports_dir() / "_labels_preview.pdf"
-            make_labels_pdf(
-                template_path=tpl_path,
-                out_pdf=preview_path,
-                rows=rows,
-                start_pos=used + 1,
-                include_qr=False,
-                layout=layout,
-                draw_boxes=False,
-            )
+            # First sheet only; opens a PNG thumbnail when renderPM can rasterize
+            try:
+                preview_path = make_labels_preview(
+                    template_path=tpl_path,
+                    out_pdf=exports_dir() / "_labels_preview.pdf",
+                    rows=rows,
+                    start_pos=used + 1,
+                    include_qr=False,
+                    layout=layout,
+                )
+            except ValueError as e:
+                console.print(f"[red]Layout problem:[/red] {e}")
+                pause()
+                continue
             _open_pdf(preview_path)
             pause()
         elif choice == "6":
             default_name = f"labels_{timestamp_slug()}.pdf"
+            console.print("[dim]Use a .zpl filename for thermal-printer (ZPL) output.[/dim]")
             name = Prompt.ask("Export filename", default=default_name).strip()
-            if not name.lower().endswith(".pdf"):
+            if not name.lower().endswith((".pdf", ".zpl")):
                 name += ".pdf"
-            out_pdf = exports_dir() / name
-            make_labels_pdf(
-                template_path=tpl_path,
-                out_pdf=out_pdf,
-                rows=rows,
-                start_pos=used + 1,
-                include_qr=False,
-                layout=layout,
-                draw_boxes=False,
-            )
-            _open_pdf(out_pdf)
-            console.print(f"[green]Exported:[/green] {out_pdf}")
+            out_file = exports_dir() / name
+            fmt = format_for_path(out_file)
+            try:
+                render_labels(
+                    fmt,
+                    template_path=tpl_path,
+                    out=out_file,
+                    rows=rows,
+                    start_pos=used + 1,
+                    include_qr=False,
+                    layout=layout,
+                )
+            except ValueError as e:
+                console.print(f"[red]Layout problem:[/red] {e}")
+                pause()
+                continue
+            if fmt == "pdf":
+                _open_pdf(out_file)
+            console.print(f"[green]Exported:[/green] {out_file}")
             pause()
 
 def menu_labels():
@@ -2361,11 +2551,15 @@ def inventory():
     ensure_workspace()
     menu_inventory()
 
-@app.command()
-def labels():
+labels_app = typer.Typer(add_completion=False, help="Label sheets (interactive generator, or `labels print` for batch jobs).")
+app.add_typer(labels_app, name="labels")
+
+@labels_app.callback(invoke_without_command=True)
+def labels(ctx: typer.Context):
     """Interactive label generator (PDF)."""
-    ensure_workspace()
-    menu_labels()
+    if ctx.invoked_subcommand is None:
+        ensure_workspace()
+        menu_labels()
 
 @app.command()
 def diagnostics():
@@ -2419,6 +2613,16 @@ def export(
         "--db",
         help="Path to SQLite database. Default: <workspace>/studio_inventory.sqlite",
     ),
+    since: Optional[str] = typer.Option(
+        None,
+        "--since",
+        help="Only export rows with updated_utc after this ISO timestamp (e.g. 2026-01-30 or 2026-01-30T18:00:00).",
+    ),
+    incremental: bool = typer.Option(
+        False,
+        "--incremental",
+        help="Only export rows changed since the last incremental export of this object, then advance its watermark (inventory and parts_received are always exported in full).",
+    ),
 ):
     """Export a table/view to CSV (non-interactive)."""
     ensure_workspace()
@@ -2452,8 +2656,392 @@ def export(
         else exports_dir() / f"{object_name}_{timestamp_slug()}.csv"
     )
 
+    if (since or incremental) and object_name in FULL_EXPORT_OBJECTS:
+        console.print(f"[dim]{object_name} is rebuilt on every ingest; exporting it in full.[/dim]")
+    elif since or incremental:
+        try:
+            export_sqlite_object_delta_to_csv(db, object_name, out_path, since=since, advance=incremental)
+        except RuntimeError as e:
+            console.print(f"[red]{e}[/red]")
+            raise typer.Exit(code=2)
+        return
+
     export_sqlite_object_to_csv(db, object_name, out_path)
 
+def _resolve_label_template(spec: str) -> Path | None:
+    from studio_inventory.labels.registry import load_template  # reportlab-backed
+
+    p = Path(spec).expanduser()
+    if p.is_file():
+        return p.resolve()
+    want = spec.strip().lower().removesuffix(".json")
+    # workspace templates (seeded by `init`) first, then the source checkout's
+    for tp in sorted(label_templates_dir().glob("*.json")) + list_label_templates():
+        if tp.stem.lower() == want:
+            return tp
+        try:
+            if load_template(tp).name.strip().lower() == want:
+                return tp
+        except (OSError, ValueError):
+            continue
+    return None
+
+def _resolve_label_preset(tpl_path: Path, spec: str) -> Path | None:
+    from studio_inventory.labels.registry import preset_paths  # reportlab-backed
+
+    p = Path(spec).expanduser()
+    if p.is_file():
+        return p.resolve()
+    want = spec.strip().lower().removesuffix(".json")
+    for pp in preset_paths(project_root(), tpl_path):
+        if pp.stem.lower() == want:
+            return pp
+    return None
+
+def _read_part_keys_file(db: DB, path: Path) -> list[str]:
+    """One part key (or alias) per line; blank lines and # comments skipped; '-' reads stdin."""
+    text = sys.stdin.read() if str(path) == "-" else Path(path).expanduser().read_text(encoding="utf-8")
+    idents = [ln.split("#", 1)[0].strip() for ln in text.splitlines()]
+    idents = [i for i in idents if i]
+    if not idents or not _table_exists(db, "parts_received"):
+        return idents
+    with db.connect() as con:
+        return [resolve_part_key(con, i) or i for i in idents]
+
+def _since_ingest_clause(db: DB, since: str) -> tuple[str, list]:
+    """Parts with line items from receipts first ingested at/after `since` (ISO date/time, UTC) or in the last run."""
+    since = since.strip()
+    if since.lower() == "last":
+        last = db.scalar("SELECT MAX(first_seen_utc) FROM ingested_files") if _table_exists(db, "ingested_files") else None
+        if not last:
+            raise ValueError("no ingest runs recorded yet")
+        since = str(last)[:10]  # the whole day of the most recent run
+    else:
+        try:
+            datetime.fromisoformat(since)
+        except ValueError:
+            raise ValueError(f"--since-ingest expects 'last' or an ISO date/timestamp (got {since!r})") from None
+    clause = """part_key IN (
+        SELECT li.part_key
+        FROM line_items li
+        JOIN ingested_files f ON f.file_hash = li.file_hash
+        WHERE f.first_seen_utc >= ?
+    )"""
+    return clause, [since]
+
+@labels_app.command("print")
+def labels_print(
+    template: str = typer.Option(
+        ...,
+        "--template",
+        "-t",
+        help="Label template name or path (see label_templates/*.json).",
+    ),
+    preset: Optional[str] = typer.Option(
+        None,
+        "--preset",
+        "-p",
+        help="Layout preset name or path. Default: the built-in layout for the template.",
+    ),
+    where: Optional[str] = typer.Option(
+        None,
+        "--where",
+        help="SQL condition over inventory_view, e.g. \"vendor = 'mcmaster' AND on_hand > 0\".",
+    ),
+    search: Optional[str] = typer.Option(
+        None,
+        "--search",
+        "-s",
+        help="Free-text match (same columns as the inventory browser filter).",
+    ),
+    part_keys_file: Optional[Path] = typer.Option(
+        None,
+        "--part-keys-file",
+        "-k",
+        help="File with one part key (or alias) per line; '-' reads stdin. Labels follow file order.",
+    ),
+    since_ingest: Optional[str] = typer.Option(
+        None,
+        "--since-ingest",
+        help="Only parts from receipts ingested at/after this ISO date or timestamp (UTC), or 'last' for the latest run.",
+    ),
+    start_pos: int = typer.Option(
+        1,
+        "--start-pos",
+        min=1,
+        help="Label position to start at on the first sheet (1 = top-left).",
+    ),
+    out: Optional[Path] = typer.Option(
+        None,
+        "--out",
+        "-O",
+        help="Output path (file, or a printer device/spool path for ZPL; '-' = stdout for ZPL). "
+             "Default: <workspace>/exports/labels_<timestamp>.<format>",
+    ),
+    fmt: Optional[str] = typer.Option(
+        None,
+        "--format",
+        "-f",
+        help="Output format: pdf (label sheets) or zpl (thermal printer). Default: from --out suffix, else pdf.",
+    ),
+    dpi: int = typer.Option(
+        ZPL_DEFAULT_DPI,
+        "--dpi",
+        help="Printer resolution for ZPL output (203 or 300 for most Zebra printers).",
+    ),
+    workers: int = typer.Option(
+        1,
+        "--workers",
+        min=0,
+        help="Render processes for very large PDF jobs (0 = one per CPU). Usually slower below a few thousand labels.",
+    ),
+    db_path: Optional[Path] = typer.Option(
+        None,
+        "--db",
+        help="Path to SQLite database. Default: <workspace>/studio_inventory.sqlite",
+    ),
+):
+    """Generate labels without prompts (for scripts / nightly runs after ingest)."""
+    from studio_inventory.labels.registry import load_preset, load_template  # reportlab-backed
+
+    ensure_workspace()
+    db = get_db(db_path)
+
+    fmt = (fmt or (format_for_path(out) if out else "pdf")).lower()
+    if fmt not in LABEL_FORMATS:
+        console.print(f"[red]Unknown format:[/red] {fmt} (expected {', '.join(LABEL_FORMATS)})")
+        raise typer.Exit(code=2)
+
+    tpl_path = _resolve_label_template(template)
+    if tpl_path is None:
+        console.print(f"[red]Unknown template:[/red] {template}")
+        raise typer.Exit(code=2)
+
+    if preset:
+        preset_path = _resolve_label_preset(tpl_path, preset)
+        if preset_path is None:
+            console.print(f"[red]Unknown preset for {tpl_path.stem}:[/red] {preset}")
+            raise typer.Exit(code=2)
+        try:
+            layout = load_preset(preset_path, tpl_path)
+        except ValueError as e:
+            console.print(f"[red]Invalid preset:[/red] {e}")
+            raise typer.Exit(code=2)
+    else:
+        layout = _default_layout_for_template(tpl_path)
+
+    clauses: list[str] = []
+    params: list = []
+    if where and where.strip():
+        clauses.append(f"({where.strip()})")
+    if search and search.strip():
+        clause, term_params = _search_clause(search.strip())
+        clauses.append(clause)
+        params.extend(term_params)
+    if since_ingest:
+        try:
+            clause, since_params = _since_ingest_clause(db, since_ingest)
+        except ValueError as e:
+            console.print(f"[red]{e}[/red]")
+            raise typer.Exit(code=2)
+        clauses.append(clause)
+        params.extend(since_params)
+
+    part_keys = _read_part_keys_file(db, part_keys_file) if part_keys_file else None
+    ensure_label_short_codes(db)
+
+    rows = LabelRowQuery.from_selection(
+        db.path,
+        where=(" WHERE " + " AND ".join(clauses) + " ") if clauses else "",
+        params=params,
+        order_by="vendor, sku, part_key",
+        part_keys=part_keys,
+    )
+    try:
+        n = len(rows)
+    except sqlite3.Error as e:
+        console.print(f"[red]Query failed:[/red] {e}")
+        raise typer.Exit(code=2)
+    if not n:
+        console.print("[yellow]No labels matched; nothing written.[/yellow]")
+        return
+
+    if out is not None and str(out) == "-":
+        if fmt != "zpl":
+            console.print("[red]--out - (stdout) is only supported for ZPL output.[/red]")
+            raise typer.Exit(code=2)
+        out_path: Path | str = "-"
+    else:
+        out_path = Path(out).expanduser().resolve() if out else exports_dir() / f"labels_{timestamp_slug()}.{fmt}"
+    try:
+        render_labels(
+            fmt,
+            template_path=tpl_path,
+            out=out_path,
+            rows=rows,
+            start_pos=start_pos,
+            include_qr=False,
+            layout=layout,
+            workers=workers or os.cpu_count() or 1,
+            dpi=dpi,
+        )
+    except ValueError as e:
+        console.print(f"[red]Layout problem:[/red] {e}")
+        raise typer.Exit(code=2)
+
+    if out_path == "-":
+        return
+    if fmt == "pdf":
+        tpl = load_template(tpl_path)
+        per_sheet = max(1, tpl.cols * tpl.rows)
+        sheets = -(-(start_pos - 1 + n) // per_sheet)
+        console.print(f"[green]Wrote {n} label(s) on {sheets} sheet(s):[/green] {out_path}")
+    else:
+        console.print(f"[green]Wrote {n} ZPL label(s):[/green] {out_path}")
+
+@labels_app.command("resolve")
+def labels_resolve(
+    code: str = typer.Argument(..., help="Short code or scanned QR payload, e.g. SI:7K3Q9A"),
+    db_path: Optional[Path] = typer.Option(
+        None,
+        "--db",
+        help="Path to SQLite database. Default: <workspace>/studio_inventory.sqlite",
+    ),
+    open_url: bool = typer.Option(
+        False,
+        "--open",
+        help="Open the part's current URL in the browser.",
+    ),
+):
+    """Look up the part (and its current URL) behind a label short code."""
+    ensure_workspace()
+    db = get_db(db_path)
+    if not _table_exists(db, "parts_received"):
+        console.print("[red]No inventory database yet.[/red]")
+        raise typer.Exit(code=1)
+    with db.connect() as con:
+        hit = short_code_target(con, code)
+    if hit is None:
+        console.print(f"[red]Unknown short code:[/red] {code}")
+        raise typer.Exit(code=1)
+
+    console.print(f"[bold]{hit['part_key']}[/bold]  {hit.get('label_line1', '')}")
+    if hit["url"]:
+        console.print(hit["url"])
+        if open_url:
+            typer.launch(hit["url"])
+
+@app.command()
+def enrich(
+    workers: int = typer.Option(DEFAULT_WORKERS, "--workers", "-j", help="Concurrent API requests."),
+    rate: float = typer.Option(DEFAULT_RATE, "--rate", help="Starting API calls per second across all workers."),
+    max_rate: Optional[float] = typer.Option(
+        None, "--max-rate", help="Ceiling for the adaptive rate (it rises until the API throttles). Default: 10x --rate."
+    ),
+    limit: Optional[int] = typer.Option(None, "--limit", "-n", help="Enrich at most this many parts."),
+    refresh: bool = typer.Option(False, "--refresh", help="Re-fetch everything, ignoring cache expiry and validators."),
+    prices: bool = typer.Option(False, "--prices", help="Also fetch price tiers."),
+    base_url: Optional[str] = typer.Option(
+        None,
+        "--base-url",
+        help="API root, e.g. http://127.0.0.1:8765/v1 for the local stub. Default: MCMASTER_API_BASE or the live API.",
+    ),
+    record: Optional[Path] = typer.Option(None, "--record", help="Record every API response to this cassette file."),
+    replay: Optional[Path] = typer.Option(
+        None, "--replay", help="Answer API calls from this cassette file instead of the network."
+    ),
+    replay_speed: float = typer.Option(
+        1.0, "--replay-speed", help="Multiplier on recorded latencies when replaying (0: no delay)."
+    ),
+    db_path: Optional[Path] = typer.Option(
+        None,
+        "--db",
+        help="Path to SQLite database. Default: <workspace>/studio_inventory.sqlite",
+    ),
+):
+    """Fetch McMaster product info for mcmaster:* parts into the product_info cache (missing or expired entries only)."""
+    from studio_inventory.vendors.cassette import Cassette, Recorder, Replayer  # requests-backed
+    from studio_inventory.vendors.mcmaster_api import BASE as MCMASTER_BASE, McMasterClient, McMasterCreds
+
+    ensure_workspace()
+    db = get_db(db_path)
+    if not _table_exists(db, "parts_received"):
+        console.print("[red]No parts_received table yet.[/red] Run an ingest first.")
+        raise typer.Exit(code=2)
+    if record and replay:
+        console.print("[red]--record and --replay can't be combined.[/red]")
+        raise typer.Exit(code=2)
+
+    base = base_url or os.environ.get("MCMASTER_API_BASE") or MCMASTER_BASE
+    transport = None
+    if replay:
+        try:
+            transport = Replayer(Cassette.load(replay), speed=replay_speed)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]Can't read cassette:[/red] {e}")
+            raise typer.Exit(code=2)
+        base = f"replay:{replay.name}"
+    elif record:
+        transport = Recorder(Cassette(record))
+    try:
+        creds = McMasterCreds.from_env()
+    except KeyError as e:
+        if not (replay or base.startswith("http://")):
+            console.print(f"[red]Missing {e.args[0]}[/red] (set it in secrets/mcmaster.env).")
+            raise typer.Exit(code=2)
+        creds = McMasterCreds(username="local", password="", pfx_path="", pfx_password="")  # plain-http stub
+
+    with db.connect() as con:
+        n = len(pending_parts(con, refresh=refresh, prices=prices, limit=limit))
+    if not n:
+        console.print("Nothing to enrich.")
+        return
+    console.print(f"Enriching {n} McMaster part(s) from {base} ({workers} workers, {rate:g} calls/s)…")
+
+    done = 0
+
+    def progress(_r) -> None:
+        nonlocal done
+        done += 1
+        if done % 100 == 0 or done == n:
+            console.print(f"  {done}/{n}", style="dim")
+
+    con = db.connect()
+    try:
+        with McMasterClient(
+            creds,
+            base_url=None if replay else base,
+            pool_size=workers,
+            token_cache=False if replay else None,
+            transport=transport,
+        ) as client:
+            stats = enrich_mcmaster(
+                con, client, workers=workers, rate=rate, max_rate=max_rate, refresh=refresh, prices=prices,
+                limit=limit, progress=progress,
+            )
+    finally:
+        con.close()
+
+    console.print(
+        f"✅ {stats.ok} enriched, {stats.unchanged} unchanged, {stats.not_found} not found, {stats.errors} error(s) "
+        f"in {stats.seconds:.1f}s ({stats.per_second:.1f} parts/s)"
+    )
+    for msg in stats.error_samples:
+        console.print(f"  [red]{msg}[/red]")
+
+    t = Table(title="API calls", title_justify="left")
+    for col in ("Endpoint", "Calls", "Retries", "Errors", "p50 ms", "p95 ms", "Statuses"):
+        t.add_column(col, justify="left" if col in ("Endpoint", "Statuses") else "right")
+    for ep in stats.endpoints:
+        t.add_row(
+            ep["endpoint"], str(ep["calls"]), str(ep["retries"]), str(ep["errors"]),
+            f"{ep['p50_ms']:.0f}", f"{ep['p95_ms']:.0f}",
+            " ".join(f"{k}×{v}" for k, v in ep["statuses"].items()),
+        )
+    console.print(t)
+    extra = f", paused {stats.paused_s:.1f}s thread-time over {stats.circuit_opened} circuit opening(s)" if stats.circuit_opened else ""
+    console.print(f"Final rate {stats.final_rate:.1f} calls/s{extra}", style="dim")
+
 @app.command()
 def init():
     """
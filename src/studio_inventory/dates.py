@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
 import re
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
 
 _MONTHS = {
     "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
     "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
 }
 
+_HAS_TIME = re.compile(r"\d{2}:\d{2}")
+_MONTH_NAME = re.compile(r"^([A-Za-z]{3,9})\s+(\d{1,2}),\s*(\d{4})(?:\s+(\d{1,2}:\d{2})\s*([AaPp][Mm]))?$")
+_DAY_MON_YEAR = re.compile(r"^(\d{1,2})-([A-Za-z]{3})-(\d{4})$")
+
 def _try_strptime(s: str, fmts: list[str]) -> datetime | None:
     for fmt in fmts:
         try:
@@ -36,7 +44,7 @@ def normalize_datetime_iso(value: str | None) -> str | None:
     # Already ISO-ish
     dt = _try_strptime(s, ["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M"])
     if dt:
-        if re.search(r"\d{2}:\d{2}", s):
+        if _HAS_TIME.search(s):
             return dt.strftime("%Y-%m-%dT%H:%M:%S")
         return dt.strftime("%Y-%m-%d")
 
@@ -48,31 +56,176 @@ def normalize_datetime_iso(value: str | None) -> str | None:
     # Month name formats with optional time:
     #   Aug 25, 2025
     #   Sep 3, 2025 6:12 PM
-    m = re.match(r"^([A-Za-z]{3,9})\s+(\d{1,2}),\s*(\d{4})(?:\s+(\d{1,2}:\d{2})\s*([AaPp][Mm]))?$", s)
+    m = _MONTH_NAME.match(s)
     if m:
-        mon_s, day_s, year_s, time_s, ampm = m.groups()
-        mon = _MONTHS.get(mon_s[:3].lower())
-        if mon:
-            day = int(day_s)
-            year = int(year_s)
-            if time_s and ampm:
-                t = datetime.strptime(f"{time_s} {ampm.upper()}", "%I:%M %p")
-                dt = datetime(year, mon, day, t.hour, t.minute, 0)
-                return dt.strftime("%Y-%m-%dT%H:%M:%S")
-            dt = datetime(year, mon, day)
-            return dt.strftime("%Y-%m-%d")
+        out = _month_name_iso(m)
+        if out:
+            return out
 
     # DigiKey-ish: 20-SEP-2025
-    m = re.match(r"^(\d{1,2})-([A-Za-z]{3})-(\d{4})$", s)
+    m = _DAY_MON_YEAR.match(s)
     if m:
-        d, mon_s, y = m.groups()
-        mon = _MONTHS.get(mon_s.lower())
-        if mon:
-            dt = datetime(int(y), mon, int(d))
-            return dt.strftime("%Y-%m-%d")
+        return _day_mon_year_iso(m)
 
     return None
 
+def _month_name_iso(m: re.Match) -> str | None:
+    mon_s, day_s, year_s, time_s, ampm = m.groups()
+    mon = _MONTHS.get(mon_s[:3].lower())
+    if not mon:
+        return None
+    try:
+        if time_s and ampm:
+            t = datetime.strptime(f"{time_s} {ampm.upper()}", "%I:%M %p")
+            return datetime(int(year_s), mon, int(day_s), t.hour, t.minute, 0).strftime("%Y-%m-%dT%H:%M:%S")
+        return datetime(int(year_s), mon, int(day_s)).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+def _day_mon_year_iso(m: re.Match) -> str | None:
+    d, mon_s, y = m.groups()
+    mon = _MONTHS.get(mon_s.lower())
+    if not mon:
+        return None
+    try:
+        return datetime(int(y), mon, int(d)).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+# ----------------------------
+# Batch normalization
+# ----------------------------
+
+_ISO_DATE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+_ISO_DATETIME = re.compile(r"^(\d{4})-(\d{2})-(\d{2})(?:T(\d{2}):(\d{2})(?::(\d{2}))?| (\d{2}):(\d{2}):(\d{2}))$")
+_US_SLASH = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
+_US_DASH = re.compile(r"^(\d{1,2})-(\d{1,2})-(\d{4})$")
+
+def _iso_date(m: re.Match) -> str | None:
+    y, mo, d = map(int, m.groups())
+    try:
+        return datetime(y, mo, d).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+def _iso_datetime(m: re.Match) -> str | None:
+    y, mo, d, hh, mi, ss, hh2, mi2, ss2 = m.groups()
+    try:
+        dt = datetime(int(y), int(mo), int(d), int(hh or hh2), int(mi or mi2), int(ss or ss2 or 0))
+    except ValueError:
+        return None
+    return dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+def _us_date(m: re.Match) -> str | None:
+    mo, d, y = map(int, m.groups())
+    try:
+        return datetime(y, mo, d).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class _Shape:
+    name: str
+    pattern: re.Pattern
+    convert: Callable[[re.Match], Optional[str]]
+    pd_format: Optional[str] = None  # date-only shapes pandas can parse a column at a time
+
+
+# Strict, mutually exclusive patterns, so trying them in any order gives the same answer
+# normalize_datetime_iso() would. Anything else takes the strptime cascade.
+_SHAPES = (
+    _Shape("iso_date", _ISO_DATE, _iso_date, "%Y-%m-%d"),
+    _Shape("iso_datetime", _ISO_DATETIME, _iso_datetime),
+    _Shape("us_slash", _US_SLASH, _us_date, "%m/%d/%Y"),
+    _Shape("us_dash", _US_DASH, _us_date, "%m-%d-%Y"),
+    _Shape("day_mon_year", _DAY_MON_YEAR, _day_mon_year_iso, "%d-%b-%Y"),
+    _Shape("month_name", _MONTH_NAME, _month_name_iso),
+)
+
+
+def _clean(value) -> str:
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return str(value).strip()
+
+
+class DateNormalizer:
+    """Batch version of normalize_datetime_iso() (same output) for whole order tables.
+
+    - Common shapes (ISO, MM/DD/YYYY, 01-SEP-2025, Aug 25, 2025 6:12 PM) are matched by
+      precompiled regexes before falling back to the strptime cascade.
+    - The shape that parsed most of a vendor's dates is tried first for that vendor next time.
+    - Each distinct string is parsed once per normalizer.
+    - Date-only shapes are parsed a column at a time with pd.to_datetime(format=...).
+    """
+
+    def __init__(self) -> None:
+        self._memo: dict[str, Optional[str]] = {}
+        self._learned: dict[str, str] = {}  # vendor -> shape name
+
+    def _shapes_for(self, vendor: str) -> list[_Shape]:
+        first = self._learned.get(vendor)
+        return sorted(_SHAPES, key=lambda sh: sh.name != first)
+
+    def normalize(self, value, vendor: str = "") -> str | None:
+        s = _clean(value)
+        if not s:
+            return None
+        if s in self._memo:
+            return self._memo[s]
+        out = None
+        for shape in self._shapes_for(vendor):
+            m = shape.pattern.match(s)
+            if m:
+                out = shape.convert(m)
+                if out:
+                    self._learned[vendor] = shape.name
+                break
+        if out is None:
+            out = normalize_datetime_iso(s)
+        self._memo[s] = out
+        return out
+
+    def normalize_series(self, values: pd.Series, vendors: pd.Series | str | None = None) -> pd.Series:
+        """Normalize a column; None where a value can't be parsed. vendors: a column aligned with values, or one name."""
+        s = values.map(_clean)
+        if vendors is None or isinstance(vendors, str):
+            groups: Iterable = [(vendors or "", s)]
+        else:
+            groups = s.groupby(vendors.fillna("").astype(str), sort=False)
+        for vendor, col in groups:
+            todo = pd.Series(pd.unique(col), dtype=object)
+            todo = todo[(todo != "") & ~todo.isin(self._memo.keys())]
+            if not todo.empty:
+                self._fill(todo, vendor)
+        memo = self._memo
+        return pd.Series([memo.get(x) if x else None for x in s], index=values.index, dtype=object)
+
+    def _fill(self, todo: pd.Series, vendor: str) -> None:
+        counts: dict[str, int] = {}
+        for shape in self._shapes_for(vendor):
+            if todo.empty:
+                break
+            hit = todo.str.fullmatch(shape.pattern)
+            if not hit.any():
+                continue
+            matched = todo[hit]
+            if shape.pd_format:
+                parsed = pd.to_datetime(matched, format=shape.pd_format, errors="coerce")
+                ok = parsed.notna()
+                resolved = dict(zip(matched[ok], parsed[ok].dt.strftime("%Y-%m-%d")))
+            else:
+                resolved = {x: out for x in matched if (out := shape.convert(shape.pattern.match(x)))}
+            self._memo.update(resolved)
+            counts[shape.name] = len(resolved)
+            todo = todo[~todo.isin(resolved.keys())]
+        for x in todo:
+            self._memo[x] = normalize_datetime_iso(x)
+        if counts:
+            self._learned[vendor] = max(counts, key=counts.get)
+
 def pretty_date(value: str | None) -> str:
     """Format ISO output from normalize_datetime_iso() into the UX-friendly date column.
 
@@ -5,6 +5,7 @@ from pathlib import Path
 from datetime import datetime
 
 import hashlib
+import json
 import shutil
 import sqlite3
 import uuid
@@ -15,6 +16,16 @@ from urllib.parse import quote_plus
 import pandas as pd
 
 from studio_inventory.vendors.registry import pick_parser
+from studio_inventory.dates import DateNormalizer
+from studio_inventory.archive import archive_pdf_to_imports
+from studio_inventory.part_identity import (
+    PART_KEY_MIGRATION,
+    ensure_part_identity_schema,
+    migrate_part_keys,
+    part_key_from_row,
+    record_aliases_for_rows,
+)
+from studio_inventory.short_codes import assign_short_codes
 from studio_inventory.paths import workspace_root, imports_run_dir
 
 
@@ -41,23 +52,6 @@ def suppress_pdfminer_font_warnings() -> None:
 
 suppress_pdfminer_font_warnings()
 
-def archive_pdf_to_imports(original_path: Path, run_dir: Path) -> Path:
-    """Copy an original PDF into workspace imports/YYYY-MM-DD/, returning the archived path."""
-    run_dir.mkdir(parents=True, exist_ok=True)
-    dest = run_dir / original_path.name
-    if dest.exists():
-        stem, suffix = original_path.stem, original_path.suffix
-        i = 2
-        while True:
-            cand = run_dir / f"{stem}__{i}{suffix}"
-            if not cand.exists():
-                dest = cand
-                break
-            i += 1
-    shutil.copy2(str(original_path), str(dest))
-    return dest
-
-
 def sha256_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
     h = hashlib.sha256()
     with path.open("rb") as f:
@@ -403,7 +397,7 @@ def ingest_receipts(pdf_paths: list[Path], debug: bool = False):
         seen_hashes.add(file_hash)
 
         original_pdf_path = pdf_path
-        archived_pdf_path = archive_pdf_to_imports(original_pdf_path, archive_dir)
+        archived_pdf_path = archive_pdf_to_imports(original_pdf_path, archive_dir, file_hash=file_hash)
         pdf_for_parse = archived_pdf_path
 
         if debug:
@@ -477,7 +471,8 @@ def ingest_receipts(pdf_paths: list[Path], debug: bool = False):
                     return v
             return ""
         raw = orders_df.apply(_pick_date, axis=1)
-        orders_df["order_date"] = raw.apply(lambda s: normalize_datetime_iso(s) or "")
+        vendors = orders_df["vendor"] if "vendor" in orders_df.columns else None
+        orders_df["order_date"] = DateNormalizer().normalize_series(raw, vendors).fillna("")
 
     # Add label fields for all vendors (for drawer/bin labels)
     if not line_items_df.empty:
@@ -548,19 +543,8 @@ def ingest_receipts(pdf_paths: list[Path], debug: bool = False):
             )
             line_items_df["line_total"] = line_items_df["line_total"].fillna(computed_total)
 
-        # A stable part key: prefer vendor+sku, fallback vendor+mfg_part, fallback vendor+description hash
-        def _part_key(row):
-            v = str(row.get("vendor") or "")
-            sku = str(row.get("sku") or "").strip()
-            mfg = str(row.get("mfg_part") or "").strip()
-            desc = str(row.get("description") or "").strip()
-            if sku:
-                return f"{v}:{sku}"
-            if mfg:
-                return f"{v}:{mfg}"
-            return f"{v}:{hash(desc)}"
-
-        line_items_df["part_key"] = line_items_df.apply(_part_key, axis=1)
+        # A stable part key: prefer vendor+sku, fallback vendor+mfg_pn, fallback vendor+description digest
+        line_items_df["part_key"] = line_items_df.apply(part_key_from_row, axis=1)
         # Links + QR targets (purchase URL and optional Airtable URL)
         line_items_df["purchase_url"] = line_items_df.apply(
             lambda r: make_purchase_url(str(r.get("vendor", "") or ""), str(r.get("sku", "") or "")),
@@ -613,24 +597,413 @@ def ingest_receipts(pdf_paths: list[Path], debug: bool = False):
     return orders_df, line_items_df, parts_received_df, parts_removed_df
 
 
-def upsert_master_csv(new_df: pd.DataFrame, master_path: Path, key_cols: list[str]) -> pd.DataFrame:
-    """Append new_df into master_path, dropping duplicates by key_cols."""
-    master_path.parent.mkdir(parents=True, exist_ok=True)
+# ----------------------------
+# Master store (backs the *_master.csv exports)
+# ----------------------------
 
-    if master_path.exists():
-        old = pd.read_csv(master_path)
-        combined = pd.concat([old, new_df], ignore_index=True)
-    else:
-        combined = new_df.copy()
+# master name -> key columns (a later row with the same key replaces the earlier one)
+MASTER_KEYS = {
+    "orders": ["vendor", "invoice", "source_file"],
+    "line_items": ["vendor", "invoice", "line", "sku", "source_file"],
+    "parts_removed": ["removal_uid"],
+}
+
+# Set to 1 to leave the *_master.csv exports alone (the master store is still updated)
+SKIP_MASTER_CSV = os.environ.get("STUDIO_INV_SKIP_MASTER_CSV", "").strip().lower() in {"1", "true", "yes"}
+
+
+def _master_key_part(v) -> str | None:
+    if v is None:
+        return None
+    try:
+        if pd.isna(v):
+            return None
+    except (TypeError, ValueError):
+        pass
+    # 1234.0 (CSV round-trip) and "1234" (fresh parse) are the same key
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    return str(v).strip()
+
+
+class MasterStore:
+    """
+    Append-only, key-indexed store behind the *_master.csv files.
+
+    Each master (see MASTER_KEYS) is a SQLite table keyed by its normalized key columns,
+    so an upsert only touches the incoming batch instead of re-reading and rewriting
+    the whole history. Every upsert batch gets the next sequence number (_seq), which
+    lets callers pull "rows changed since N" and lets the CSVs be rewritten lazily.
+    """
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS store_meta (name TEXT PRIMARY KEY, value TEXT);")
+            conn.commit()
+
+    @staticmethod
+    def _table(name: str) -> str:
+        return f"master_{name}"
+
+    def _get_meta(self, conn: sqlite3.Connection, key: str, default: str | None = None) -> str | None:
+        row = conn.execute("SELECT value FROM store_meta WHERE name = ?;", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value) -> None:
+        conn.execute(
+            "INSERT INTO store_meta(name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value;",
+            (key, str(value)),
+        )
+
+    def seq(self) -> int:
+        with self._connect() as conn:
+            return int(self._get_meta(conn, "seq", "0"))
+
+    def get_mark(self, mark: str) -> int:
+        """Named sequence bookmark, e.g. how far the SQLite DB has been synced."""
+        with self._connect() as conn:
+            return int(self._get_meta(conn, f"mark:{mark}", "0"))
+
+    def set_mark(self, mark: str, seq: int) -> None:
+        with self._connect() as conn:
+            self._set_meta(conn, f"mark:{mark}", int(seq))
+            conn.commit()
+
+    def upsert(self, name: str, df: pd.DataFrame, key_cols: list[str] | None = None) -> int:
+        """Insert/replace df's rows by key; returns the batch sequence number (0 if df is empty)."""
+        if df is None or df.empty:
+            return 0
+        key_cols = key_cols or MASTER_KEYS[name]
+        table = self._table(name)
+
+        df = df.copy()
+        for c in key_cols:
+            if c not in df.columns:
+                df[c] = pd.NA
+        keys = df[key_cols].apply(lambda r: json.dumps([_master_key_part(v) for v in r]), axis=1)
+        # Within one batch the last row for a key wins (same as drop_duplicates(keep="last"))
+        df = df.assign(_key=keys.values).drop_duplicates(subset=["_key"], keep="last")
+
+        with self._connect() as conn:
+            batch_seq = int(self._get_meta(conn, "seq", "0")) + 1
+            df["_seq"] = batch_seq
+
+            _ensure_table(conn, table, "_key")
+            cols = [c for c in df.columns if c]
+            _ensure_columns(conn, table, cols, df=df)
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_seq" ON "{table}"(_seq);')
+
+            col_list = ", ".join([f'"{c}"' for c in cols])
+            placeholders = ", ".join(["?"] * len(cols))
+            update_set = ", ".join([f'"{c}"=excluded."{c}"' for c in cols if c != "_key"])
+            sql = f"""
+                INSERT INTO "{table}" ({col_list})
+                VALUES ({placeholders})
+                ON CONFLICT("_key") DO UPDATE SET {update_set};
+            """
+            rows = [tuple(None if pd.isna(v) else v for v in r) for r in df[cols].itertuples(index=False, name=None)]
+            conn.executemany(sql, rows)
+
+            self._set_meta(conn, "seq", batch_seq)
+            self._set_meta(conn, f"seq:{name}", batch_seq)
+            conn.commit()
+        return batch_seq
+
+    def _frame_sql(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        with self._connect() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    # -- parts_received rollup --------------------------------------------------
+
+    def _init_rollup(self, conn: sqlite3.Connection) -> None:
+        first_cols = ", ".join(f'"{c}" TEXT' for c in ROLLUP_FIRST_COLS)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS part_contrib (
+                _key TEXT PRIMARY KEY,
+                part_key TEXT NOT NULL,
+                units_received INTEGER NOT NULL,
+                spend REAL NOT NULL,
+                invoice TEXT
+            );
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_part_contrib_part_key ON part_contrib(part_key);")
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS part_rollup (
+                part_key TEXT PRIMARY KEY,
+                {first_cols},
+                units_received INTEGER NOT NULL DEFAULT 0,
+                total_spend REAL NOT NULL DEFAULT 0,
+                line_count INTEGER NOT NULL DEFAULT 0,
+                last_invoice TEXT,
+                _seq INTEGER
+            );
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_part_rollup_seq ON part_rollup(_seq);")
+
+    def update_parts_rollup(self) -> set[str]:
+        """
+        Fold line items added since the last call into the per-part aggregates.
+
+        New line items are merged into the stored sums/counts/max invoice; parts touched
+        by a replaced line item are recomputed from their stored contributions (indexed
+        by part_key), so the work scales with the batch, not the history.
+        Returns the part_keys whose rollup changed.
+        """
+        if self._get_meta_value("rollup:part_keys") != PART_KEY_MIGRATION:
+            # contributions keyed under an older part_key scheme: start over once
+            self.rebuild_parts_rollup()
+        since = self.get_mark("parts_rollup")
+        head = int(self._get_meta_value("seq:line_items", "0"))
+        if head <= since:
+            return set()
+
+        with self._connect() as conn:
+            batch = pd.read_sql_query(
+                'SELECT * FROM "master_line_items" WHERE _seq > ? ORDER BY _seq, rowid;', conn, params=(since,)
+            )
+        contrib = part_contributions(batch.drop(columns=["_seq"]))
+
+        with self._connect() as conn:
+            self._init_rollup(conn)
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS _batch (_key TEXT PRIMARY KEY);")
+            conn.execute("DELETE FROM _batch;")
+            conn.executemany("INSERT OR IGNORE INTO _batch(_key) VALUES (?);", [(k,) for k in contrib["_key"]])
+
+            # Parts that lose a contribution can't be patched additively (max invoice) -> recompute those
+            replaced = conn.execute(
+                "SELECT _key, part_key FROM part_contrib WHERE _key IN (SELECT _key FROM _batch);"
+            ).fetchall()
+            replaced_keys = {k for k, _ in replaced}
+            recompute = {pk for _, pk in replaced}
+            recompute |= set(contrib.loc[contrib["_key"].isin(replaced_keys), "part_key"])
+
+            conn.executemany(
+                "INSERT OR REPLACE INTO part_contrib(_key, part_key, units_received, spend, invoice) VALUES (?, ?, ?, ?, ?);",
+                list(contrib[["_key", "part_key", "units_received", "spend", "invoice"]].itertuples(index=False, name=None)),
+            )
+
+            # Descriptive columns: first non-empty value wins, existing parts keep theirs
+            first = contrib.groupby("part_key", as_index=False)[ROLLUP_FIRST_COLS].first()
+            first_cols = ", ".join(f'"{c}"' for c in ROLLUP_FIRST_COLS)
+            conn.executemany(
+                f"""
+                INSERT INTO part_rollup(part_key, {first_cols}, _seq)
+                VALUES ({", ".join(["?"] * (len(ROLLUP_FIRST_COLS) + 2))})
+                ON CONFLICT(part_key) DO UPDATE SET
+                    {", ".join(f'"{c}" = COALESCE("{c}", excluded."{c}")' for c in ROLLUP_FIRST_COLS)},
+                    _seq = excluded._seq;
+                """,
+                [
+                    (r[0], *[None if pd.isna(v) else str(v) for v in r[1:]], head)
+                    for r in first[["part_key", *ROLLUP_FIRST_COLS]].itertuples(index=False, name=None)
+                ],
+            )
+
+            # New contributions: additive merge of the batch aggregates
+            batch_aggs = conn.execute(
+                """
+                SELECT part_key, SUM(units_received), SUM(spend), COUNT(*), MAX(invoice)
+                FROM part_contrib
+                WHERE _key IN (SELECT _key FROM _batch)
+                GROUP BY part_key;
+                """
+            ).fetchall()
+            conn.executemany(
+                """
+                UPDATE part_rollup SET
+                    units_received = units_received + ?,
+                    total_spend = total_spend + ?,
+                    line_count = line_count + ?,
+                    last_invoice = CASE
+                        WHEN last_invoice IS NULL OR ? > last_invoice THEN ? ELSE last_invoice END
+                WHERE part_key = ?;
+                """,
+                [(units, spend, n, inv, inv, pk) for pk, units, spend, n, inv in batch_aggs if pk not in recompute],
+            )
+
+            # Replaced contributions: recompute just the affected parts
+            for pk in recompute:
+                units, spend, n, inv = conn.execute(
+                    "SELECT COALESCE(SUM(units_received), 0), COALESCE(SUM(spend), 0), COUNT(*), MAX(invoice) "
+                    "FROM part_contrib WHERE part_key = ?;",
+                    (pk,),
+                ).fetchone()
+                if n == 0:
+                    conn.execute("DELETE FROM part_rollup WHERE part_key = ?;", (pk,))
+                    continue
+                conn.execute(
+                    "UPDATE part_rollup SET units_received = ?, total_spend = ?, line_count = ?, last_invoice = ?, _seq = ? "
+                    "WHERE part_key = ?;",
+                    (units, spend, n, inv, head, pk),
+                )
+
+            conn.execute("DELETE FROM _batch;")
+            self._set_meta(conn, "mark:parts_rollup", head)
+            conn.commit()
+
+        return set(contrib["part_key"]) | recompute
+
+    def parts_rollup(self, since_seq: int = 0) -> pd.DataFrame:
+        """parts_received rows (same columns as rollup_parts) touched after since_seq."""
+        with self._connect() as conn:
+            self._init_rollup(conn)
+        first_cols = ", ".join(f'"{c}"' for c in ROLLUP_FIRST_COLS)
+        parts = self._frame_sql(
+            f"SELECT part_key, {first_cols}, units_received, total_spend, last_invoice "
+            f"FROM part_rollup WHERE _seq > ? ORDER BY part_key;",
+            (int(since_seq),),
+        )
+        parts["avg_unit_cost"] = parts["total_spend"] / parts["units_received"].replace({0: pd.NA})
+        return parts
+
+    def rebuild_parts_rollup(self) -> None:
+        """Drop the rollup state; the next update_parts_rollup() recomputes it from every line item."""
+        with self._connect() as conn:
+            conn.execute("DROP TABLE IF EXISTS part_contrib;")
+            conn.execute("DROP TABLE IF EXISTS part_rollup;")
+            self._set_meta(conn, "mark:parts_rollup", 0)
+            self._set_meta(conn, "rollup:part_keys", PART_KEY_MIGRATION)
+            conn.commit()
+
+    def _get_meta_value(self, key: str, default: str | None = None) -> str | None:
+        with self._connect() as conn:
+            return self._get_meta(conn, key, default)
+
+    def frame(self, name: str, since_seq: int = 0) -> pd.DataFrame:
+        """Rows of a master changed after since_seq (all rows by default), oldest batch first."""
+        table = self._table(name)
+        with self._connect() as conn:
+            if not _existing_columns(conn, table):
+                return pd.DataFrame()
+            df = pd.read_sql_query(
+                f'SELECT * FROM "{table}" WHERE _seq > ? ORDER BY _seq, rowid;',
+                conn,
+                params=(int(since_seq),),
+            )
+        return df.drop(columns=["_key", "_seq"])
 
-    # Ensure key cols exist
-    for c in key_cols:
-        if c not in combined.columns:
-            combined[c] = pd.NA
+    def import_csv_once(self, name: str, csv_path: Path) -> bool:
+        """One-time migration of a legacy *_master.csv into the store."""
+        with self._connect() as conn:
+            if self._get_meta(conn, f"imported:{name}") is not None:
+                return False
+            has_rows = bool(_existing_columns(conn, self._table(name)))
+        if csv_path.exists() and not has_rows:
+            self.upsert(name, pd.read_csv(csv_path))
+        with self._connect() as conn:
+            self._set_meta(conn, f"imported:{name}", csv_path)
+            conn.commit()
+        return True
 
-    combined = combined.drop_duplicates(subset=key_cols, keep="last")
-    combined.to_csv(master_path, index=False)
-    return combined
+    def export_csv(self, name: str, csv_path: Path, chunksize: int = 50_000) -> bool:
+        """Rewrite csv_path from the store, but only if the master changed since the last write."""
+        table = self._table(name)
+        with self._connect() as conn:
+            changed = int(self._get_meta(conn, f"seq:{name}", "0"))
+            written = int(self._get_meta(conn, f"csv:{name}", "-1"))
+            if csv_path.exists() and written >= changed:
+                return False
+            if not _existing_columns(conn, table):
+                return False
+
+            csv_path.parent.mkdir(parents=True, exist_ok=True)
+            header = True
+            with csv_path.open("w", newline="", encoding="utf-8") as fh:
+                for chunk in pd.read_sql_query(
+                    f'SELECT * FROM "{table}" ORDER BY _seq, rowid;', conn, chunksize=chunksize
+                ):
+                    chunk.drop(columns=["_key", "_seq"]).to_csv(fh, index=False, header=header)
+                    header = False
+
+            self._set_meta(conn, f"csv:{name}", changed)
+            conn.commit()
+        return True
+
+
+# ----------------------------
+# parts_received rollup (per-part aggregates over master line items)
+# ----------------------------
+
+# Descriptive columns carried onto each part from its first line item
+ROLLUP_FIRST_COLS = [
+    "vendor", "sku", "mfg_part", "description", "desc_clean",
+    "label_line1", "label_line2", "label_short",
+    "purchase_url", "airtable_url", "label_qr_url", "label_qr_text",
+]
+
+# Set to 1 to re-check the incremental rollup against a full recompute after each run
+VERIFY_ROLLUP = os.environ.get("STUDIO_INV_VERIFY_ROLLUP", "").strip().lower() in {"1", "true", "yes"}
+
+
+def part_contributions(items: pd.DataFrame) -> pd.DataFrame:
+    """Each line item's contribution to its part: part_key, units_received, spend, invoice."""
+    items = items.copy()
+    for c in ROLLUP_FIRST_COLS:
+        if c not in items.columns:
+            items[c] = pd.NA
+    if items.empty:
+        return items.assign(part_key=[], units_received=[], spend=[], invoice=[])
+
+    items["pack_qty"] = items["description"].apply(infer_pack_qty)
+    items["units_received"] = (
+        pd.to_numeric(items.get("shipped"), errors="coerce").fillna(0).astype(int)
+        * pd.to_numeric(items.get("pack_qty"), errors="coerce").fillna(1).astype(int)
+    )
+    items["part_key"] = items.apply(part_key_from_row, axis=1)
+    if "line_total" in items.columns:
+        items["spend"] = pd.to_numeric(items["line_total"], errors="coerce").fillna(0.0)
+    else:
+        items["spend"] = items["units_received"].astype(float)
+    # invoices compare as text everywhere (CSV round-trips turn numeric ones into ints)
+    inv = items["invoice"] if "invoice" in items.columns else pd.Series(pd.NA, index=items.index)
+    items["invoice"] = [None if pd.isna(v) else _master_key_part(v) for v in inv]
+    return items
+
+
+def rollup_parts(items: pd.DataFrame) -> pd.DataFrame:
+    """Full recompute of parts_received from every line item (the verify path)."""
+    contrib = part_contributions(items)
+    if contrib.empty:
+        return pd.DataFrame(columns=["part_key", *ROLLUP_FIRST_COLS, "units_received", "total_spend", "last_invoice", "avg_unit_cost"])
+    agg = {c: (c, "first") for c in ROLLUP_FIRST_COLS}
+    parts = contrib.groupby("part_key", as_index=False).agg(
+        **agg,
+        units_received=("units_received", "sum"),
+        total_spend=("spend", "sum"),
+        last_invoice=("invoice", "max"),
+    )
+    parts["avg_unit_cost"] = parts["total_spend"] / parts["units_received"].replace({0: pd.NA})
+    return parts
+
+
+def verify_parts_rollup(incremental: pd.DataFrame, full: pd.DataFrame) -> list[str]:
+    """Compare the incremental rollup with a full recompute; returns human-readable mismatches."""
+    problems: list[str] = []
+    a = incremental.set_index("part_key")
+    b = full.set_index("part_key")
+    for pk in sorted(set(b.index) - set(a.index)):
+        problems.append(f"{pk}: missing from incremental rollup")
+    for pk in sorted(set(a.index) - set(b.index)):
+        problems.append(f"{pk}: not in full recompute")
+    for pk in sorted(set(a.index) & set(b.index)):
+        ra, rb = a.loc[pk], b.loc[pk]
+        if int(ra["units_received"]) != int(rb["units_received"]):
+            problems.append(f"{pk}: units_received {ra['units_received']} != {rb['units_received']}")
+        if abs(float(ra["total_spend"]) - float(rb["total_spend"])) > 1e-6:
+            problems.append(f"{pk}: total_spend {ra['total_spend']} != {rb['total_spend']}")
+        la = None if pd.isna(ra["last_invoice"]) else str(ra["last_invoice"])
+        lb = None if pd.isna(rb["last_invoice"]) else str(rb["last_invoice"])
+        if la != lb:
+            problems.append(f"{pk}: last_invoice {la} != {lb}")
+    return problems
 
 
 # ----------------------------
@@ -844,6 +1217,9 @@ def init_inventory_db(dbfile: Path):
         conn.execute('CREATE INDEX IF NOT EXISTS idx_line_items_part_key ON line_items(part_key);')
         conn.execute('CREATE INDEX IF NOT EXISTS idx_parts_removed_part_key ON parts_removed(part_key);')
         conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_vendor ON orders(vendor);')
+        # updated_utc indexes: delta exports (`export --since/--incremental`) are range scans
+        for tbl in ("orders", "line_items", "parts_received", "parts_removed", "inventory"):
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{tbl}_updated_utc ON {tbl}(updated_utc);')
 
         # Ensure label columns exist (supports schema upgrades without rebuilding the DB)
         _ensure_columns(conn, "line_items", ["desc_clean", "label_line1", "label_line2", "label_short", "purchase_url", "airtable_url", "label_qr_url", "label_qr_text"])
@@ -881,6 +1257,11 @@ def init_inventory_db(dbfile: Path):
             ON pr.part_key = r.part_key;
         """)
 
+        # Content-addressed part keys + alias index (one-time re-key of hash()-based keys)
+        ensure_part_identity_schema(conn)
+        migrate_part_keys(conn)
+        assign_short_codes(conn)
+
         conn.commit()
 
 
@@ -899,7 +1280,9 @@ def update_database(orders_df: pd.DataFrame, line_items_df: pd.DataFrame, parts_
 
         _upsert_df(conn, "orders", orders_df, pk_col="order_uid")
         _upsert_df(conn, "line_items", line_items_df, pk_col="line_item_uid")
+        record_aliases_for_rows(conn, line_items_df)
         _upsert_df(conn, "parts_received", parts_received_df, pk_col="part_key")
+        assign_short_codes(conn)
         _upsert_df(conn, "parts_removed", parts_removed_df, pk_col="removal_uid")
 
         # Refresh materialized on-hand snapshot from the view (DELETE+INSERT for broad SQLite compatibility)
@@ -951,86 +1334,56 @@ def cli() -> int:
     parts_received_df.to_csv(export_dir / f"parts_received_{stamp}.csv", index=False)
     parts_removed_df.to_csv(export_dir / f"parts_removed_{stamp}.csv", index=False)
 
-    # master upserts
-    orders_master = upsert_master_csv(
-        orders_df,
-        export_dir / "orders_master.csv",
-        key_cols=["vendor", "invoice", "source_file"],
-    )
-    items_master = upsert_master_csv(
-        line_items_df,
-        export_dir / "line_items_master.csv",
-        key_cols=["vendor", "invoice", "line", "sku", "source_file"],
-    )
-
-    parts_removed_master = upsert_master_csv(
-        parts_removed_df,
-        export_dir / "parts_removed_master.csv",
-        key_cols=["removal_uid"],
-    )
-
-    # inventory recompute from master line items (so it stays consistent)
-    if not items_master.empty:
-        _, _, parts_received_master, _ = ingest_receipts([])  # create empty with correct cols
-        # quick recompute using the same rollup logic without reparsing PDFs:
-        # easiest: reuse the rollup block by calling ingest_receipts on none is messy.
-        # Instead, compute here:
-        items = items_master.copy()
-        if "description" in items.columns:
-            items["pack_qty"] = items["description"].apply(infer_pack_qty)
+    # master upserts (indexed store; the *_master.csv files are exported from it on demand)
+    store = MasterStore(export_dir / "master_store.sqlite")
+    for name in MASTER_KEYS:
+        store.import_csv_once(name, export_dir / f"{name}_master.csv")
+    store.upsert("orders", orders_df)
+    store.upsert("line_items", line_items_df)
+    store.upsert("parts_removed", parts_removed_df)
+
+    # parts_received rollup: merge only the new line items into the stored per-part aggregates
+    store.update_parts_rollup()
+    if VERIFY_ROLLUP:
+        problems = verify_parts_rollup(store.parts_rollup(), rollup_parts(store.frame("line_items")))
+        if problems:
+            print(f"\n⚠️  parts_received rollup drifted ({len(problems)} mismatches); rebuilding from line items.")
+            for p in problems[:20]:
+                print("   ", p)
+            store.rebuild_parts_rollup()
+            store.update_parts_rollup()
         else:
-            items["pack_qty"] = 1
-        items["units_received"] = (
-            pd.to_numeric(items.get("shipped"), errors="coerce").fillna(0).astype(int)
-            * pd.to_numeric(items.get("pack_qty"), errors="coerce").fillna(1).astype(int)
-        )
+            print("\n(parts_received rollup verified against a full recompute.)")
 
-        def _part_key(row):
-            v = str(row.get("vendor") or "")
-            sku = str(row.get("sku") or "").strip()
-            mfg = str(row.get("mfg_part") or "").strip()
-            desc = str(row.get("description") or "").strip()
-            if sku:
-                return f"{v}:{sku}"
-            if mfg:
-                return f"{v}:{mfg}"
-            return f"{v}:{hash(desc)}"
-
-        items["part_key"] = items.apply(_part_key, axis=1)
-
-        parts_received_master = (
-            items.groupby("part_key", as_index=False)
-            .agg(
-                vendor=("vendor", "first"),
-                sku=("sku", "first"),
-                mfg_part=("mfg_part", "first") if "mfg_part" in items.columns else ("vendor", "first"),
-                description=("description", "first"),
-                desc_clean=("desc_clean", "first"),
-                label_line1=("label_line1", "first"),
-                label_line2=("label_line2", "first"),
-                label_short=("label_short", "first"),
-                purchase_url=("purchase_url", "first"),
-                airtable_url=("airtable_url", "first"),
-                label_qr_url=("label_qr_url", "first"),
-                label_qr_text=("label_qr_text", "first"),
-                units_received=("units_received", "sum"),
-                total_spend=("line_total", "sum") if "line_total" in items.columns else ("units_received", "sum"),
-                last_invoice=("invoice", "max") if "invoice" in items.columns else ("vendor", "first"),
-            )
+    # Update SQLite DB from the master store (optional); only rows changed since the last sync are pushed
+    if apply_db:
+        synced = store.get_mark("db_synced")
+        head = store.seq()
+        dbfile = Path(__file__).resolve().parents[1] / "studio_inventory.sqlite"
+        inventory_on_hand_df = update_database(
+            store.frame("orders", since_seq=synced),
+            store.frame("line_items", since_seq=synced),
+            store.parts_rollup(since_seq=synced),
+            store.frame("parts_removed", since_seq=synced),
+            dbfile=dbfile,
         )
-        parts_received_master["avg_unit_cost"] = parts_received_master["total_spend"] / parts_received_master["units_received"].replace({0: pd.NA})
-        parts_received_master.to_csv(export_dir / "parts_received_master.csv", index=False)
+        store.set_mark("db_synced", head)
+        inventory_on_hand_df.to_csv(export_dir / f"inventory_on_hand_{stamp}.csv", index=False)
+    else:
+        print("\n(DB update skipped; dry-run mode.)")
 
-        # Update SQLite DB from master views (optional)
-        if apply_db:
-            inventory_on_hand_df = update_database(orders_master, items_master, parts_received_master, parts_removed_master, dbfile=dbfile)
-            inventory_on_hand_df.to_csv(export_dir / f"inventory_on_hand_{stamp}.csv", index=False)
-        else:
-            print("\n(DB update skipped; dry-run mode.)")
+    if not SKIP_MASTER_CSV:
+        store.parts_rollup().to_csv(export_dir / "parts_received_master.csv", index=False)
+        for name in MASTER_KEYS:
+            store.export_csv(name, export_dir / f"{name}_master.csv")
 
 
     print("\n✅ Done.")
-    print("Per-run CSVs and master CSVs written to:", export_dir)
+    print("Per-run CSVs written to:", export_dir)
+    if SKIP_MASTER_CSV:
+        print("(Master CSVs left as-is; STUDIO_INV_SKIP_MASTER_CSV is set.)")
+    else:
+        print("Master CSVs refreshed from:", export_dir / "master_store.sqlite")
 
     if apply_db:
         return 0
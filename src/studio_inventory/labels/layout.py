@@ -0,0 +1,380 @@
+"""
+Layout compiler for label sheets.
+
+compile_layout() turns (LabelTemplate, layout preset) into a LabelPlan: every sheet
+position's origin, and for each element its font, leading, line cap, alignment and the
+cell rectangle/anchor at every position. None of that depends on the item being printed,
+so make_labels_pdf computes it once per job and the per-label loop only fills in text.
+Presets are validated here, once, instead of failing (or silently misbehaving) per label.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+
+
+# Template JSON schema: dotted key -> (kind, minimum). Lengths are inches.
+TEMPLATE_SCHEMA: dict[str, tuple[str, float | None]] = {
+    "name": ("str", None),
+    "page.width_in": ("number", 0.01),
+    "page.height_in": ("number", 0.01),
+    "label.width_in": ("number", 0.01),
+    "label.height_in": ("number", 0.01),
+    "grid.cols": ("int", 1),
+    "grid.rows": ("int", 1),
+    "margins_in.left": ("number", 0),
+    "margins_in.top": ("number", 0),
+    "pitch_in.x": ("number", 0.01),
+    "pitch_in.y": ("number", 0.01),
+    "padding_in.x": ("number", 0),
+    "padding_in.y": ("number", 0),
+    "font.name": ("str", None),
+    "font.size": ("int", 1),
+}
+
+
+def validate_template(d: object, source: str = "template") -> dict:
+    """Check a template dict against TEMPLATE_SCHEMA; raises ValueError naming the bad field."""
+    if not isinstance(d, dict):
+        raise ValueError(f"{source}: expected a JSON object, got {type(d).__name__}")
+    for key, (kind, minimum) in TEMPLATE_SCHEMA.items():
+        cur: object = d
+        for part in key.split("."):
+            if not isinstance(cur, dict) or part not in cur:
+                raise ValueError(f"{source}: missing {key}")
+            cur = cur[part]
+        if kind == "str":
+            if not isinstance(cur, str) or not cur.strip():
+                raise ValueError(f"{source}: {key} must be a non-empty string")
+            continue
+        if isinstance(cur, bool) or not isinstance(cur, (int, float)) or (kind == "int" and int(cur) != cur):
+            raise ValueError(f"{source}: {key} must be {'an integer' if kind == 'int' else 'a number'} (got {cur!r})")
+        if minimum is not None and cur < minimum:
+            raise ValueError(f"{source}: {key} must be >= {minimum} (got {cur!r})")
+
+    font = d["font"]["name"]
+    try:
+        pdfmetrics.getFont(font)
+    except KeyError:
+        raise ValueError(f"{source}: font.name {font!r} is not a known PDF font") from None
+    return d
+
+
+@dataclass(frozen=True)
+class LabelTemplate:
+    name: str
+    page_w: float
+    page_h: float
+    label_w: float
+    label_h: float
+    cols: int
+    rows: int
+    margin_left: float
+    margin_top: float
+    pitch_x: float
+    pitch_y: float
+    pad_x: float
+    pad_y: float
+    font_name: str
+    font_size: int
+
+    @classmethod
+    def from_dict(cls, d: dict, source: str = "template") -> "LabelTemplate":
+        validate_template(d, source)
+        return cls(
+            name=d["name"],
+            page_w=d["page"]["width_in"] * inch,
+            page_h=d["page"]["height_in"] * inch,
+            label_w=d["label"]["width_in"] * inch,
+            label_h=d["label"]["height_in"] * inch,
+            cols=int(d["grid"]["cols"]),
+            rows=int(d["grid"]["rows"]),
+            margin_left=d["margins_in"]["left"] * inch,
+            margin_top=d["margins_in"]["top"] * inch,
+            pitch_x=d["pitch_in"]["x"] * inch,
+            pitch_y=d["pitch_in"]["y"] * inch,
+            pad_x=d["padding_in"]["x"] * inch,
+            pad_y=d["padding_in"]["y"] * inch,
+            font_name=d["font"]["name"],
+            font_size=int(d["font"]["size"]),
+        )
+
+    @classmethod
+    def from_json(cls, path: Path) -> "LabelTemplate":
+        try:
+            d = json.loads(path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path.name}: invalid JSON ({e})") from None
+        return cls.from_dict(d, source=path.name)
+
+
+def _label_xy(t: LabelTemplate, index0: int) -> tuple[float, float]:
+    """
+    index0: 0-based within a page, left-to-right then top-to-bottom.
+    Returns bottom-left origin (x, y) for the label.
+    """
+    col = index0 % t.cols
+    row = index0 // t.cols
+    x = t.margin_left + col * t.pitch_x
+    # y measured from bottom; top margin defines first row top edge
+    top_y = t.page_h - t.margin_top - row * t.pitch_y
+    y = top_y - t.label_h
+    return x, y
+
+
+GRID_POSITIONS = {f"{r}{c}" for r in "UML" for c in "LCR"}
+ALIGNMENTS = {"left", "center", "right"}
+QR_LEVELS = {"L", "M", "Q", "H"}
+
+# (cx, cy, cw, ch) bottom-left + size of a spanned cell; ax is the text anchor x for the alignment
+Box = tuple[float, float, float, float, float]
+
+
+@dataclass(frozen=True)
+class ElementPlan:
+    source: str
+    font: str
+    size: int
+    leading: int
+    row: str            # U / M / L: which edge lines stack from
+    align: str          # left / center / right
+    wrap: bool
+    max_lines: int      # already capped by what fits in the cell
+    boxes: tuple[Box, ...]  # indexed by sheet position (0-based)
+
+
+@dataclass(frozen=True)
+class QrPlan:
+    source: str
+    level: str
+    size: float
+    origins: tuple[tuple[float, float], ...]  # bottom-left per sheet position
+
+
+@dataclass(frozen=True)
+class LabelPlan:
+    template: LabelTemplate
+    per_page: int
+    slots: tuple[tuple[float, float], ...]  # label bottom-left per sheet position
+    elements: tuple[ElementPlan, ...] = ()
+    qr: Optional[QrPlan] = None
+
+
+def _font_for_style(base_font: str, style: str) -> str:
+    style = (style or "normal").lower()
+    if base_font.lower().startswith("helvetica"):
+        return {
+            "normal": "Helvetica",
+            "bold": "Helvetica-Bold",
+            "italic": "Helvetica-Oblique",
+            "bolditalic": "Helvetica-BoldOblique",
+        }.get(style, "Helvetica")
+    return base_font
+
+
+def _cell_box(pos: str, x: float, y: float, w: float, h: float, span_x: int = 1, span_y: int = 1) -> tuple[float, float, float, float, str]:
+    """
+    Divide the padded label content box (x,y,w,h) into a 3x3 grid.
+    pos like UL/UC/UR/ML/MC/MR/LL/LC/LR selects the anchor cell.
+
+    span_x spans columns (1–3), span_y spans rows (1–3). Spans are clamped to fit.
+
+    Anchoring rules:
+      - L anchors span to the right
+      - R anchors span to the left
+      - C anchors span centered as best as possible (for span=2 => cols 1–2)
+      - U anchors span downward
+      - L anchors span upward
+      - M anchors span centered as best as possible (for span=2 => rows 1–2)
+
+    Returns (cx, cy, cw, ch, row) where (cx,cy) is bottom-left of the spanned box.
+    """
+    pos = (pos or "UL").upper()
+    row = pos[0] if len(pos) >= 1 else "U"
+    col = pos[1] if len(pos) >= 2 else "L"
+
+    cell_w = w / 3.0
+    cell_h = h / 3.0
+
+    span_x = max(1, min(3, int(span_x)))
+    span_y = max(1, min(3, int(span_y)))
+
+    # Column start index (0..2)
+    if col == "L":
+        start_c = 0
+    elif col == "R":
+        start_c = 3 - span_x
+    else:  # C
+        start_c = 1 - ((span_x - 1) // 2)
+    start_c = max(0, min(3 - span_x, start_c))
+
+    # Row start index (0..2), where 0 is bottom, 2 is top
+    if row == "L":
+        start_r = 0
+    elif row == "U":
+        start_r = 3 - span_y
+    else:  # M
+        start_r = 1 - ((span_y - 1) // 2)
+    start_r = max(0, min(3 - span_y, start_r))
+
+    cx = x + start_c * cell_w
+    cy = y + start_r * cell_h
+    cw = cell_w * span_x
+    ch = cell_h * span_y
+
+    return cx, cy, cw, ch, row
+
+
+def _content_box(t: LabelTemplate, x0: float, y0: float) -> tuple[float, float, float, float]:
+    """Padded content area of the label whose bottom-left is (x0, y0)."""
+    return x0 + t.pad_x, y0 + t.pad_y, t.label_w - 2 * t.pad_x, t.label_h - 2 * t.pad_y
+
+
+def _int_opt(d: dict, where: str, key: str, default, *, minimum: int | None = None) -> int:
+    raw = d.get(key, default)
+    try:
+        val = int(raw if raw is not None else default)
+    except (TypeError, ValueError):
+        raise ValueError(f"{where}: {key} must be an integer (got {raw!r})") from None
+    if minimum is not None and val < minimum:
+        raise ValueError(f"{where}: {key} must be >= {minimum} (got {val})")
+    return val
+
+
+def _float_opt(d: dict, where: str, key: str, default: float) -> float:
+    raw = d.get(key, default)
+    try:
+        return float(raw if raw is not None else default)
+    except (TypeError, ValueError):
+        raise ValueError(f"{where}: {key} must be a number (got {raw!r})") from None
+
+
+def _pos_opt(d: dict, where: str, default: str) -> str:
+    pos = str(d.get("pos", default) or default).upper()
+    if pos not in GRID_POSITIONS:
+        raise ValueError(f"{where}: pos must be one of {', '.join(sorted(GRID_POSITIONS))} (got {pos!r})")
+    return pos
+
+
+def sheet_slots(t: LabelTemplate) -> tuple[tuple[float, float], ...]:
+    return tuple(_label_xy(t, i) for i in range(t.cols * t.rows))
+
+
+def _compile_element(t: LabelTemplate, slots, e: dict, idx: int) -> ElementPlan:
+    where = f"layout element {idx + 1}"
+    if not isinstance(e, dict):
+        raise ValueError(f"{where}: expected an object, got {type(e).__name__}")
+    source = str(e.get("source", "") or "").strip()
+
+    size = _int_opt(e, where, "size", t.font_size, minimum=1)
+    span = max(1, min(3, _int_opt(e, where, "span", e.get("span_x", 1) or 1)))
+    max_lines = _int_opt(e, where, "max_lines", 1)
+    pos = _pos_opt(e, where, "UL")
+    align = str(e.get("align", "left") or "left").lower()
+    if align not in ALIGNMENTS:
+        raise ValueError(f"{where}: align must be left, center or right (got {align!r})")
+
+    font = _font_for_style(t.font_name, e.get("style", "normal"))
+    leading = max(1, int(size * 1.15))
+
+    boxes: list[Box] = []
+    ch0 = None
+    for x0, y0 in slots:
+        x, y, w, h = _content_box(t, x0, y0)
+        cx, cy, cw, ch, row = _cell_box(pos, x, y, w, h, span_x=span)
+        if align == "center":
+            ax = cx + cw / 2
+        elif align == "right":
+            ax = cx + cw
+        else:
+            ax = cx
+        boxes.append((cx, cy, cw, ch, ax))
+        ch0 = ch if ch0 is None else ch0
+
+    # Cap lines by what fits vertically in the cell (cell height is the same at every position)
+    max_lines_cell = max(1, int((ch0 or 0) // leading))
+    ml = max(1, min(max_lines, max_lines_cell))
+
+    return ElementPlan(
+        source=source,
+        font=font,
+        size=size,
+        leading=leading,
+        row=pos[0],
+        align=align,
+        wrap=bool(e.get("wrap", False)),
+        max_lines=ml,
+        boxes=tuple(boxes),
+    )
+
+
+def _compile_qr(t: LabelTemplate, slots, qr_cfg: dict) -> Optional[QrPlan]:
+    where = "layout qr"
+    if not isinstance(qr_cfg, dict):
+        raise ValueError(f"{where}: expected an object, got {type(qr_cfg).__name__}")
+    if not bool(qr_cfg.get("enabled", False)):
+        return None
+
+    level = str(qr_cfg.get("level", "L") or "L").upper()
+    if level not in QR_LEVELS:
+        raise ValueError(f"{where}: level must be one of L, M, Q, H (got {level!r})")
+    pos = _pos_opt(qr_cfg, where, "UR")
+    span_x = max(1, min(3, _int_opt(qr_cfg, where, "span", qr_cfg.get("span_x", 1) or 1)))
+    span_y = max(1, min(3, _int_opt(qr_cfg, where, "span_y", 1)))
+    fit = bool(qr_cfg.get("fit", False))
+    pad_rel = max(0.0, min(0.15, _float_opt(qr_cfg, where, "pad_rel", 0.06)))
+    size_rel = max(0.2, min(0.95, _float_opt(qr_cfg, where, "size_rel", 0.85)))
+
+    origins: list[tuple[float, float]] = []
+    qr_size = 0.0
+    for x0, y0 in slots:
+        x, y, w, h = _content_box(t, x0, y0)
+        cx, cy, cw, ch, _row = _cell_box(pos, x, y, w, h, span_x=span_x, span_y=span_y)
+        if fit:
+            # Fit a square QR into the spanned cell with padding
+            pad = pad_rel * min(cw, ch)
+            qr_size = min(max(0.0, cw - 2 * pad), max(0.0, ch - 2 * pad))
+        else:
+            # Legacy behavior: size is a fraction of the cell (not fitted)
+            qr_size = max(10, min(min(cw, ch) * size_rel, cw, ch))
+        origins.append((cx + (cw - qr_size) / 2, cy + (ch - qr_size) / 2))
+
+    if fit and qr_size < 10:
+        return None  # cell too small for a scannable code
+    return QrPlan(
+        source=str(qr_cfg.get("source", "purchase_url") or "purchase_url"),
+        level=level,
+        size=qr_size,
+        origins=tuple(origins),
+    )
+
+
+def compile_layout(t: LabelTemplate, layout: Optional[dict] = None) -> LabelPlan:
+    """
+    Precompute sheet geometry for a template and (optional) layout preset.
+
+    Raises ValueError with the offending element if the preset is malformed.
+    """
+    slots = sheet_slots(t)
+    per_page = len(slots)
+    if not layout:
+        return LabelPlan(template=t, per_page=per_page, slots=slots)
+    if not isinstance(layout, dict):
+        raise ValueError(f"layout must be an object, got {type(layout).__name__}")
+
+    elems = layout.get("elements", []) or []
+    if not isinstance(elems, list):
+        raise ValueError("layout elements must be a list")
+
+    return LabelPlan(
+        template=t,
+        per_page=per_page,
+        slots=slots,
+        elements=tuple(_compile_element(t, slots, e, i) for i, e in enumerate(elems)),
+        qr=_compile_qr(t, slots, layout.get("qr", {}) or {}),
+    )
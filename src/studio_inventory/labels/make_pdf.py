@@ -1,107 +1,110 @@
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass
+import weakref
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Sequence
 
 from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from reportlab.pdfbase import pdfmetrics
 
 from reportlab.graphics.barcode import qr
-from reportlab.graphics.shapes import Drawing
+from reportlab.graphics.shapes import Drawing, Group
 from reportlab.graphics import renderPDF
 
+# LabelTemplate/_label_xy live in layout.py; imported here too for existing callers
+from studio_inventory.labels.layout import ElementPlan, LabelPlan, LabelTemplate, _label_xy
+from studio_inventory.labels.registry import compiled_plan
+from studio_inventory.labels.text import truncate_to_width, wrap_lines
+from studio_inventory.short_codes import qr_payload
 
-@dataclass
-class LabelTemplate:
-    name: str
-    page_w: float
-    page_h: float
-    label_w: float
-    label_h: float
-    cols: int
-    rows: int
-    margin_left: float
-    margin_top: float
-    pitch_x: float
-    pitch_y: float
-    pad_x: float
-    pad_y: float
-    font_name: str
-    font_size: int
-
-    @classmethod
-    def from_json(cls, path: Path) -> "LabelTemplate":
-        d = json.loads(path.read_text(encoding="utf-8"))
-        return cls(
-            name=d["name"],
-            page_w=d["page"]["width_in"] * inch,
-            page_h=d["page"]["height_in"] * inch,
-            label_w=d["label"]["width_in"] * inch,
-            label_h=d["label"]["height_in"] * inch,
-            cols=int(d["grid"]["cols"]),
-            rows=int(d["grid"]["rows"]),
-            margin_left=d["margins_in"]["left"] * inch,
-            margin_top=d["margins_in"]["top"] * inch,
-            pitch_x=d["pitch_in"]["x"] * inch,
-            pitch_y=d["pitch_in"]["y"] * inch,
-            pad_x=d["padding_in"]["x"] * inch,
-            pad_y=d["padding_in"]["y"] * inch,
-            font_name=d["font"]["name"],
-            font_size=int(d["font"]["size"]),
-        )
-
-
-def _label_xy(t: LabelTemplate, index0: int) -> tuple[float, float]:
-    """
-    index0: 0-based within a page, left-to-right then top-to-bottom.
-    Returns bottom-left origin (x, y) for the label.
-    """
-    col = index0 % t.cols
-    row = index0 // t.cols
-    x = t.margin_left + col * t.pitch_x
-    # y measured from bottom; top margin defines first row top edge
-    top_y = t.page_h - t.margin_top - row * t.pitch_y
-    y = top_y - t.label_h
-    return x, y
+
+# One form XObject per unique QR code per canvas: a sheet that repeats the same URL
+# (reprints, shared search links) embeds the code's vector paths once.
+_QR_FORMS: "weakref.WeakKeyDictionary[canvas.Canvas, dict[tuple[str, float, str], str]]" = weakref.WeakKeyDictionary()
+
+
+@lru_cache(maxsize=4096)
+def _qr_group(text: str, level: str) -> tuple[Group, float, float]:
+    """Encoded QR code as drawing shapes plus its width/height (encoding is the expensive part)."""
+    g = qr.QrCodeWidget(text, barLevel=level).draw()
+    x0, y0, x1, y1 = g.getBounds()
+    return g, x1 - x0, y1 - y0
+
+
+def _qr_form(c: canvas.Canvas, text: str, size: float, level: str) -> str:
+    forms = _QR_FORMS.setdefault(c, {})
+    key = (text, round(size, 3), level)
+    name = forms.get(key)
+    if name is None:
+        name = f"studio_qr{len(forms)}"
+        code, w, h = _qr_group(text, level)
+        d = Drawing(size, size, transform=[size / w, 0, 0, size / h, 0, 0])
+        d.add(code)
+        c.beginForm(name, lowerx=0, lowery=0, upperx=size, uppery=size)
+        renderPDF.draw(d, c, 0, 0)
+        c.endForm()
+        forms[key] = name
+    return name
 
 
-def _draw_qr(c: canvas.Canvas, x: float, y: float, size: float, text: str) -> None:
-    code = qr.QrCodeWidget(text)
-    bounds = code.getBounds()
-    w = bounds[2] - bounds[0]
-    h = bounds[3] - bounds[1]
-    d = Drawing(size, size, transform=[size / w, 0, 0, size / h, 0, 0])
-    d.add(code)
-    renderPDF.draw(d, c, x, y)
+def _draw_qr(c: canvas.Canvas, x: float, y: float, size: float, text: str, level: str = "L") -> None:
+    name = _qr_form(c, text, size, (level or "L").upper())
+    c.saveState()
+    c.translate(x, y)
+    c.doForm(name)
+    c.restoreState()
 
 
 def make_labels_pdf(
     *,
     template_path: Path,
     out_pdf: Path,
-    rows: list[dict],
+    rows: Iterable[dict],
     start_pos: int = 1,
     include_qr: bool = False,
     layout: Optional[dict] = None,
     draw_boxes: bool = False,
+    workers: int = 1,
+    plan: Optional[LabelPlan] = None,
 ) -> None:
     """
     Generate label sheets.
-    - rows: list of dicts with keys like: vendor, sku, label_line1, label_short, purchase_url, label_qr_text, part_key
+    - rows: iterable of dicts with keys like: vendor, sku, label_line1, label_short, purchase_url, label_qr_text, part_key
+      (consumed once, in order; a LabelRowQuery streams them straight from SQLite)
     - start_pos: 1-based label position on sheet; 1 = first label top-left.
     - layout: optional layout preset dict (elements + qr settings)
     - draw_boxes: if True, outlines each label (calibration/debug)
+    - workers: >1 renders page-aligned shards in a process pool and joins them (needs pypdf>=4.3;
+      falls back to a single canvas without it, or when the job is too small to be worth it).
+      Only pays off with several free cores and thousands of labels; 1 is the right default.
+    - plan: an already compiled layout for (template, layout), e.g. reused across previews
     """
-    t = LabelTemplate.from_json(template_path)
+    if plan is None:
+        plan = compiled_plan(template_path, layout)  # validates the preset before any output is written
+    t = plan.template
     out_pdf.parent.mkdir(parents=True, exist_ok=True)
 
+    if workers > 1:
+        if not (hasattr(rows, "__len__") and hasattr(rows, "__getitem__")):
+            rows = list(rows)  # shards need len() and slicing; LabelRowQuery slices lazily
+        shards = _page_shards(len(rows), plan.per_page, start_pos, workers)
+        if len(shards) > 1 and _have_pypdf():
+            _make_labels_pdf_sharded(
+                shards,
+                template_path=template_path,
+                out_pdf=out_pdf,
+                rows=rows,
+                include_qr=include_qr,
+                layout=layout,
+                draw_boxes=draw_boxes,
+                workers=workers,
+            )
+            return
+
     c = canvas.Canvas(str(out_pdf), pagesize=(t.page_w, t.page_h))
     c.setFont(t.font_name, t.font_size)
 
-    per_page = t.cols * t.rows
+    per_page = plan.per_page
     pos = max(1, int(start_pos)) - 1  # 0-based
 
     for item in rows:
@@ -110,20 +113,19 @@ def make_labels_pdf(
             c.showPage()
             c.setFont(t.font_name, t.font_size)
 
-        x0, y0 = _label_xy(t, page_pos)
+        x0, y0 = plan.slots[page_pos]
         if draw_boxes:
             c.rect(x0, y0, t.label_w, t.label_h, stroke=1, fill=0)
 
-        # padding box
-        x = x0 + t.pad_x
-        y = y0 + t.pad_y
-        w = t.label_w - 2 * t.pad_x
-        h = t.label_h - 2 * t.pad_y
-
         if layout:
-            _render_layout(c, item, x, y, w, h, t, layout)
+            _render_plan(c, plan, page_pos, item)
         else:
             # fallback simple layout
+            x = x0 + t.pad_x
+            y = y0 + t.pad_y
+            w = t.label_w - 2 * t.pad_x
+            h = t.label_h - 2 * t.pad_y
+
             line1 = (item.get("label_line1") or item.get("label_short") or item.get("part_key") or "").strip()
             line2 = (item.get("label_line2") or f'{item.get("vendor", "")}:{item.get("sku", "")}' or "").strip()
             qr_text = (item.get("label_qr_text") or item.get("purchase_url") or item.get("part_key") or "").strip()
@@ -145,16 +147,96 @@ def make_labels_pdf(
     c.save()
 
 
-def _font_for_style(base_font: str, style: str) -> str:
-    style = (style or "normal").lower()
-    if base_font.lower().startswith("helvetica"):
-        return {
-            "normal": "Helvetica",
-            "bold": "Helvetica-Bold",
-            "italic": "Helvetica-Oblique",
-            "bolditalic": "Helvetica-BoldOblique",
-        }.get(style, "Helvetica")
-    return base_font
+# ----------------------------
+# Parallel (sharded) rendering
+# ----------------------------
+
+# Below this many pages per worker the process start-up and join cost more than they save
+MIN_PAGES_PER_SHARD = 4
+
+
+def _have_pypdf() -> bool:
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        return False
+    return hasattr(PdfWriter, "compress_identical_objects")  # pypdf>=4.3; older joins bloat
+
+
+def _page_shards(n_rows: int, per_page: int, start_pos: int, workers: int) -> list[tuple[int, int, int]]:
+    """
+    Split rows into (row_start, row_end, start_pos) ranges that each begin on a page boundary.
+
+    The first shard keeps the caller's start_pos (a partly used first sheet); later shards
+    start at position 1 of a fresh page, so the joined pages are identical to one serial run.
+    """
+    first_cap = per_page - (max(1, int(start_pos)) - 1) % per_page
+    if n_rows <= first_cap:
+        return [(0, n_rows, start_pos)]
+    total_pages = 1 + -(-(n_rows - first_cap) // per_page)
+    pages_per_shard = max(MIN_PAGES_PER_SHARD, -(-total_pages // (workers * 2)))
+
+    shards: list[tuple[int, int, int]] = []
+    row0 = 0
+    cap = first_cap + (pages_per_shard - 1) * per_page
+    sp = start_pos
+    while row0 < n_rows:
+        row1 = min(n_rows, row0 + cap)
+        shards.append((row0, row1, sp))
+        row0, cap, sp = row1, pages_per_shard * per_page, 1
+    return shards
+
+
+def _render_shard(args: tuple) -> str:
+    kwargs, shard_path = args
+    make_labels_pdf(out_pdf=Path(shard_path), **kwargs)
+    return shard_path
+
+
+def _make_labels_pdf_sharded(
+    shards: list[tuple[int, int, int]],
+    *,
+    template_path: Path,
+    out_pdf: Path,
+    rows: Sequence[dict],
+    include_qr: bool,
+    layout: Optional[dict],
+    draw_boxes: bool,
+    workers: int,
+) -> None:
+    from concurrent.futures import ProcessPoolExecutor
+    import tempfile
+
+    from pypdf import PdfWriter
+
+    with tempfile.TemporaryDirectory(prefix=".labels_", dir=out_pdf.parent) as tmp:
+        jobs = []
+        for i, (r0, r1, sp) in enumerate(shards):
+            kwargs = dict(
+                template_path=template_path,
+                rows=rows[r0:r1],
+                start_pos=sp,
+                include_qr=include_qr,
+                layout=layout,
+                draw_boxes=draw_boxes,
+            )
+            jobs.append((kwargs, str(Path(tmp) / f"shard_{i:05d}.pdf")))
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            shard_paths = list(pool.map(_render_shard, jobs))
+
+        # Join page objects as-is (no re-rendering); map() keeps shard order
+        writer = PdfWriter()
+        for sp in shard_paths:
+            writer.append(sp)
+        # Every shard carries its own fonts and QR form XObjects. Each pass merges one level of
+        # duplicates (fonts, then the /Font dict naming them, then the forms that point at it).
+        for _ in range(3):
+            writer.compress_identical_objects()
+        tmp_out = Path(tmp) / "joined.pdf"
+        with tmp_out.open("wb") as fh:
+            writer.write(fh)
+        tmp_out.replace(out_pdf)
 
 
 def _source_value(item: dict, source: str) -> str:
@@ -165,6 +247,8 @@ def _source_value(item: dict, source: str) -> str:
         if v and s:
             return f"{v}:{s}"
         return s or v
+    if source == "qr_short":
+        return qr_payload(str(item.get("short_code") or "").strip())
     if source in ("on_hand", "avg_unit_cost"):
         val = item.get(source, "")
         return "" if val is None else str(val)
@@ -173,91 +257,11 @@ def _source_value(item: dict, source: str) -> str:
 
 
 def _truncate_to_width(text: str, max_width: float, font: str, size: int) -> str:
-    if not text:
-        return ""
-    if pdfmetrics.stringWidth(text, font, size) <= max_width:
-        return text
-    ell = "…"
-    t = text
-    while t and pdfmetrics.stringWidth(t + ell, font, size) > max_width:
-        t = t[:-1]
-    return (t + ell) if t else ""
+    return truncate_to_width(text, max_width, font, size)
 
 
 def _wrap_lines(text: str, max_width: float, font: str, size: int, max_lines: int) -> list[str]:
-    if not text:
-        return []
-    words = text.split()
-    lines: list[str] = []
-    cur = ""
-    for w in words:
-        test = (cur + " " + w).strip()
-        if pdfmetrics.stringWidth(test, font, size) <= max_width or not cur:
-            cur = test
-        else:
-            lines.append(cur)
-            cur = w
-            if len(lines) >= max_lines:
-                break
-    if len(lines) < max_lines and cur:
-        lines.append(cur)
-    if lines:
-        lines[-1] = _truncate_to_width(lines[-1], max_width, font, size)
-    return lines[:max_lines]
-
-
-def _cell_box(pos: str, x: float, y: float, w: float, h: float, span_x: int = 1, span_y: int = 1) -> tuple[float, float, float, float, str]:
-    """
-    Divide the padded label content box (x,y,w,h) into a 3x3 grid.
-    pos like UL/UC/UR/ML/MC/MR/LL/LC/LR selects the anchor cell.
-
-    span_x spans columns (1–3), span_y spans rows (1–3). Spans are clamped to fit.
-
-    Anchoring rules:
-      - L anchors span to the right
-      - R anchors span to the left
-      - C anchors span centered as best as possible (for span=2 => cols 1–2)
-      - U anchors span downward
-      - L anchors span upward
-      - M anchors span centered as best as possible (for span=2 => rows 1–2)
-
-    Returns (cx, cy, cw, ch, row) where (cx,cy) is bottom-left of the spanned box.
-    """
-    pos = (pos or "UL").upper()
-    row = pos[0] if len(pos) >= 1 else "U"
-    col = pos[1] if len(pos) >= 2 else "L"
-
-    cell_w = w / 3.0
-    cell_h = h / 3.0
-
-    span_x = max(1, min(3, int(span_x)))
-    span_y = max(1, min(3, int(span_y)))
-
-    # Column start index (0..2)
-    if col == "L":
-        start_c = 0
-    elif col == "R":
-        start_c = 3 - span_x
-    else:  # C
-        start_c = 1 - ((span_x - 1) // 2)
-    start_c = max(0, min(3 - span_x, start_c))
-
-    # Row start index (0..2), where 0 is bottom, 2 is top
-    if row == "L":
-        start_r = 0
-    elif row == "U":
-        start_r = 3 - span_y
-    else:  # M
-        start_r = 1 - ((span_y - 1) // 2)
-    start_r = max(0, min(3 - span_y, start_r))
-
-    cx = x + start_c * cell_w
-    cy = y + start_r * cell_h
-    cw = cell_w * span_x
-    ch = cell_h * span_y
-
-    return cx, cy, cw, ch, row
-
+    return wrap_lines(text, max_width, font, size, max_lines)
 
 
 def _draw_aligned(c: canvas.Canvas, align: str, x: float, y: float, text: str) -> None:
@@ -270,103 +274,40 @@ def _draw_aligned(c: canvas.Canvas, align: str, x: float, y: float, text: str) -
         c.drawString(x, y, text)
 
 
-def _render_layout(c: canvas.Canvas, item: dict, x: float, y: float, w: float, h: float, t: LabelTemplate, layout: dict) -> None:
-    elems = layout.get("elements", []) or []
-    qr_cfg = layout.get("qr", {}) or {}
-    qr_enabled = bool(qr_cfg.get("enabled", False))
+def _element_lines(e: ElementPlan, page_pos: int, text: str) -> list[tuple[float, float, str]]:
+    """Fitted lines of one element at a sheet position, as (anchor_x, baseline_y, text)."""
+    cx, cy, cw, ch, ax = e.boxes[page_pos]
+    lines = _wrap_lines(text, cw, e.font, e.size, e.max_lines) if e.wrap else [_truncate_to_width(text, cw, e.font, e.size)]
 
-    for e in elems:
-        source = e.get("source", "")
-        text = _source_value(item, source).strip()
+    if e.row in ("U", "M"):
+        if e.row == "U":
+            cur_y = (cy + ch) - e.size
+        else:
+            total_h = len(lines) * e.leading
+            cur_y = (cy + ch / 2) + (total_h / 2) - e.size
+        out = []
+        for ln in lines:
+            out.append((ax, cur_y, ln))
+            cur_y -= e.leading
+        return out
+    return [(ax, (cy + e.size) + (len(lines) - 1 - i) * e.leading, ln) for i, ln in enumerate(lines)]
+
+
+def _render_plan(c: canvas.Canvas, plan: LabelPlan, page_pos: int, item: dict) -> None:
+    """Fill one label from a compiled plan; all geometry was resolved by compile_layout."""
+    for e in plan.elements:
+        text = _source_value(item, e.source).strip()
         if not text:
             continue
 
-        style = e.get("style", "normal")
-        size = int(e.get("size", t.font_size))
-        pos = e.get("pos", "UL")
-        align = e.get("align", "left")
-        span = int(e.get("span", e.get("span_x", 1)) or 1)
-        span = max(1, min(3, span))
-        wrap = bool(e.get("wrap", False))
-        max_lines = int(e.get("max_lines", 1))
-
-        font = _font_for_style(t.font_name, style)
-        c.setFont(font, size)
+        c.setFont(e.font, e.size)
+        for x, y, ln in _element_lines(e, page_pos, text):
+            _draw_aligned(c, e.align, x, y, ln)
 
-        leading = max(1, int(size * 1.15))
-
-        # Bound each element to a 3x3 cell inside the padded label area
-        cx, cy, cw, ch, row = _cell_box(pos, x, y, w, h, span_x=span)
-
-        # Cap lines by what fits vertically in the cell
-        max_lines_cell = max(1, int(ch // leading))
-        ml = max(1, min(max_lines, max_lines_cell))
-
-        max_w = cw
-        lines = _wrap_lines(text, max_w, font, size, ml) if wrap else [_truncate_to_width(text, max_w, font, size)]
-
-        align_l = (align or "left").lower()
-        if align_l == "center":
-            ax = cx + cw / 2
-        elif align_l == "right":
-            ax = cx + cw
-        else:
-            ax = cx
-
-        if row == "U":
-            cur_y = (cy + ch) - size
-            for ln in lines:
-                _draw_aligned(c, align, ax, cur_y, ln)
-                cur_y -= leading
-
-        elif row == "M":
-            total_h = len(lines) * leading
-            cur_y = (cy + ch / 2) + (total_h / 2) - size
-            for ln in lines:
-                _draw_aligned(c, align, ax, cur_y, ln)
-                cur_y -= leading
-
-        else:
-            for i, ln in enumerate(lines):
-                yy = (cy + size) + (len(lines) - 1 - i) * leading
-                _draw_aligned(c, align, ax, yy, ln)
-
-    if qr_enabled:
-        qr_source = qr_cfg.get("source", "purchase_url")
-        qr_text = _source_value(item, qr_source).strip()
+    if plan.qr is not None:
+        qr_text = _source_value(item, plan.qr.source).strip()
         if qr_text:
-            pos = qr_cfg.get("pos", "UR")
-
-            # Span across the template grid (like elements do)
-            span_x = int(qr_cfg.get("span", qr_cfg.get("span_x", 1)) or 1)
-            span_y = int(qr_cfg.get("span_y", 1) or 1)
-            span_x = max(1, min(3, span_x))
-            span_y = max(1, min(3, span_y))
-
-            cx, cy, cw, ch, _row = _cell_box(pos, x, y, w, h, span_x=span_x, span_y=span_y)
-
-            fit = bool(qr_cfg.get("fit", False))
-            if fit:
-                # Fit a square QR into the spanned cell with padding
-                pad_rel = float(qr_cfg.get("pad_rel", 0.06))
-                pad_rel = max(0.0, min(0.15, pad_rel))
-                pad = pad_rel * min(cw, ch)
-
-                cw2 = max(0.0, cw - 2 * pad)
-                ch2 = max(0.0, ch - 2 * pad)
-                qr_size = min(cw2, ch2)
-                if qr_size >= 10:
-                    qr_x = cx + (cw - qr_size) / 2
-                    qr_y = cy + (ch - qr_size) / 2
-                    _draw_qr(c, qr_x, qr_y, qr_size, qr_text)
-            else:
-                # Legacy behavior: size is a fraction of the cell (not fitted)
-                size_rel = float(qr_cfg.get("size_rel", 0.85))
-                size_rel = max(0.2, min(0.95, size_rel))
-                base = min(cw, ch)
-                qr_size = max(10, min(base * size_rel, cw, ch))
-                qr_x = cx + (cw - qr_size) / 2
-                qr_y = cy + (ch - qr_size) / 2
-                _draw_qr(c, qr_x, qr_y, qr_size, qr_text)
+            qr_x, qr_y = plan.qr.origins[page_pos]
+            _draw_qr(c, qr_x, qr_y, plan.qr.size, qr_text, plan.qr.level)
 
-    c.setFont(t.font_name, t.font_size)
+    c.setFont(plan.template.font_name, plan.template.font_size)
@@ -0,0 +1,114 @@
+"""
+Fast label previews.
+
+Layout tweaks only need to see one sheet, so a preview renders the first N sheets' worth of
+rows (taken lazily from the row source; a LabelRowQuery only reads those rows) and reuses the
+registry's compiled plan: editing a preset recompiles, re-previewing does not.
+
+When reportlab's renderPM has a working backend (rlPyCairo, or the legacy _renderPM
+extension) the first sheet is also drawn as a PNG thumbnail from the same plan; without one
+the preview is a short PDF, which is still cheap.
+"""
+from __future__ import annotations
+
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Optional
+
+from reportlab.graphics.shapes import Drawing, Group, Rect, String
+from reportlab.lib import colors
+
+from studio_inventory.labels.layout import LabelPlan
+from studio_inventory.labels.make_pdf import _element_lines, _qr_group, _source_value, make_labels_pdf
+from studio_inventory.labels.registry import compiled_plan
+
+_TEXT_ANCHOR = {"left": "start", "center": "middle", "right": "end"}
+
+def first_sheet_rows(rows: Iterable[dict], per_page: int, start_pos: int = 1, sheets: int = 1) -> list[dict]:
+    """Just the rows that land on the first `sheets` sheets (the first may be partly used)."""
+    n = max(0, sheets * per_page - (max(1, int(start_pos)) - 1) % per_page)
+    if hasattr(rows, "__getitem__") and hasattr(rows, "__len__"):
+        return list(rows[:n])
+    return list(islice(rows, n))
+
+
+def sheet_drawing(plan: LabelPlan, rows: list[dict], start_pos: int = 1, *, draw_boxes: bool = True) -> Drawing:
+    """The first sheet as a reportlab Drawing, placed exactly like make_labels_pdf places it."""
+    t = plan.template
+    d = Drawing(t.page_w, t.page_h)
+    d.add(Rect(0, 0, t.page_w, t.page_h, fillColor=colors.white, strokeColor=None))
+
+    start = (max(1, int(start_pos)) - 1) % plan.per_page
+    for page_pos, item in zip(range(start, plan.per_page), rows):
+        x0, y0 = plan.slots[page_pos]
+        if draw_boxes:
+            d.add(Rect(x0, y0, t.label_w, t.label_h, fillColor=None, strokeColor=colors.lightgrey, strokeWidth=0.5))
+
+        for e in plan.elements:
+            text = _source_value(item, e.source).strip()
+            if not text:
+                continue
+            for x, y, ln in _element_lines(e, page_pos, text):
+                d.add(String(x, y, ln, fontName=e.font, fontSize=e.size, textAnchor=_TEXT_ANCHOR.get(e.align, "start")))
+
+        if plan.qr is not None:
+            qr_text = _source_value(item, plan.qr.source).strip()
+            if qr_text:
+                code, w, h = _qr_group(qr_text, plan.qr.level)
+                qx, qy = plan.qr.origins[page_pos]
+                size = plan.qr.size
+                d.add(Group(code, transform=[size / w, 0, 0, size / h, qx, qy]))
+    return d
+
+
+def _write_png(drawing: Drawing, out_png: Path, dpi: int) -> bool:
+    try:
+        from reportlab.graphics import renderPM
+        from reportlab.graphics.utils import RenderPMError
+    except ImportError:
+        return False
+    try:
+        renderPM.drawToFile(drawing, str(out_png), fmt="PNG", dpi=dpi)
+    except (RenderPMError, ImportError, OSError):
+        return False
+    return True
+
+
+def make_labels_preview(
+    *,
+    template_path: Path,
+    out_pdf: Path,
+    rows: Iterable[dict],
+    start_pos: int = 1,
+    include_qr: bool = False,
+    layout: Optional[dict] = None,
+    sheets: int = 1,
+    png: bool = True,
+    dpi: int = 110,
+) -> Path:
+    """
+    Render the first `sheets` sheet(s) of a label job.
+
+    Writes out_pdf, plus out_pdf with a .png suffix when png=True, a layout is given and
+    renderPM can rasterize. Returns the file worth opening (the PNG if one was written).
+    Raises ValueError for a malformed layout, like make_labels_pdf.
+    """
+    plan = compiled_plan(template_path, layout)
+    head = first_sheet_rows(rows, plan.per_page, start_pos, max(1, sheets))
+
+    make_labels_pdf(
+        template_path=template_path,
+        out_pdf=out_pdf,
+        rows=head,
+        start_pos=start_pos,
+        include_qr=include_qr,
+        layout=layout,
+        plan=plan,
+    )
+
+    # Thumbnail of the first sheet (layout presets only; the fallback layout has no plan elements)
+    if png and layout:
+        out_png = out_pdf.with_suffix(".png")
+        if _write_png(sheet_drawing(plan, head, start_pos), out_png, dpi):
+            return out_png
+    return out_pdf
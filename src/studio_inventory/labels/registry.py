@@ -0,0 +1,113 @@
+"""
+Label template / preset registry.
+
+Templates, preset listings, presets and compiled plans are loaded once and cached against
+the file's (mtime_ns, size) (for listings: the preset directory's), so menu redraws and repeat
+previews don't re-glob or re-parse JSON, and an edited file is picked up on next use.
+
+Templates are validated against layout.TEMPLATE_SCHEMA and handed out as frozen
+LabelTemplate objects; plans are frozen LabelPlans. Presets are plain dicts the layout editor
+mutates, so callers get a deep copy and the cached original can't drift.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from studio_inventory.labels.layout import LabelPlan, LabelTemplate, compile_layout
+from studio_inventory.labels.presets import _preset_dir
+
+Stamp = tuple[int, int]
+
+_TEMPLATES: dict[Path, tuple[Stamp, LabelTemplate]] = {}
+_PRESET_DIRS: dict[Path, tuple[Stamp, list[Path]]] = {}
+_PRESETS: dict[Path, tuple[Stamp, dict]] = {}
+_PLANS: dict[tuple[Path, Stamp, str], LabelPlan] = {}
+_PLANS_MAX = 64
+
+
+def _stamp(p: Path) -> Stamp:
+    st = os.stat(p)
+    return st.st_mtime_ns, st.st_size
+
+
+def load_template(path: Path) -> LabelTemplate:
+    """Parsed + validated template (ValueError if the file doesn't match the schema)."""
+    path = Path(path).resolve()
+    stamp = _stamp(path)
+    hit = _TEMPLATES.get(path)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    t = LabelTemplate.from_json(path)
+    _TEMPLATES[path] = (stamp, t)
+    return t
+
+
+def template_catalog(paths: list[Path]) -> list[tuple[Path, Optional[LabelTemplate], str]]:
+    """(path, template or None, error) per file, for pickers that list broken files too."""
+    out = []
+    for p in paths:
+        try:
+            out.append((p, load_template(p), ""))
+        except (OSError, ValueError) as e:
+            out.append((p, None, str(e)))
+    return out
+
+
+def preset_paths(project_root: Path, template_path: Path) -> list[Path]:
+    """Preset files for a template (re-globbed only when the preset folder changes)."""
+    d = _preset_dir(project_root, Path(template_path)).resolve()
+    stamp = _stamp(d)
+    hit = _PRESET_DIRS.get(d)
+    if hit is not None and hit[0] == stamp:
+        return list(hit[1])
+    paths = sorted(d.glob("*.json"))
+    _PRESET_DIRS[d] = (stamp, paths)
+    return list(paths)
+
+
+def load_preset(path: Path, template_path: Optional[Path] = None) -> dict:
+    """
+    A preset as an editable dict (a copy of the cached one).
+
+    With template_path the preset is also compiled against that template, so a malformed
+    preset raises ValueError here rather than at render time.
+    """
+    path = Path(path).resolve()
+    stamp = _stamp(path)
+    hit = _PRESETS.get(path)
+    if hit is None or hit[0] != stamp:
+        try:
+            layout = json.loads(path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path.name}: invalid JSON ({e})") from None
+        if not isinstance(layout, dict):
+            raise ValueError(f"{path.name}: expected a JSON object, got {type(layout).__name__}")
+        hit = (stamp, layout)
+        _PRESETS[path] = hit
+    if template_path is not None:
+        compiled_plan(template_path, hit[1])
+    return copy.deepcopy(hit[1])
+
+
+def compiled_plan(template_path: Path, layout: Optional[dict]) -> LabelPlan:
+    """compile_layout() memoized on the template file and the preset's contents."""
+    template_path = Path(template_path).resolve()
+    key = (template_path, _stamp(template_path), json.dumps(layout or {}, sort_keys=True, default=str))
+    plan = _PLANS.get(key)
+    if plan is None:
+        plan = compile_layout(load_template(template_path), layout)
+        if len(_PLANS) >= _PLANS_MAX:
+            _PLANS.clear()
+        _PLANS[key] = plan
+    return plan
+
+
+def clear() -> None:
+    _TEMPLATES.clear()
+    _PRESET_DIRS.clear()
+    _PRESETS.clear()
+    _PLANS.clear()
@@ -0,0 +1,72 @@
+"""
+Label output backends.
+
+Every backend takes the same job description (template, layout preset, rows) and writes one
+output; render_labels() picks the backend by format name:
+
+  pdf  reportlab sheets for laser/inkjet label stock (make_pdf.make_labels_pdf)
+  zpl  native ZPL for thermal roll printers (zpl.make_labels_zpl)
+
+Backends (and reportlab) are imported on first use, so the CLI can offer formats and their
+defaults without loading them.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Optional
+
+LABEL_FORMATS = ("pdf", "zpl")
+
+DEFAULT_DPI = 203  # ZPL printer resolution (most Zebra desktop printers)
+
+
+def format_for_path(out: Path | str, default: str = "pdf") -> str:
+    """Output format implied by a file suffix (.zpl → zpl, .pdf → pdf), else default."""
+    suffix = Path(str(out)).suffix.lower().lstrip(".")
+    return suffix if suffix in LABEL_FORMATS else default
+
+
+def render_labels(
+    fmt: str,
+    *,
+    template_path: Path,
+    out: Path | str,
+    rows: Iterable[dict],
+    start_pos: int = 1,
+    include_qr: bool = False,
+    layout: Optional[dict] = None,
+    workers: int = 1,
+    dpi: int = DEFAULT_DPI,
+) -> None:
+    """
+    Render a label job with the named backend.
+
+    start_pos/workers apply to sheets (pdf); dpi applies to thermal output (zpl).
+    Raises ValueError for an unknown format or a malformed layout.
+    """
+    fmt = (fmt or "pdf").lower()
+    if fmt == "pdf":
+        from studio_inventory.labels.make_pdf import make_labels_pdf
+
+        make_labels_pdf(
+            template_path=template_path,
+            out_pdf=Path(out),
+            rows=rows,
+            start_pos=start_pos,
+            include_qr=include_qr,
+            layout=layout,
+            workers=workers,
+        )
+    elif fmt == "zpl":
+        from studio_inventory.labels.zpl import make_labels_zpl
+
+        make_labels_zpl(
+            template_path=template_path,
+            out=out,
+            rows=rows,
+            include_qr=include_qr,
+            layout=layout,
+            dpi=dpi,
+        )
+    else:
+        raise ValueError(f"unknown label format {fmt!r} (expected one of: {', '.join(LABEL_FORMATS)})")
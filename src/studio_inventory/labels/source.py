@@ -0,0 +1,167 @@
+"""
+Streaming label row source.
+
+LabelRowQuery describes a label job as a query instead of a list: a filtered/ordered
+inventory_view selection, optionally narrowed to browse row numbers or to explicit part_keys
+(kept in the order given). With neither, every matching row gets a label.
+Iterating it opens its own SQLite connection, loads the selection into a TEMP table (so
+there is no `IN (?,?,…)` list and no host-parameter limit) and yields one dict per label
+in sheet-sized fetchmany() chunks, so memory stays flat however many parts are selected.
+
+It also supports len() and slicing, which make_labels_pdf uses to hand page-aligned
+shards to worker processes without materializing the rows.
+"""
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+# Label fields plus the stock numbers a layout can print (all exposed by inventory_view)
+LABEL_ROW_COLUMNS = (
+    "part_key", "vendor", "sku", "description", "desc_clean",
+    "label_line1", "label_line2", "label_short",
+    "purchase_url", "airtable_url", "label_qr_url", "label_qr_text",
+    "on_hand", "avg_unit_cost", "last_invoice",
+)
+# plus short_code from label_short_codes and product_description / product_family from the
+# product_info cache (NULL on databases that predate them, or for parts not enriched)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+@dataclass(frozen=True)
+class LabelRowQuery:
+    db_path: str
+    where: str = ""                        # "WHERE ..." over inventory_view (may be empty)
+    params: tuple = ()
+    order_by: str = "vendor, sku"
+    row_nums: Optional[tuple[int, ...]] = None   # 1-based positions in the ordered selection
+    part_keys: Optional[tuple[str, ...]] = None  # explicit keys, filtered by `where` (used when row_nums is None)
+    start: int = 0
+    stop: Optional[int] = None
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+
+    @classmethod
+    def from_selection(
+        cls,
+        db_path: Path | str,
+        *,
+        where: str = "",
+        params: Sequence = (),
+        order_by: str = "vendor, sku",
+        row_nums: Optional[Sequence[int]] = None,
+        part_keys: Optional[Sequence[str]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> "LabelRowQuery":
+        return cls(
+            db_path=str(db_path),
+            where=where or "",
+            params=tuple(params or ()),
+            order_by=order_by or "vendor, sku",
+            row_nums=tuple(int(n) for n in row_nums) if row_nums is not None else None,
+            part_keys=tuple(part_keys) if part_keys is not None else None,
+            chunk_size=max(1, int(chunk_size)),
+        )
+
+    # -- SQL -------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.db_path)
+        con.row_factory = sqlite3.Row
+        con.execute("DROP TABLE IF EXISTS temp._label_pick;")
+        con.execute("CREATE TEMP TABLE _label_pick (seq INTEGER PRIMARY KEY, n INTEGER, part_key TEXT);")
+        if self.row_nums is not None:
+            con.executemany("INSERT INTO _label_pick(seq, n) VALUES (?, ?);", enumerate(self.row_nums))
+        elif self.part_keys is not None:
+            con.executemany("INSERT INTO _label_pick(seq, part_key) VALUES (?, ?);", enumerate(self.part_keys or ()))
+        return con
+
+    def _select_sql(self, con: sqlite3.Connection, what: str) -> str:
+        cols = ", ".join(f"iv.{c} AS {c}" for c in LABEL_ROW_COLUMNS)
+        tables = {r[0] for r in con.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('label_short_codes', 'product_info');"
+        ).fetchall()}
+        joins = []
+        if "label_short_codes" in tables:
+            cols += ", sc.code AS short_code"
+            joins.append("LEFT JOIN label_short_codes sc ON sc.part_key = sel.part_key")
+        else:
+            cols += ", NULL AS short_code"
+        if "product_info" in tables and "description" in {r[1] for r in con.execute("PRAGMA table_info(product_info);")}:
+            cols += ", pi.description AS product_description, pi.family AS product_family"
+            joins.append("LEFT JOIN product_info pi ON pi.part_key = sel.part_key AND pi.status = 'ok'")
+        else:
+            cols += ", NULL AS product_description, NULL AS product_family"
+        extra_joins = "\n            ".join(joins)
+        if self.row_nums is not None:
+            # Same ordering the browse table numbered rows with; selection order (and repeats) kept
+            picked = f"""
+                WITH ranked AS (
+                    SELECT part_key, ROW_NUMBER() OVER (ORDER BY {self.order_by}) AS n
+                    FROM inventory_view
+                    {self.where}
+                )
+                SELECT p.seq AS seq, ranked.part_key AS part_key
+                FROM _label_pick p JOIN ranked ON ranked.n = p.n
+            """
+        elif self.part_keys is not None:
+            picked = "SELECT seq, part_key FROM _label_pick"
+            if self.where.strip():
+                picked += f" WHERE part_key IN (SELECT part_key FROM inventory_view {self.where})"
+        else:
+            picked = f"""
+                SELECT ROW_NUMBER() OVER (ORDER BY {self.order_by}) AS seq, part_key
+                FROM inventory_view
+                {self.where}
+            """
+        select = cols if what == "rows" else "COUNT(*)"
+        order = "ORDER BY sel.seq" if what == "rows" else ""
+        return f"""
+            SELECT {select}
+            FROM ({picked}) sel
+            JOIN inventory_view iv ON iv.part_key = sel.part_key
+            {extra_joins}
+            {order}
+        """
+
+    def _bounds(self) -> tuple[int, int]:
+        # LIMIT -1 is "no limit" in SQLite
+        limit = -1 if self.stop is None else max(0, self.stop - self.start)
+        return limit, self.start
+
+    # -- protocol --------------------------------------------------------------
+
+    def __iter__(self) -> Iterator[dict]:
+        con = self._connect()
+        try:
+            cur = con.execute(self._select_sql(con, "rows") + " LIMIT ? OFFSET ?", list(self.params) + list(self._bounds()))
+            while True:
+                chunk = cur.fetchmany(self.chunk_size)
+                if not chunk:
+                    break
+                for r in chunk:
+                    yield dict(r)
+        finally:
+            con.close()
+
+    def __len__(self) -> int:
+        con = self._connect()
+        try:
+            total = int(con.execute(self._select_sql(con, "count"), list(self.params)).fetchone()[0])
+        finally:
+            con.close()
+        stop = total if self.stop is None else min(total, self.stop)
+        return max(0, stop - self.start)
+
+    def __getitem__(self, s: slice) -> "LabelRowQuery":
+        if not isinstance(s, slice) or s.step not in (None, 1):
+            raise TypeError("LabelRowQuery only supports contiguous slices")
+        n = len(self) if (s.start is not None and s.start < 0) or (s.stop is not None and s.stop < 0) else None
+        start, stop, _ = s.indices(n) if n is not None else (s.start or 0, s.stop, 1)
+        new_start = self.start + start
+        new_stop = None if stop is None else self.start + stop
+        if self.stop is not None:
+            new_stop = self.stop if new_stop is None else min(new_stop, self.stop)
+        return replace(self, start=new_start, stop=new_stop)
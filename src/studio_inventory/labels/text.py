@@ -0,0 +1,126 @@
+"""
+Text fitting for label layout.
+
+Glyph widths are looked up once per (font, character) and kept in 1/1000 em, the units
+reportlab's font metrics use; string widths are scaled exactly like
+pdfmetrics.stringWidth (sum * 0.001 * size), so fitting decisions match it.
+
+  - string_width: LRU-cached measurement of whole strings
+  - truncate_to_width: binary search over prefix widths instead of trimming a char at a time
+  - wrap_lines: greedy word wrap in one pass with running line widths
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from itertools import accumulate
+
+from reportlab.pdfbase import pdfmetrics
+
+ELLIPSIS = "…"
+
+# Characters measured up front for every font used by a template
+_PRELOAD = "".join(chr(i) for i in range(32, 127)) + ELLIPSIS
+
+
+class GlyphWidths:
+    """Per-font table of glyph advance widths in 1/1000 em, filled lazily for non-ASCII."""
+
+    __slots__ = ("font_name", "_widths")
+
+    def __init__(self, font_name: str):
+        self.font_name = font_name
+        self._widths: dict[str, float] = {}
+        for ch in _PRELOAD:
+            self._measure(ch)
+
+    def _measure(self, ch: str) -> float:
+        # stringWidth at size 1000 returns the metric itself (up to float noise from the 0.001 scale)
+        w = round(pdfmetrics.stringWidth(ch, self.font_name, 1000), 6)
+        self._widths[ch] = w
+        return w
+
+    def __getitem__(self, ch: str) -> float:
+        w = self._widths.get(ch)
+        return self._measure(ch) if w is None else w
+
+    def units(self, text: str) -> float:
+        widths = self._widths
+        total = 0.0
+        for ch in text:
+            w = widths.get(ch)
+            total += self._measure(ch) if w is None else w
+        return total
+
+    def prefix_units(self, text: str) -> list[float]:
+        """Cumulative widths: result[k] is the width of text[:k]."""
+        return list(accumulate((self[ch] for ch in text), initial=0.0))
+
+
+@lru_cache(maxsize=None)
+def glyph_widths(font_name: str) -> GlyphWidths:
+    return GlyphWidths(font_name)
+
+
+def _fits(units: float, size: float, max_width: float) -> bool:
+    return units * 0.001 * size <= max_width
+
+
+@lru_cache(maxsize=16384)
+def string_width(text: str, font_name: str, size: float) -> float:
+    return glyph_widths(font_name).units(text) * 0.001 * size
+
+
+@lru_cache(maxsize=16384)
+def truncate_to_width(text: str, max_width: float, font: str, size: float) -> str:
+    """Longest prefix of text + "…" that fits max_width ("" if even "…" alone doesn't)."""
+    if not text:
+        return ""
+    gw = glyph_widths(font)
+    prefix = gw.prefix_units(text)
+    if _fits(prefix[-1], size, max_width):
+        return text
+
+    ell = gw.units(ELLIPSIS)
+    # Largest k in [1, len-1] with width(text[:k] + "…") <= max_width; prefix widths are monotone
+    lo, hi = 0, len(text) - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _fits(prefix[mid] + ell, size, max_width):
+            lo = mid
+        else:
+            hi = mid - 1
+    return (text[:lo] + ELLIPSIS) if lo else ""
+
+
+def wrap_lines(text: str, max_width: float, font: str, size: float, max_lines: int) -> list[str]:
+    """
+    Greedy word wrap into at most max_lines lines; the last line is truncated to fit.
+    A single word wider than the line still gets its own line (then truncated if last).
+    """
+    if not text:
+        return []
+    gw = glyph_widths(font)
+    space = gw[" "]
+
+    lines: list[str] = []
+    cur = ""
+    cur_w = 0.0
+    for word in text.split():
+        word_w = gw.units(word)
+        if not cur:
+            cur, cur_w = word, word_w
+            continue
+        test_w = cur_w + space + word_w
+        if _fits(test_w, size, max_width):
+            cur = f"{cur} {word}"
+            cur_w = test_w
+        else:
+            lines.append(cur)
+            cur, cur_w = word, word_w
+            if len(lines) >= max_lines:
+                break
+    if len(lines) < max_lines and cur:
+        lines.append(cur)
+    if lines:
+        lines[-1] = truncate_to_width(lines[-1], max_width, font, size)
+    return lines[:max_lines]
@@ -0,0 +1,173 @@
+"""
+ZPL output for Zebra-style thermal printers.
+
+Same LabelTemplate + layout preset model as the PDF renderer, but a roll printer prints one
+label per format, so only the template's label size and padding matter (the sheet grid and
+start position don't). Each label becomes one ^XA…^XZ block with native text fields (^A0)
+and QR codes (^BQ); the printer rasterizes, so output is a plain text stream.
+
+Geometry comes from compile_layout() (position 0 of the sheet, made label-relative) and text
+is fitted with the same width tables as the PDF, so a preset looks the same on both.
+"""
+from __future__ import annotations
+
+import sys
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Optional
+
+from reportlab.graphics.barcode import qrencoder
+
+from studio_inventory.labels.layout import LabelPlan, LabelTemplate
+from studio_inventory.labels.make_pdf import _element_lines, _source_value, _truncate_to_width
+from studio_inventory.labels.registry import compiled_plan
+from studio_inventory.labels.render import DEFAULT_DPI
+
+# ZPL ^FB justification per layout alignment
+_JUSTIFY = {"left": "L", "center": "C", "right": "R"}
+
+# Baseline sits about this far (in em) below the top of a ^A0 field
+_ASCENT = 0.8
+
+
+def _dots(points: float, dpi: int) -> int:
+    return int(round(points / 72.0 * dpi))
+
+
+def _field_text(s: str) -> str:
+    """Escape for a ^FH field: ZPL control characters and non-ASCII as _XX (UTF-8 bytes, ^CI28)."""
+    out = []
+    for ch in s:
+        if ch in "^~_" or not (32 <= ord(ch) < 127):
+            out.append("".join(f"_{b:02X}" for b in ch.encode("utf-8")))
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+@lru_cache(maxsize=4096)
+def _qr_modules(text: str, level: str) -> int:
+    """Module count (side length) of the QR symbol the printer will draw for text."""
+    code = qrencoder.QRCode(None, getattr(qrencoder.QRErrorCorrectLevel, level))
+    code.addData(text)
+    # only the symbol version is needed; skip make()'s eight-pass mask search
+    return code.calculate_version() * 4 + 17
+
+
+class _ZplLabel:
+    """Converts label-relative PDF coordinates (points, y up) to ZPL fields (dots, y down)."""
+
+    def __init__(self, t: LabelTemplate, x0: float, y0: float, dpi: int):
+        self.t, self.x0, self.y0, self.dpi = t, x0, y0, dpi
+        self.parts: list[str] = []
+
+    def x(self, x: float) -> int:
+        return max(0, _dots(x - self.x0, self.dpi))
+
+    def y_top(self, y: float) -> int:
+        """ZPL y of a PDF-space y coordinate (distance from the label's top edge)."""
+        return max(0, _dots(self.t.label_h - (y - self.y0), self.dpi))
+
+    def text(self, x: float, width: float, baseline: float, size: float, align: str, s: str) -> None:
+        h = max(1, _dots(size, self.dpi))
+        top = self.y_top(baseline + _ASCENT * size)
+        self.parts.append(
+            f"^FO{self.x(x)},{top}^A0N,{h}^FB{max(1, _dots(width, self.dpi))},1,0,{_JUSTIFY.get(align, 'L')},0"
+            f"^FH^FD{_field_text(s)}^FS"
+        )
+
+    def qr(self, x: float, y: float, size: float, text: str, level: str) -> None:
+        level = (level or "L").upper()
+        size_dots = _dots(size, self.dpi)
+        modules = _qr_modules(text, level)
+        mag = max(1, min(10, size_dots // modules))
+        inset = max(0, (size_dots - modules * mag) // 2)  # centre the printed symbol in the planned square
+        self.parts.append(
+            f"^FO{self.x(x) + inset},{self.y_top(y + size) + inset}^BQN,2,{mag}^FH^FD{level}A,{_field_text(text)}^FS"
+        )
+
+
+def _label_zpl(plan: LabelPlan, item: dict, dpi: int, include_qr: bool) -> str:
+    t = plan.template
+    x0, y0 = plan.slots[0]
+    z = _ZplLabel(t, x0, y0, dpi)
+
+    if plan.elements or plan.qr is not None:
+        for e in plan.elements:
+            text = _source_value(item, e.source).strip()
+            if not text:
+                continue
+            cx, _cy, cw, _ch, _ax = e.boxes[0]
+            for _x, y, ln in _element_lines(e, 0, text):
+                z.text(cx, cw, y, e.size, e.align, ln)
+        if plan.qr is not None:
+            qr_text = _source_value(item, plan.qr.source).strip()
+            if qr_text:
+                qx, qy = plan.qr.origins[0]
+                z.qr(qx, qy, plan.qr.size, qr_text, plan.qr.level)
+    else:
+        # fallback simple layout (mirrors make_labels_pdf)
+        x = x0 + t.pad_x
+        y = y0 + t.pad_y
+        w = t.label_w - 2 * t.pad_x
+        h = t.label_h - 2 * t.pad_y
+
+        line1 = (item.get("label_line1") or item.get("label_short") or item.get("part_key") or "").strip()
+        line2 = (item.get("label_line2") or f'{item.get("vendor", "")}:{item.get("sku", "")}' or "").strip()
+        qr_text = (item.get("label_qr_text") or item.get("purchase_url") or item.get("part_key") or "").strip()
+
+        cur_y = y + h - t.font_size
+        for s in [line1, line2]:
+            if s:
+                z.text(x, w, cur_y, t.font_size, "left", _truncate_to_width(s, w, t.font_name, t.font_size))
+                cur_y -= (t.font_size + 1)
+
+        if include_qr and qr_text:
+            qr_size = min(h, w * 0.45)
+            z.qr(x0 + t.label_w - t.pad_x - qr_size, y + (h - qr_size) / 2, qr_size, qr_text, "L")
+
+    return (
+        f"^XA^CI28^PW{_dots(t.label_w, dpi)}^LL{_dots(t.label_h, dpi)}^LH0,0\n"
+        + "\n".join(z.parts)
+        + "\n^XZ\n"
+    )
+
+
+@contextmanager
+def _open_out(out: Path | str) -> Iterator[IO[bytes]]:
+    if str(out) == "-":
+        yield sys.stdout.buffer
+        sys.stdout.buffer.flush()
+        return
+    out = Path(out)
+    if not out.parent.exists():
+        out.parent.mkdir(parents=True, exist_ok=True)
+    # Plain files and printer device/spool paths (e.g. /dev/usb/lp0) are both just opened for writing
+    with open(out, "wb") as fh:
+        yield fh
+
+
+def make_labels_zpl(
+    *,
+    template_path: Path,
+    out: Path | str,
+    rows: Iterable[dict],
+    include_qr: bool = False,
+    layout: Optional[dict] = None,
+    dpi: int = DEFAULT_DPI,
+    plan: Optional[LabelPlan] = None,
+) -> int:
+    """
+    Write one ZPL label format per row to out (a file, a printer device/spool path, or "-" for stdout).
+    - dpi: printer resolution (203 or 300 for most Zebra desktop printers)
+    Returns the number of labels written. Raises ValueError for a malformed layout.
+    """
+    if plan is None:
+        plan = compiled_plan(template_path, layout)
+    n = 0
+    with _open_out(out) as fh:
+        for item in rows:
+            fh.write(_label_zpl(plan, item, dpi, include_qr).encode("ascii"))
+            n += 1
+    return n
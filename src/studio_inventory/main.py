@@ -19,6 +19,14 @@ from urllib.parse import quote_plus
 import pandas as pd
 
 from studio_inventory.vendors.registry import pick_parser
+from studio_inventory.archive import archive_pdf_to_imports
+from studio_inventory.part_identity import (
+    ensure_part_identity_schema,
+    migrate_part_keys,
+    part_key_from_row,
+    record_aliases_for_rows,
+)
+from studio_inventory.short_codes import assign_short_codes
 from studio_inventory.paths import workspace_root, log_dir, receipts_dir, project_root, imports_run_dir
 
 # ----------------------------
@@ -278,23 +286,6 @@ def pick_export_folder(default_dir: Path) -> Path | None:
 # ----------------------------
 # Ingest integrity: duplicate detection + stable IDs
 # ----------------------------
-def archive_pdf_to_imports(original_path: Path, run_dir: Path) -> Path:
-    """Copy an original PDF into workspace imports/YYYY-MM-DD/, returning the archived path."""
-    run_dir.mkdir(parents=True, exist_ok=True)
-    dest = run_dir / original_path.name
-    if dest.exists():
-        stem, suffix = original_path.stem, original_path.suffix
-        i = 2
-        while True:
-            cand = run_dir / f"{stem}__{i}{suffix}"
-            if not cand.exists():
-                dest = cand
-                break
-            i += 1
-    shutil.copy2(str(original_path), str(dest))
-    return dest
-
-
 def sha256_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
     h = hashlib.sha256()
     with path.open("rb") as f:
@@ -680,7 +671,7 @@ def ingest_receipts(pdf_paths: list[Path], debug: bool = False, logger: RunLogge
         original_pdf_path = pdf_path
         archived_pdf_path = None
         try:
-            archived_pdf_path = archive_pdf_to_imports(original_pdf_path, archive_dir)
+            archived_pdf_path = archive_pdf_to_imports(original_pdf_path, archive_dir, file_hash=file_hash)
         except Exception as e:
             log(f"  ARCHIVE: FAILED ({e}) using original path")
             archived_pdf_path = original_pdf_path
@@ -863,7 +854,8 @@ def ingest_receipts(pdf_paths: list[Path], debug: bool = False, logger: RunLogge
 
     if "sku" not in line_items_df.columns:
         line_items_df["sku"] = ""
-    line_items_df["part_key"] = line_items_df["vendor"].astype(str) + ":" + line_items_df["sku"].astype(str)
+    # vendor:sku, else vendor:mfg_pn, else vendor:d-<blake2b of normalized description>
+    line_items_df["part_key"] = line_items_df.apply(part_key_from_row, axis=1)
     # Links + QR targets (purchase URL and optional Airtable URL)
     line_items_df["purchase_url"] = line_items_df.apply(
         lambda r: make_purchase_url(str(r.get("vendor", "") or ""), str(r.get("sku", "") or "")),
@@ -1129,6 +1121,9 @@ def init_inventory_db(dbfile: Path):
         conn.execute('CREATE INDEX IF NOT EXISTS idx_line_items_part_key ON line_items(part_key);')
         conn.execute('CREATE INDEX IF NOT EXISTS idx_parts_removed_part_key ON parts_removed(part_key);')
         conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_vendor ON orders(vendor);')
+        # updated_utc indexes: delta exports (`export --since/--incremental`) are range scans
+        for tbl in ("orders", "line_items", "parts_received", "parts_removed", "inventory"):
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{tbl}_updated_utc ON {tbl}(updated_utc);')
 
         # Ensure label columns exist (supports schema upgrades without rebuilding the DB)
         _ensure_columns(conn, "line_items", ["desc_clean", "label_line1", "label_line2", "label_short", "purchase_url", "airtable_url", "label_qr_url", "label_qr_text"])
@@ -1166,6 +1161,11 @@ def init_inventory_db(dbfile: Path):
             ON pr.part_key = r.part_key;
         """)
 
+        # Content-addressed part keys + alias index (one-time re-key of hash()-based keys)
+        ensure_part_identity_schema(conn)
+        migrate_part_keys(conn)
+        assign_short_codes(conn)
+
         conn.commit()
 
 def update_database(
@@ -1200,7 +1200,9 @@ def update_database(
 
         _upsert_df(conn, "orders", orders_df, pk_col="order_uid")
         _upsert_df(conn, "line_items", line_items_df, pk_col="line_item_uid")
+        record_aliases_for_rows(conn, line_items_df)
         _upsert_df(conn, "parts_received", parts_received_df, pk_col="part_key")
+        assign_short_codes(conn)
         _upsert_df(conn, "parts_removed", parts_removed_df, pk_col="removal_uid")
 
         # Refresh materialized on-hand snapshot from the view
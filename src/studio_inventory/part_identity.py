@@ -0,0 +1,396 @@
+"""
+Stable part identity.
+
+A part_key is "<vendor>:<sku>" when the receipt line has a SKU, else "<vendor>:<mfg_pn>",
+else "<vendor>:d-<digest>" where the digest is a blake2b of the normalized description.
+Unlike the old `hash(desc)` fallback (randomized per process), the digest is the same on
+every run and every machine, so unlabeled parts keep one row in parts_received/inventory.
+
+part_key_aliases maps alternate identifiers (mfg part numbers, SKU spelling variants,
+pre-migration keys) to the canonical part_key so lookups by any of them still resolve.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import sys
+import unicodedata
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Iterable, Mapping, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DIGEST_PREFIX = "d-"
+DIGEST_SIZE = 10  # bytes -> 20 hex chars
+
+_WS_RE = re.compile(r"\s+")
+_SPACE_AROUND_PUNCT_RE = re.compile(r"\s*([,;:/()\[\]x×\"'-])\s*")
+_SKU_NOISE_RE = re.compile(r"[\s\-_.]+")
+
+PART_KEY_MIGRATION = "part_keys_v2_content_addressed"
+PART_ALIAS_BACKFILL = "part_key_aliases_v1_backfill"
+
+
+def _clean(v) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, float):
+        if v != v:  # NaN
+            return ""
+    elif "pandas" in sys.modules:
+        # pd.NA / NaT can only come from an already-imported pandas; don't import it just to check
+        try:
+            if sys.modules["pandas"].isna(v):
+                return ""
+        except (TypeError, ValueError):
+            pass
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    return str(v).strip()
+
+
+def normalize_identity_text(s: object) -> str:
+    """Case/width/whitespace-insensitive form of a description used for hashing."""
+    s = unicodedata.normalize("NFKC", _clean(s)).casefold()
+    s = _WS_RE.sub(" ", s).strip()
+    return _SPACE_AROUND_PUNCT_RE.sub(r"\1", s)
+
+
+def description_digest(description: object) -> str:
+    norm = normalize_identity_text(description)
+    return DIGEST_PREFIX + hashlib.blake2b(norm.encode("utf-8"), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def normalize_sku(sku: object) -> str:
+    """SKU spelling variant folding: '1234-k56 ' / '1234K56' -> '1234K56'."""
+    return _SKU_NOISE_RE.sub("", _clean(sku)).upper()
+
+
+def part_key_for(vendor: object, sku: object = None, mfg_pn: object = None, description: object = None) -> str:
+    v = _clean(vendor)
+    sku_s = _clean(sku)
+    if sku_s:
+        return f"{v}:{sku_s}"
+    mfg_s = _clean(mfg_pn)
+    if mfg_s:
+        return f"{v}:{mfg_s}"
+    return f"{v}:{description_digest(description)}"
+
+
+def _row_mfg(row: Mapping) -> object:
+    mfg = row.get("mfg_pn")
+    return mfg if _clean(mfg) else row.get("mfg_part")
+
+
+def part_key_from_row(row: Mapping) -> str:
+    """part_key for a line-item-like row (dict or pandas row)."""
+    return part_key_for(row.get("vendor"), row.get("sku"), _row_mfg(row), row.get("description"))
+
+
+def alias_candidates(row: Mapping, part_key: str | None = None) -> list[tuple[str, str]]:
+    """(alias, kind) pairs that should resolve to this row's canonical part_key."""
+    part_key = part_key or part_key_from_row(row)
+    v = _clean(row.get("vendor"))
+    out: list[tuple[str, str]] = []
+
+    sku = _clean(row.get("sku"))
+    if sku:
+        folded = normalize_sku(sku)
+        if folded and folded != sku:
+            out.append((f"{v}:{folded}", "sku"))
+    mfg = _clean(_row_mfg(row))
+    if mfg:
+        out.append((f"{v}:{mfg}", "mfg_pn"))
+        folded = normalize_sku(mfg)
+        if folded and folded != mfg:
+            out.append((f"{v}:{folded}", "mfg_pn"))
+    return [(a, k) for a, k in out if a != part_key]
+
+
+# ----------------------------
+# SQLite: alias index + one-time migration
+# ----------------------------
+
+def ensure_part_identity_schema(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS part_key_aliases (
+            alias TEXT PRIMARY KEY,
+            part_key TEXT NOT NULL,
+            kind TEXT,
+            created_utc TEXT
+        );
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_part_key_aliases_part_key ON part_key_aliases(part_key);")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            applied_utc TEXT NOT NULL
+        );
+    """)
+
+
+def record_part_aliases(conn: sqlite3.Connection, pairs: Iterable[tuple[str, str, str]]) -> None:
+    """
+    Insert (alias, part_key, kind) rows. An existing alias keeps its target, so a later
+    receipt can't silently steal an identifier.
+    """
+    ts = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    conn.executemany(
+        """
+        INSERT INTO part_key_aliases(alias, part_key, kind, created_utc)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(alias) DO NOTHING;
+        """,
+        [(a, pk, kind, ts) for a, pk, kind in pairs if a and pk and a != pk],
+    )
+
+
+def record_aliases_for_rows(conn: sqlite3.Connection, rows: pd.DataFrame) -> None:
+    if rows is None or rows.empty or "part_key" not in rows.columns:
+        return
+    pairs: dict[str, tuple[str, str, str]] = {}
+    for r in rows.to_dict("records"):
+        pk = _clean(r.get("part_key"))
+        if not pk:
+            continue
+        for alias, kind in alias_candidates(r, pk):
+            pairs.setdefault(alias, (alias, pk, kind))
+    record_part_aliases(conn, pairs.values())
+
+
+def resolve_part_key(conn: sqlite3.Connection, ident: str) -> Optional[str]:
+    """Canonical part_key for a part_key, alias, or SKU variant (None if unknown)."""
+    ident = (ident or "").strip()
+    if not ident:
+        return None
+    ensure_part_identity_schema(conn)
+    candidates = [ident]
+    vendor, sep, rest = ident.partition(":")
+    if sep and normalize_sku(rest) != rest:
+        candidates.append(f"{vendor}:{normalize_sku(rest)}")
+    for c in candidates:
+        if conn.execute("SELECT 1 FROM parts_received WHERE part_key = ? LIMIT 1;", (c,)).fetchone():
+            return c
+        row = conn.execute("SELECT part_key FROM part_key_aliases WHERE alias = ?;", (c,)).fetchone()
+        if row:
+            return row[0]
+    return None
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {r[1] for r in conn.execute(f'PRAGMA table_info("{table}");').fetchall()}
+
+
+def migrate_part_keys(conn: sqlite3.Connection) -> int:
+    """
+    One-time re-key of line items to content-addressed part_keys.
+
+    Rows keyed by the old per-process hash (or "vendor:" / "vendor:nan" for sku-less lines)
+    are moved to their stable key; parts_received rows that now share a key are merged
+    (units/spend summed, newest invoice kept), removals/events follow their part, and the
+    old keys are kept as "legacy" aliases. Then (also once) the mfg_pn / folded-SKU aliases
+    that ingest records for new rows are backfilled for every existing line item.
+    Returns the number of re-keyed line items.
+    """
+    ensure_part_identity_schema(conn)
+    moved = 0
+    if not _migration_applied(conn, PART_KEY_MIGRATION):
+        moved = _rekey_line_items(conn)
+        _mark_migration(conn, PART_KEY_MIGRATION)
+    # separate step so databases re-keyed before aliases were backfilled still get them
+    if not _migration_applied(conn, PART_ALIAS_BACKFILL):
+        _backfill_part_aliases(conn)
+        _mark_migration(conn, PART_ALIAS_BACKFILL)
+    return moved
+
+
+def _migration_applied(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM schema_migrations WHERE name = ?;", (name,)).fetchone() is not None
+
+
+def _mark_migration(conn: sqlite3.Connection, name: str) -> None:
+    conn.execute(
+        "INSERT INTO schema_migrations(name, applied_utc) VALUES (?, ?);",
+        (name, datetime.now(timezone.utc).replace(microsecond=0).isoformat()),
+    )
+
+
+def _rekey_line_items(conn: sqlite3.Connection) -> int:
+    li_cols = _table_columns(conn, "line_items")
+    moved = 0
+    if {"line_item_uid", "part_key", "vendor"} <= li_cols:
+        select_cols = ["line_item_uid", "part_key", "vendor"] + [
+            c for c in ("sku", "mfg_pn", "mfg_part", "description") if c in li_cols
+        ]
+        rows = conn.execute(f'SELECT {", ".join(select_cols)} FROM line_items;').fetchall()
+
+        updates: list[tuple[str, str]] = []
+        votes: dict[str, dict[str, int]] = {}
+        for r in rows:
+            row = dict(zip(select_cols, r))
+            old = _clean(row["part_key"])
+            new = part_key_from_row(row)
+            if new != old:
+                updates.append((new, row["line_item_uid"]))
+                votes.setdefault(old, {}).setdefault(new, 0)
+                votes[old][new] += 1
+
+        if updates:
+            # what each stored parts_received row owed to line items before the re-key
+            li_before = {
+                _clean(pk): (units, spend)
+                for pk, units, spend in conn.execute(
+                    "SELECT part_key, COALESCE(SUM(units_received), 0), COALESCE(SUM(line_total), 0) "
+                    "FROM line_items GROUP BY part_key;"
+                )
+            }
+            conn.executemany("UPDATE line_items SET part_key = ? WHERE line_item_uid = ?;", updates)
+            moved = len(updates)
+
+            # An old key may have lumped several parts together ("mcmaster:"); removals follow the majority
+            remap = {old: max(news.items(), key=lambda kv: kv[1])[0] for old, news in votes.items()}
+            for table in ("parts_removed", "inventory_events"):
+                if "part_key" in _table_columns(conn, table):
+                    conn.executemany(
+                        f'UPDATE "{table}" SET part_key = ? WHERE part_key = ?;',
+                        [(new, old) for old, new in remap.items()],
+                    )
+            record_part_aliases(conn, [(old, new, "legacy") for old, new in remap.items() if old])
+
+            affected_new = {new for news in votes.values() for new in news}
+            # old keys that still own line items (partial re-key) are recomputed, not dropped
+            affected_new |= {
+                old for old in remap
+                if conn.execute("SELECT 1 FROM line_items WHERE part_key = ? LIMIT 1;", (old,)).fetchone()
+            }
+            affected_new = sorted(affected_new)
+            _merge_parts_received(conn, remap, affected_new, li_before)
+    return moved
+
+
+def _backfill_part_aliases(conn: sqlite3.Connection) -> None:
+    """mfg_pn / folded-SKU aliases for line items ingested before record_aliases_for_rows existed."""
+    li_cols = _table_columns(conn, "line_items")
+    if not {"part_key", "vendor"} <= li_cols:
+        return
+    select_cols = ["part_key", "vendor"] + [c for c in ("sku", "mfg_pn", "mfg_part") if c in li_cols]
+    pairs: dict[str, tuple[str, str, str]] = {}
+    # oldest first, like ingest order: an identifier shared by two parts stays with the first
+    for r in conn.execute(f'SELECT {", ".join(select_cols)} FROM line_items ORDER BY rowid;'):
+        row = dict(zip(select_cols, r))
+        pk = _clean(row["part_key"])
+        if not pk:
+            continue
+        for alias, kind in alias_candidates(row, pk):
+            pairs.setdefault(alias, (alias, pk, kind))
+    record_part_aliases(conn, pairs.values())
+
+
+def _merge_parts_received(
+    conn: sqlite3.Connection,
+    remap: dict[str, str],
+    new_keys: list[str],
+    li_before: Mapping[str, tuple[float, float]],
+) -> None:
+    """
+    Rebuild parts_received rows for re-keyed parts.
+
+    Line-item totals are recomputed under the new keys. Whatever a stored row held beyond its
+    own line items (manual receives, which live only in parts_received) is added to the part
+    it merges into. Label fields may have been edited by hand, so each takes the first
+    non-empty value from: the part's own row, the merged old rows (newest first), its first
+    line item.
+    """
+    pr_cols = _table_columns(conn, "parts_received")
+    li_cols = _table_columns(conn, "line_items")
+    if "part_key" not in pr_cols:
+        return
+
+    ts = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    desc_cols = [c for c in (
+        "vendor", "sku", "description", "desc_clean", "label_line1", "label_line2", "label_short",
+        "purchase_url", "airtable_url", "label_qr_url", "label_qr_text",
+    ) if c in pr_cols]
+    li_desc = [c for c in desc_cols if c in li_cols]
+
+    stored_cols = [c for c in (*desc_cols, "units_received", "total_spend", "last_invoice", "updated_utc") if c in pr_cols]
+    stored: dict[str, dict[str, object]] = {}
+    for key in sorted(set(remap) | set(new_keys)):
+        row = conn.execute(
+            f"SELECT {', '.join(stored_cols)} FROM parts_received WHERE part_key = ?;", (key,)
+        ).fetchone()
+        if row:
+            stored[key] = dict(zip(stored_cols, row))
+
+    # old keys that still own line items keep their own row (and its manual receives)
+    merged_into: dict[str, list[str]] = {}
+    for old in sorted(remap):
+        if old in stored and old not in new_keys:
+            merged_into.setdefault(remap[old], []).append(old)
+
+    out_cols = ["part_key", *desc_cols, "units_received", "total_spend", "last_invoice", "avg_unit_cost", "updated_utc"]
+    out_cols = [c for c in out_cols if c in pr_cols]
+    sql = f"""
+        INSERT INTO parts_received ({", ".join(out_cols)})
+        VALUES ({", ".join(["?"] * len(out_cols))})
+        ON CONFLICT(part_key) DO UPDATE SET {", ".join(f"{c}=excluded.{c}" for c in out_cols if c != "part_key")};
+    """
+
+    for pk in new_keys:
+        units, spend, last_inv = conn.execute(
+            "SELECT COALESCE(SUM(units_received), 0), COALESCE(SUM(line_total), 0), MAX(invoice) "
+            "FROM line_items WHERE part_key = ?;",
+            (pk,),
+        ).fetchone()
+
+        # sorted() is stable, so equal timestamps keep part_key order
+        olds = sorted(
+            merged_into.get(pk, []), key=lambda k: _clean(stored[k].get("updated_utc")), reverse=True
+        )
+        order = ([pk] if pk in stored else []) + olds
+        sources = [stored[k] for k in order]
+        for key, src in zip(order, sources):
+            li_units, li_spend = li_before.get(key, (0, 0))
+            units += _excess(src.get("units_received"), li_units)
+            spend += _excess(src.get("total_spend"), li_spend)
+        last_inv = max(
+            (v for v in [last_inv, *(src.get("last_invoice") for src in sources)] if _clean(v)),
+            default=None,
+        )
+
+        desc: dict[str, object] = {}
+        for c in desc_cols:
+            desc[c] = next((src[c] for src in sources if _clean(src.get(c))), None)
+        missing = [c for c in li_desc if desc.get(c) is None]
+        if missing:
+            row = conn.execute(
+                f"SELECT {', '.join(missing)} FROM line_items WHERE part_key = ? ORDER BY rowid LIMIT 1;", (pk,)
+            ).fetchone()
+            desc.update(zip(missing, row or ()))
+
+        values = {
+            "part_key": pk,
+            **desc,
+            "units_received": units,
+            "total_spend": spend,
+            "last_invoice": last_inv,
+            "avg_unit_cost": (spend / units) if units else None,
+            "updated_utc": ts,
+        }
+        conn.execute(sql, [values.get(c) for c in out_cols])
+
+    stale = [old for old in remap if old not in set(new_keys)]
+    conn.executemany("DELETE FROM parts_received WHERE part_key = ?;", [(k,) for k in stale])
+    if "part_key" in _table_columns(conn, "inventory"):
+        conn.executemany("DELETE FROM inventory WHERE part_key = ?;", [(k,) for k in stale])
+
+
+def _excess(stored_total: object, line_item_total: float) -> float:
+    """Part of a stored total not explained by line items (0 when the row lags behind them)."""
+    try:
+        extra = float(stored_total or 0) - float(line_item_total or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return round(extra, 9) if extra > 1e-9 else 0.0
@@ -64,6 +64,12 @@ def imports_dir() -> Path:
     d.mkdir(parents=True, exist_ok=True)
     return d
 
+def imports_objects_dir() -> Path:
+    """Content-addressed archive store inside imports/, e.g. imports/objects/ab/cdef…pdf."""
+    d = imports_dir() / "objects"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
 def imports_run_dir(run_date: date | None = None) -> Path:
     """Date-stamped ingest folder inside imports/, e.g. imports/2026-01-30."""
     stamp = run_date.isoformat() if run_date else datetime.now().strftime("%Y-%m-%d")
@@ -0,0 +1,315 @@
+"""
+Text extraction backends for receipt parsing.
+
+Most vendor parsers only need each page's plain text, and pdfplumber (which lays characters
+out into visual lines) is the slowest way to get it. Backends:
+
+  pdfplumber  default; visual line order; also the only source of words with coordinates
+              (Read_Line_Items uses it directly for McMaster's table)
+  pdfminer    pdfminer.six without layout analysis: content-stream order, much faster
+  pypdfium2   PDFium's text layer (optional; when installed): fastest, close to pdfplumber
+
+The backend is chosen per vendor: STUDIO_INV_TEXT_BACKEND_<VENDOR> (e.g. ..._DIGIKEY),
+then STUDIO_INV_TEXT_BACKEND, then VENDOR_BACKENDS, then pdfplumber. A backend that isn't
+installed falls back to pdfplumber. Line order and spacing differ between backends, so switch
+a vendor only after its parses match pdfplumber's on real receipts:
+
+    python -m studio_inventory.pdf_text bench ~/StudioInventory/receipts --golden goldens/
+    python -m studio_inventory.pdf_text bench receipts/ --golden goldens/ --write-golden
+
+bench times every backend on every receipt and compares each backend's parse
+(parse_order + parse_line_items) with the golden one. The golden parse is pdfplumber's, or
+the JSON saved in --golden.
+
+More backends can be registered with register_backend() or the
+"studio_inventory.text_backends" entry point group (a TextBackend instance or class).
+"""
+from __future__ import annotations
+
+import importlib.util
+import logging
+import os
+from contextlib import contextmanager
+from importlib.metadata import entry_points
+from typing import Iterator, Optional
+
+log = logging.getLogger(__name__)
+
+TEXT = "text"      # plain text per page
+WORDS = "words"    # words with coordinates (pdfplumber only)
+
+DEFAULT_BACKEND = "pdfplumber"
+ENV_BACKEND = "STUDIO_INV_TEXT_BACKEND"
+ENTRY_POINT_GROUP = "studio_inventory.text_backends"
+
+# vendor -> backend; a vendor moves off pdfplumber once `bench` shows identical parses on real receipts
+VENDOR_BACKENDS: dict[str, str] = {}
+
+
+class TextBackend:
+    name = ""
+    requires = ""                      # module that must be importable
+    provides = frozenset({TEXT})
+
+    def available(self) -> bool:
+        return importlib.util.find_spec(self.requires) is not None
+
+    def iter_page_texts(self, pdf_path: str) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class PdfplumberBackend(TextBackend):
+    name = "pdfplumber"
+    requires = "pdfplumber"
+    provides = frozenset({TEXT, WORDS})
+
+    def iter_page_texts(self, pdf_path: str) -> Iterator[str]:
+        import pdfplumber
+
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages:
+                yield page.extract_text() or ""
+
+
+class PdfminerBackend(TextBackend):
+    name = "pdfminer"
+    requires = "pdfminer"
+
+    def iter_page_texts(self, pdf_path: str) -> Iterator[str]:
+        from pdfminer.high_level import extract_text
+
+        # laparams=None skips layout analysis; pages end with a form feed
+        pages = extract_text(pdf_path, laparams=None).split("\f")
+        if pages and not pages[-1].strip():
+            pages.pop()
+        yield from (p.strip("\n") for p in pages)
+
+
+class PdfiumBackend(TextBackend):
+    name = "pypdfium2"
+    requires = "pypdfium2"
+
+    def iter_page_texts(self, pdf_path: str) -> Iterator[str]:
+        import pypdfium2 as pdfium
+
+        doc = pdfium.PdfDocument(pdf_path)
+        try:
+            for i in range(len(doc)):
+                page = doc[i]
+                textpage = page.get_textpage()
+                try:
+                    yield textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+                finally:
+                    textpage.close()
+                    page.close()
+        finally:
+            doc.close()
+
+
+BACKENDS: dict[str, TextBackend] = {b.name: b for b in (PdfplumberBackend(), PdfminerBackend(), PdfiumBackend())}
+
+_plugins_loaded = False
+_warned: set[str] = set()
+_forced: Optional[str] = None
+
+
+def register_backend(backend: TextBackend) -> None:
+    BACKENDS[backend.name] = backend
+
+
+def _load_plugins() -> None:
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            obj = ep.load()
+            backend = obj() if isinstance(obj, type) else obj
+            if not isinstance(backend, TextBackend):
+                raise TypeError(f"expected a TextBackend, got {type(backend).__name__}")
+        except Exception as e:
+            log.warning("Skipping text backend entry point %r (%s): %s", ep.name, ep.value, e)
+            continue
+        BACKENDS.setdefault(backend.name, backend)
+
+
+def available_backends() -> list[str]:
+    _load_plugins()
+    return [name for name, b in BACKENDS.items() if b.available()]
+
+
+def backend_name_for(vendor: str = "") -> str:
+    if _forced:
+        return _forced
+    per_vendor = os.environ.get(f"{ENV_BACKEND}_{vendor.upper()}") if vendor else None
+    return per_vendor or os.environ.get(ENV_BACKEND) or VENDOR_BACKENDS.get(vendor) or DEFAULT_BACKEND
+
+
+def backend_for(vendor: str = "") -> TextBackend:
+    name = backend_name_for(vendor)
+    if name not in BACKENDS:
+        _load_plugins()
+    b = BACKENDS.get(name)
+    if b is None or not b.available():
+        if name not in _warned:
+            _warned.add(name)
+            log.warning("Text backend %r is not available; using %s", name, DEFAULT_BACKEND)
+        b = BACKENDS[DEFAULT_BACKEND]
+    return b
+
+
+@contextmanager
+def use_backend(name: Optional[str]) -> Iterator[None]:
+    """Force one backend for every vendor (bench; not thread-safe)."""
+    global _forced
+    prev, _forced = _forced, name
+    try:
+        yield
+    finally:
+        _forced = prev
+
+
+def iter_page_texts(pdf_path: str, vendor: str = "") -> Iterator[str]:
+    return backend_for(vendor).iter_page_texts(str(pdf_path))
+
+
+def page_texts(pdf_path: str, vendor: str = "") -> list[str]:
+    return list(iter_page_texts(pdf_path, vendor))
+
+
+def all_text(pdf_path: str, vendor: str = "") -> str:
+    return "\n".join(iter_page_texts(pdf_path, vendor))
+
+
+def first_page_text(pdf_path: str, vendor: str = "") -> str:
+    """Page-1 text ("" if the PDF can't be read)."""
+    try:
+        return next(iter(iter_page_texts(pdf_path, vendor)), "")
+    except Exception:
+        return ""
+
+
+# ----------------------------
+# Benchmark / golden comparison
+# ----------------------------
+
+def _receipts(paths: list[str]) -> list[str]:
+    from pathlib import Path
+
+    out: list[str] = []
+    for p in map(Path, paths):
+        out += sorted(str(x) for x in p.rglob("*.pdf")) if p.is_dir() else [str(p)]
+    return out
+
+
+def _parse_with(mod, pdf_path: str) -> dict:
+    import json
+
+    result = {"order": mod.parse_order(pdf_path), "line_items": mod.parse_line_items(pdf_path)}
+    return json.loads(json.dumps(result, default=str))  # datetimes etc. as they'd be stored
+
+
+def bench(
+    paths: list[str],
+    *,
+    backends: Optional[list[str]] = None,
+    runs: int = 3,
+    golden_dir: Optional[str] = None,
+    write_golden: bool = False,
+) -> list[dict]:
+    """One row per (receipt, backend): extraction ms (best of runs), parse ms, and whether the parse matches the golden one."""
+    import json
+    import time
+    from pathlib import Path
+
+    from studio_inventory.vendors.registry import default_registry
+
+    names = [b for b in (backends or available_backends()) if b in BACKENDS and BACKENDS[b].available()]
+    rows: list[dict] = []
+    for pdf in _receipts(paths):
+        with use_backend(DEFAULT_BACKEND):
+            hit = default_registry().pick(pdf)
+        if hit is None:
+            rows.append({"file": pdf, "vendor": None, "backend": None, "note": "no parser matched"})
+            continue
+        spec, mod = hit
+
+        golden_path = Path(golden_dir) / f"{Path(pdf).stem}.json" if golden_dir else None
+        golden = None
+        if golden_path is not None and golden_path.exists() and not write_golden:
+            golden = json.loads(golden_path.read_text(encoding="utf-8"))
+        if golden is None:
+            with use_backend(DEFAULT_BACKEND):
+                golden = _parse_with(mod, pdf)
+            if golden_path is not None and write_golden:
+                golden_path.parent.mkdir(parents=True, exist_ok=True)
+                golden_path.write_text(json.dumps(golden, indent=1, sort_keys=True), encoding="utf-8")
+
+        for name in names:
+            b = BACKENDS[name]
+            best = float("inf")
+            for _ in range(max(1, runs)):
+                t0 = time.perf_counter()
+                list(b.iter_page_texts(pdf))
+                best = min(best, time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            with use_backend(name):
+                try:
+                    parsed, error = _parse_with(mod, pdf), ""
+                except Exception as e:
+                    parsed, error = None, f"{type(e).__name__}: {e}"
+            rows.append({
+                "file": pdf,
+                "vendor": spec.name,
+                "backend": name,
+                "extract_ms": best * 1000,
+                "parse_ms": (time.perf_counter() - t0) * 1000,
+                "matches_golden": parsed == golden,
+                "note": error or ("words via pdfplumber" if WORDS in spec.text_needs else ""),
+            })
+    return rows
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Receipt text extraction backends")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="show backends and the one each vendor uses")
+    b = sub.add_parser("bench", help="time backends and compare parses with the golden output")
+    b.add_argument("paths", nargs="+", help="receipt PDFs or folders")
+    b.add_argument("--backend", action="append", dest="backends", help="limit to these backends (repeatable)")
+    b.add_argument("--runs", type=int, default=3)
+    b.add_argument("--golden", default=None, help="folder of golden parses (<receipt stem>.json)")
+    b.add_argument("--write-golden", action="store_true", help="(re)write golden parses from pdfplumber")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "list":
+        from studio_inventory.vendors.registry import default_registry
+
+        _load_plugins()
+        for name, backend in BACKENDS.items():
+            print(f"{name:<12} {'available' if backend.available() else 'not installed':<14} {', '.join(sorted(backend.provides))}")
+        print()
+        for spec in default_registry().specs:
+            print(f"{spec.name:<14} {backend_for(spec.name).name:<12} needs {', '.join(sorted(spec.text_needs))}")
+        return 0
+
+    rows = bench(args.paths, backends=args.backends, runs=args.runs, golden_dir=args.golden, write_golden=args.write_golden)
+    mismatches = 0
+    for r in rows:
+        if r["backend"] is None:
+            print(f"{r['file']}: {r['note']}")
+            continue
+        ok = "same" if r["matches_golden"] else "DIFF"
+        mismatches += not r["matches_golden"]
+        print(
+            f"{os.path.basename(r['file']):<32} {r['vendor']:<13} {r['backend']:<11} "
+            f"extract {r['extract_ms']:8.1f} ms  parse {r['parse_ms']:8.1f} ms  {ok}  {r['note']}"
+        )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+"""
+Short label codes.
+
+Every part gets a compact Crockford base32 code (e.g. "7K3Q9A") in label_short_codes, so a
+label's QR can carry "SI:7K3Q9A" instead of a full purchase/Airtable URL. Short uppercase
+payloads stay in QR alphanumeric mode at version 1-2, which renders faster, embeds smaller
+and scans better on 1/2" labels; the code is resolved back to the part (and whatever URL it
+currently has) at scan time, so target URLs can change without reprinting.
+
+Codes are derived from a hash of the part_key (6 chars = 30 bits), lengthened one character
+at a time on the rare collision, and never change once assigned.
+
+STUDIO_INV_QR_PREFIX sets the payload prefix (default "SI:"). A resolver URL such as
+"HTTPS://INV.EXAMPLE/P/" works too; keep it uppercase to stay in alphanumeric mode.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from studio_inventory.part_identity import resolve_part_key
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+CODE_LEN = 6
+MAX_CODE_LEN = 12
+
+QR_PREFIX = os.environ.get("STUDIO_INV_QR_PREFIX", "SI:")
+
+# Crockford decoding folds look-alikes onto the digits they're mistaken for
+_FOLD = str.maketrans({"I": "1", "L": "1", "O": "0"})
+
+
+def _encode(n: int, length: int) -> str:
+    out = []
+    for _ in range(length):
+        n, r = divmod(n, 32)
+        out.append(CROCKFORD[r])
+    return "".join(reversed(out))
+
+
+def candidate_code(part_key: str, length: int = CODE_LEN) -> str:
+    """Deterministic code of `length` chars for a part_key (before collision handling)."""
+    digest = hashlib.blake2b(part_key.encode("utf-8"), digest_size=8).digest()
+    return _encode(int.from_bytes(digest, "big") >> (64 - 5 * length), length)
+
+
+def normalize_short_code(text: str) -> str:
+    """Scanned/typed payload -> bare code: prefix, case, separators and look-alikes ignored."""
+    s = (text or "").strip()
+    if QR_PREFIX and s.upper().startswith(QR_PREFIX.upper()):
+        s = s[len(QR_PREFIX):]
+    s = s.rstrip("/").rsplit("/", 1)[-1].rsplit(":", 1)[-1]
+    return s.upper().replace("-", "").replace(" ", "").translate(_FOLD)
+
+
+def qr_payload(code: str) -> str:
+    return f"{QR_PREFIX}{code}" if code else ""
+
+
+# ----------------------------
+# SQLite
+# ----------------------------
+
+def ensure_short_code_schema(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS label_short_codes (
+            code TEXT PRIMARY KEY,
+            part_key TEXT NOT NULL UNIQUE,
+            created_utc TEXT
+        );
+    """)
+
+
+def assign_short_codes(conn: sqlite3.Connection, part_keys: Optional[Iterable[str]] = None) -> int:
+    """
+    Give codes to parts that don't have one (all of parts_received when part_keys is None).
+    Existing codes are never changed. Returns the number of codes created.
+    """
+    ensure_short_code_schema(conn)
+    if part_keys is None:
+        missing = [r[0] for r in conn.execute("""
+            SELECT pr.part_key
+            FROM parts_received pr
+            LEFT JOIN label_short_codes sc ON sc.part_key = pr.part_key
+            WHERE sc.part_key IS NULL AND pr.part_key IS NOT NULL;
+        """).fetchall()]
+    else:
+        wanted = list(dict.fromkeys(pk for pk in part_keys if pk))
+        have = set()
+        for i in range(0, len(wanted), 500):
+            chunk = wanted[i:i + 500]
+            have.update(r[0] for r in conn.execute(
+                f"SELECT part_key FROM label_short_codes WHERE part_key IN ({','.join('?' * len(chunk))});", chunk
+            ).fetchall())
+        missing = [pk for pk in wanted if pk not in have]
+    if not missing:
+        return 0
+
+    taken = {r[0] for r in conn.execute("SELECT code FROM label_short_codes;").fetchall()}
+    ts = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    new_rows = []
+    for pk in missing:
+        for length in range(CODE_LEN, MAX_CODE_LEN + 1):
+            code = candidate_code(pk, length)
+            if code not in taken:
+                break
+        else:
+            raise RuntimeError(f"could not assign a short code to {pk!r}")
+        taken.add(code)
+        new_rows.append((code, pk, ts))
+    conn.executemany("INSERT INTO label_short_codes(code, part_key, created_utc) VALUES (?, ?, ?);", new_rows)
+    return len(new_rows)
+
+
+def short_code_for(conn: sqlite3.Connection, part_key: str) -> Optional[str]:
+    ensure_short_code_schema(conn)
+    row = conn.execute("SELECT code FROM label_short_codes WHERE part_key = ?;", (part_key,)).fetchone()
+    return row[0] if row else None
+
+
+def resolve_short_code(conn: sqlite3.Connection, text: str) -> Optional[str]:
+    """part_key for a short code or scanned QR payload (None if unknown)."""
+    code = normalize_short_code(text)
+    if not code or any(ch not in CROCKFORD for ch in code):
+        return None
+    ensure_short_code_schema(conn)
+    row = conn.execute("SELECT part_key FROM label_short_codes WHERE code = ?;", (code,)).fetchone()
+    if row is None:
+        return None
+    # a label printed before a part was re-keyed still finds it through part_key_aliases
+    return resolve_part_key(conn, row[0]) or row[0]
+
+
+def short_code_target(conn: sqlite3.Connection, text: str) -> Optional[dict]:
+    """Resolve a code to its part and the URL its QR should lead to today."""
+    part_key = resolve_short_code(conn, text)
+    if part_key is None:
+        return None
+    row = conn.execute("""
+        SELECT part_key, vendor, sku, label_line1, label_qr_url, purchase_url, airtable_url
+        FROM parts_received WHERE part_key = ?;
+    """, (part_key,)).fetchone()
+    if row is None:
+        return {"part_key": part_key, "url": ""}
+    keys = ("part_key", "vendor", "sku", "label_line1", "label_qr_url", "purchase_url", "airtable_url")
+    d = {k: ("" if v is None else str(v)) for k, v in zip(keys, row)}
+    d["code"] = normalize_short_code(text)
+    d["url"] = d["label_qr_url"] or d["purchase_url"] or d["airtable_url"]
+    return d
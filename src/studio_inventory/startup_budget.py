@@ -0,0 +1,124 @@
+"""
+CLI startup budget check.
+
+Runs light CLI commands in fresh interpreters under `python -X importtime` and fails when one
+of them imports a heavy dependency it shouldn't need (or exits non-zero). A total import time
+over budget is only reported, unless --strict is given:
+
+    python -m studio_inventory.startup_budget             # exit 1 on a heavy import
+    python -m studio_inventory.startup_budget --strict    # ... or on any budget overrun
+    python -m studio_inventory.startup_budget --scale 2   # slower machine / CI runner
+
+Each command runs against a throwaway workspace (STUDIO_INV_HOME), so it never touches real
+data. Import times are the best of --runs runs and swing by tens of ms between runs; the
+heavy-module check doesn't depend on timing at all, which is why it is the one that fails.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+
+# Only the commands that actually parse receipts, render labels or call vendor APIs may pay
+# for these.
+HEAVY_MODULES = ("pandas", "numpy", "reportlab", "PIL", "requests", "requests_pkcs12", "pdfplumber", "pypdfium2")
+
+# argv -> total import budget in ms
+BUDGETS: dict[tuple[str, ...], float] = {
+    ("--help",): 200.0,
+    ("export", "--help"): 200.0,
+    ("export", "--list"): 200.0,
+    ("labels", "--help"): 200.0,
+    ("labels", "print", "--help"): 200.0,
+    ("enrich", "--help"): 200.0,
+}
+
+_RUN_CLI = "import sys; from studio_inventory.cli import app; sys.argv[0] = 'studio-inventory'; app()"
+
+
+@dataclass
+class StartupReport:
+    argv: tuple[str, ...]
+    import_ms: float
+    budget_ms: float
+    heavy: list[str]
+    returncode: int
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.heavy
+
+    @property
+    def over_budget(self) -> bool:
+        return self.import_ms > self.budget_ms
+
+
+def parse_importtime(stderr: str) -> tuple[float, set[str]]:
+    """(total ms spent in top-level imports, every module imported) from -X importtime output."""
+    total_us = 0
+    modules: set[str] = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        modules.add(name.strip())
+        if not name.startswith("  "):  # nested imports are already in their parent's cumulative time
+            total_us += int(cumulative)
+    return total_us / 1000.0, modules
+
+
+def measure(argv: tuple[str, ...], *, runs: int = 3, env: dict[str, str] | None = None) -> tuple[float, set[str], int]:
+    best = float("inf")
+    modules: set[str] = set()
+    rc = 0
+    for _ in range(max(1, runs)):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _RUN_CLI, *argv],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        ms, mods = parse_importtime(proc.stderr)
+        best, modules, rc = min(best, ms), modules | mods, rc or proc.returncode
+    return best, modules, rc
+
+
+def check(budgets: dict[tuple[str, ...], float] = BUDGETS, *, scale: float = 1.0, runs: int = 3) -> list[StartupReport]:
+    reports: list[StartupReport] = []
+    with tempfile.TemporaryDirectory(prefix="studio_inv_startup_") as ws:
+        env = dict(os.environ, STUDIO_INV_HOME=ws)
+        for argv, budget in budgets.items():
+            ms, modules, rc = measure(argv, runs=runs, env=env)
+            heavy = sorted(m for m in HEAVY_MODULES if m in modules)
+            reports.append(StartupReport(argv, ms, budget * scale, heavy, rc))
+    return reports
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Check studio-inventory CLI startup against its import budget")
+    ap.add_argument("--scale", type=float, default=1.0, help="multiply every budget (slow machines)")
+    ap.add_argument("--runs", type=int, default=3, help="runs per command; the fastest counts")
+    ap.add_argument("--strict", action="store_true", help="also fail when a command goes over its time budget")
+    args = ap.parse_args(argv)
+
+    reports = check(scale=args.scale, runs=args.runs)
+    failed = False
+    for r in reports:
+        hard = not r.ok or (args.strict and r.over_budget)
+        failed = failed or hard
+        status = "FAIL" if hard else "SLOW" if r.over_budget else "ok  "
+        line = f"{status} {' '.join(r.argv):<24} {r.import_ms:7.1f} ms / {r.budget_ms:.0f} ms"
+        if r.heavy:
+            line += f"  heavy imports: {', '.join(r.heavy)}"
+        if r.returncode:
+            line += f"  exit code {r.returncode}"
+        print(line)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,8 @@ from __future__ import annotations
 import re
 from typing import Optional
 
-import pdfplumber
+from studio_inventory.pdf_text import all_text, first_page_text
+from studio_inventory.vendors.rules import FieldRule, RuleSet, as_text
 
 
 # -------------------------------------------------
@@ -11,8 +12,11 @@ import pdfplumber
 # -------------------------------------------------
 
 def detect(pdf_path: str) -> bool:
-    with pdfplumber.open(pdf_path) as pdf:
-        t0 = (pdf.pages[0].extract_text() or "").upper()
+    return detect_text(first_page_text(pdf_path, vendor="arduino"))
+
+
+def detect_text(text: str) -> bool:
+    t0 = text.upper()
     # Invoices + cash sales both contain Arduino branding
     return "ARDUINO" in t0 and ("CASH SALE" in t0 or "INVOICE" in t0)
 
@@ -21,21 +25,33 @@ def detect(pdf_path: str) -> bool:
 # Order-level parsing
 # -------------------------------------------------
 
-def parse_order(pdf_path: str, debug: bool = False) -> dict:
-    text = _all_text(pdf_path)
-
-    invoice = _find(r"(CASH SALE n\.|INVOICE n\.)\s*([A-Z0-9/]+)", text, group=2)
-    sales_order = _find(r"Sales Order\s*#\s*([A-Z0-9]+)", text)
+def _totals(m: re.Match) -> tuple[float, float, float, float]:
+    return float(m.group(1)), float(m.group(2)), float(m.group(3)), float(m.group(4))
 
-    invoice_date = (
-        _find(r"Receipt Date:\s*([0-9/]+)", text)
-        or _find(r"Invoice Date:\s*([0-9/]+)", text)
-    )
 
+ORDER_RULES = RuleSet("arduino", [
+    FieldRule("invoice", r"(CASH SALE n\.|INVOICE n\.)\s*([A-Z0-9/]+)", as_text(2)),
+    FieldRule("sales_order", r"Sales Order\s*#\s*([A-Z0-9]+)"),
+    FieldRule("invoice_date", r"Receipt Date:\s*([0-9/]+)"),
+    FieldRule("invoice_date", r"Invoice Date:\s*([0-9/]+)"),
     # Totals in BOTH layouts:
     # Total Value Shipping Cost Total Tax Final Amount
     # $ 70.30 $ 0.00 $ 5.63 $ 75.93
-    total_value, shipping, tax, total = _parse_totals_block(text)
+    FieldRule(
+        "totals",
+        r"Total Value\s+Shipping Cost\s+Total Tax\s+Final Amount\s*\n"
+        r"\$\s*([0-9]+\.[0-9]{2})\s+\$\s*([0-9]+\.[0-9]{2})\s+\$\s*([0-9]+\.[0-9]{2})\s+\$\s*([0-9]+\.[0-9]{2})",
+        _totals,
+    ),
+])
+
+
+def parse_order(pdf_path: str, debug: bool = False) -> dict:
+    text = _all_text(pdf_path)
+
+    f = ORDER_RULES.scan(text)
+    invoice, sales_order, invoice_date = f["invoice"], f["sales_order"], f["invoice_date"]
+    total_value, shipping, tax, total = f["totals"] or (None, None, None, None)
 
     if debug:
         print(f"[ARDUINO] invoice={invoice} so={sales_order} date={invoice_date} "
@@ -150,24 +166,5 @@ def parse_line_items(pdf_path: str, debug: bool = False) -> list[dict]:
 # Helpers
 # -------------------------------------------------
 
-TOTALS_BLOCK_RE = re.compile(
-    r"Total Value\s+Shipping Cost\s+Total Tax\s+Final Amount\s*\n"
-    r"\$\s*([0-9]+\.[0-9]{2})\s+\$\s*([0-9]+\.[0-9]{2})\s+\$\s*([0-9]+\.[0-9]{2})\s+\$\s*([0-9]+\.[0-9]{2})",
-    re.I
-)
-
-def _parse_totals_block(text: str):
-    m = TOTALS_BLOCK_RE.search(text)
-    if not m:
-        return None, None, None, None
-    return float(m.group(1)), float(m.group(2)), float(m.group(3)), float(m.group(4))
-
-
 def _all_text(pdf_path: str) -> str:
-    with pdfplumber.open(pdf_path) as pdf:
-        return "\n".join(page.extract_text() or "" for page in pdf.pages)
-
-
-def _find(pattern: str, text: str, group: int = 1) -> Optional[str]:
-    m = re.search(pattern, text, re.I)
-    return m.group(group).strip() if m else None
+    return all_text(pdf_path, vendor="arduino")
@@ -0,0 +1,289 @@
+"""
+Record / replay HTTP cassettes for vendor API clients.
+
+A cassette is a JSON file of request/response pairs. McMasterClient(transport=...) takes an
+adapter factory, so the same client code runs live, recording, or fully offline:
+
+    McMasterClient(creds, transport=Recorder(Cassette("mcm.json")))   # live calls, saved on close()
+    McMasterClient(creds, transport=Replayer(Cassette.load("mcm.json"), speed=1.0))  # no network
+
+Replay sleeps each response's recorded latency (times `speed`; 0 for as fast as possible), so
+enrichment throughput can be benchmarked offline with realistic timings.
+mcmaster_stub can also serve a cassette over HTTP (--cassette), for tools that need a real
+server.
+
+Requests match on method, URL path and JSON body; repeats of the same request are replayed in
+recorded order, the last one repeating. A conditional GET whose validator matches the
+recorded ETag / Last-Modified gets a 304, like the live API. Nothing secret is written:
+Authorization headers aren't recorded, the login body is dropped and the login token is
+replaced.
+"""
+from __future__ import annotations
+
+import base64
+import http.client
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_VERSION = 1
+
+# Response headers worth keeping (validators, throttling, content type)
+_KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+
+REPLAY_TOKEN = "cassette-token"
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Replay got a request the cassette has no answer for."""
+
+
+def _body_key(body) -> str:
+    """Canonical form of a request body for matching (JSON re-serialized with sorted keys)."""
+    if not body:
+        return ""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    try:
+        return json.dumps(json.loads(body), sort_keys=True)
+    except ValueError:
+        return body
+
+
+def _is_login(method: str, path: str) -> bool:
+    return method.upper() == "POST" and path.rstrip("/").endswith("/login")
+
+
+@dataclass
+class Interaction:
+    method: str
+    path: str
+    body: str                     # canonical request body ("" for none or redacted)
+    status: int
+    headers: dict[str, str]
+    content: bytes
+    elapsed: float                # seconds, as recorded
+
+    def to_json(self) -> dict:
+        try:
+            text, enc = self.content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            text, enc = base64.b64encode(self.content).decode("ascii"), "base64"
+        return {
+            "request": {"method": self.method, "path": self.path, "body": self.body},
+            "response": {
+                "status": self.status,
+                "headers": self.headers,
+                "body": text,
+                "encoding": enc,
+                "elapsed": round(self.elapsed, 6),
+            },
+        }
+
+    @classmethod
+    def from_json(cls, d: dict) -> "Interaction":
+        req, resp = d["request"], d["response"]
+        body = resp.get("body") or ""
+        content = base64.b64decode(body) if resp.get("encoding") == "base64" else body.encode("utf-8")
+        return cls(
+            method=req["method"].upper(),
+            path=req["path"],
+            body=req.get("body") or "",
+            status=int(resp["status"]),
+            headers=dict(resp.get("headers") or {}),
+            content=content,
+            elapsed=float(resp.get("elapsed") or 0.0),
+        )
+
+
+@dataclass
+class Cassette:
+    path: Path
+    interactions: list[Interaction] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.path = Path(self.path)
+        self._lock = threading.Lock()
+        self._index: Optional[dict[tuple[str, str, str], list[Interaction]]] = None
+        self._cursor: dict[tuple[str, str, str], int] = {}
+
+    @classmethod
+    def load(cls, path: Path | str) -> "Cassette":
+        path = Path(path)
+        try:
+            d = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError as e:
+            raise ValueError(f"{path.name}: invalid cassette JSON ({e})") from None
+        if not isinstance(d, dict) or d.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"{path.name}: not a version {CASSETTE_VERSION} cassette")
+        return cls(path, [Interaction.from_json(x) for x in d.get("interactions") or []])
+
+    def save(self) -> None:
+        with self._lock:
+            data = {
+                "version": CASSETTE_VERSION,
+                "recorded_utc": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+                "interactions": [i.to_json() for i in self.interactions],
+            }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        tmp.replace(self.path)
+
+    # -- recording ---------------------------------------------------------
+
+    def record(self, method: str, path: str, body, status: int, headers, content: bytes, elapsed: float) -> None:
+        method = method.upper()
+        if _is_login(method, path):
+            body = ""
+            if status == 200:
+                try:
+                    d = json.loads(content)
+                    d["AuthToken"] = REPLAY_TOKEN
+                    content = json.dumps(d).encode("utf-8")
+                except (ValueError, TypeError):
+                    pass
+        kept = {k: headers[k] for k in _KEEP_HEADERS if k in headers}
+        with self._lock:
+            self.interactions.append(Interaction(method, path, _body_key(body), status, kept, content, elapsed))
+            self._index = None
+
+    # -- replay ------------------------------------------------------------
+
+    def match(self, method: str, path: str, body=None) -> Optional[Interaction]:
+        """Next recorded answer for this request (the last one repeats), or None."""
+        method = method.upper()
+        key = (method, path, "" if _is_login(method, path) else _body_key(body))
+        with self._lock:
+            if self._index is None:
+                self._index = {}
+                for i in self.interactions:
+                    self._index.setdefault((i.method, i.path, i.body), []).append(i)
+                self._cursor = {}
+            hits = self._index.get(key)
+            if not hits:
+                return None
+            n = self._cursor.get(key, 0)
+            self._cursor[key] = n + 1
+            return hits[min(n, len(hits) - 1)]
+
+    def respond(self, method: str, path: str, headers, body=None) -> Optional[tuple[int, dict[str, str], bytes, float]]:
+        """(status, headers, content, elapsed) for a request, answering 304 to a matching conditional GET."""
+        hit = self.match(method, path, body)
+        if hit is None:
+            if _is_login(method, path):
+                # recorded with a cached token, so no login was ever made
+                return 200, {"Content-Type": "application/json"}, json.dumps({"AuthToken": REPLAY_TOKEN}).encode(), 0.0
+            return None
+        headers = CaseInsensitiveDict(headers or {})
+        etag, last_modified = hit.headers.get("ETag"), hit.headers.get("Last-Modified")
+        inm, ims = headers.get("If-None-Match"), headers.get("If-Modified-Since")
+        if hit.status == 200 and ((inm and etag and etag in [t.strip() for t in inm.split(",")])
+                                  or (not inm and ims and last_modified and ims == last_modified)):
+            return 304, {k: v for k, v in hit.headers.items() if k != "Content-Type"}, b"", hit.elapsed
+        return hit.status, dict(hit.headers), hit.content, hit.elapsed
+
+
+# ----------------------------
+# Transports (requests adapters)
+# ----------------------------
+
+class RecordingAdapter(BaseAdapter):
+    def __init__(self, inner: BaseAdapter, cassette: Cassette):
+        super().__init__()
+        self.inner, self.cassette = inner, cassette
+
+    def send(self, request, **kwargs):
+        t0 = time.perf_counter()
+        r = self.inner.send(request, **kwargs)
+        content = r.content  # read here so the latency covers the whole body (r.elapsed isn't set yet)
+        self.cassette.record(
+            request.method, urlsplit(request.url).path, request.body,
+            r.status_code, r.headers, content, time.perf_counter() - t0,
+        )
+        return r
+
+    def close(self) -> None:
+        self.inner.close()
+        self.cassette.save()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    - speed: multiplier on recorded latencies (1.0 = as recorded, 0 = no delay)
+    - latency: fixed per-response delay in seconds instead of the recorded ones
+    """
+
+    def __init__(self, cassette: Cassette, *, speed: float = 1.0, latency: Optional[float] = None):
+        super().__init__()
+        self.cassette, self.speed, self.latency = cassette, speed, latency
+
+    def send(self, request, **kwargs):
+        path = urlsplit(request.url).path
+        answer = self.cassette.respond(request.method, path, request.headers, request.body)
+        if answer is None:
+            raise CassetteMiss(f"{request.method} {path} is not in cassette {self.cassette.path.name}", request=request)
+        status, headers, content, elapsed = answer
+        delay = self.latency if self.latency is not None else elapsed * self.speed
+        if delay > 0:
+            time.sleep(delay)
+
+        resp = requests.Response()
+        resp.status_code = status
+        resp.reason = http.client.responses.get(status, "")
+        resp.headers = CaseInsensitiveDict(headers)
+        resp._content = content
+        resp._content_consumed = True
+        resp.encoding = "utf-8"
+        resp.url = request.url
+        resp.request = request
+        resp.elapsed = timedelta(seconds=delay)
+        return resp
+
+    def close(self) -> None:
+        pass
+
+
+class Recorder:
+    """transport= factory: wrap the client's real adapter and record through it."""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+
+    def __call__(self, inner: BaseAdapter) -> BaseAdapter:
+        return RecordingAdapter(inner, self.cassette)
+
+
+class Replayer:
+    """transport= factory: answer every call from the cassette (the real adapter is unused)."""
+
+    def __init__(self, cassette: Cassette, *, speed: float = 1.0, latency: Optional[float] = None):
+        self.cassette, self.speed, self.latency = cassette, speed, latency
+
+    def __call__(self, inner: BaseAdapter) -> BaseAdapter:
+        return ReplayAdapter(self.cassette, speed=self.speed, latency=self.latency)
+
+
+class CassetteApi:
+    """Cassette playback for mcmaster_stub.serve() (same handle() interface as StubApi)."""
+
+    def __init__(self, cassette: Cassette, *, speed: float = 1.0):
+        self.cassette, self.speed = cassette, speed
+
+    def handle(self, method: str, path: str, headers: dict[str, str], body: bytes):
+        answer = self.cassette.respond(method, urlsplit(path).path, headers, body)
+        if answer is None:
+            return 404, {"Content-Type": "application/json"}, b'{"ErrorMessage": "Not in cassette"}'
+        status, hdrs, content, elapsed = answer
+        if elapsed * self.speed > 0:
+            time.sleep(elapsed * self.speed)
+        return status, hdrs, content
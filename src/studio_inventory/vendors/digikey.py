@@ -3,7 +3,8 @@ from __future__ import annotations
 import re
 from typing import Optional
 
-import pdfplumber
+from studio_inventory.pdf_text import all_text, first_page_text
+from studio_inventory.vendors.rules import FieldRule, RuleSet, as_money
 
 
 # -------------------------------------------------
@@ -11,8 +12,11 @@ import pdfplumber
 # -------------------------------------------------
 
 def detect(pdf_path: str) -> bool:
-    with pdfplumber.open(pdf_path) as pdf:
-        txt = (pdf.pages[0].extract_text() or "").upper()
+    return detect_text(first_page_text(pdf_path, vendor="digikey"))
+
+
+def detect_text(text: str) -> bool:
+    txt = text.upper()
     return ("DIGI-KEY ELECTRONICS" in txt) or ("DIGIKEY" in txt and "PO ACKNOWLEDGEMENT" in txt)
 
 
@@ -20,21 +24,27 @@ def detect(pdf_path: str) -> bool:
 # Order-level parsing
 # -------------------------------------------------
 
-def parse_order(pdf_path: str, debug: bool = False) -> dict:
-    text = _all_text(pdf_path)
-
-    po_ack = _find(r"PO\s*Acknowledgement\s*([0-9]+)", text)
-    web_id = _find(r"WEB\s*ORDER\s*ID:\s*([0-9]+)", text)
+_MONEY = r"\s*([0-9]+(?:,[0-9]{3})*\.[0-9]{2})"
 
+ORDER_RULES = RuleSet("digikey", [
+    FieldRule("po_ack", r"PO\s*Acknowledgement\s*([0-9]+)"),
+    FieldRule("web_id", r"WEB\s*ORDER\s*ID:\s*([0-9]+)"),
     # "Order Date:" sometimes exists; otherwise the header uses e.g. 01-SEP-2025
-    order_date = _find(r"Order\s*Date:\s*([0-9A-Z\-]+)", text)
-    if not order_date:
-        order_date = _find(r"\b([0-9]{2}-[A-Z]{3}-[0-9]{4})\b", text)
+    FieldRule("order_date", r"Order\s*Date:\s*([0-9A-Z\-]+)"),
+    FieldRule("order_date", r"\b([0-9]{2}-[A-Z]{3}-[0-9]{4})\b"),
+    FieldRule("sales", r"Sales Amount" + _MONEY, as_money()),
+    FieldRule("shipping", r"Shipping charges applied" + _MONEY, as_money()),
+    FieldRule("tax", r"Sales Tax" + _MONEY, as_money()),
+    FieldRule("total", r"Total" + _MONEY, as_money()),
+])
 
-    sales = _money_after("Sales Amount", text)
-    shipping = _money_after("Shipping charges applied", text)
-    tax = _money_after("Sales Tax", text)
-    total = _money_after("Total", text)
+
+def parse_order(pdf_path: str, debug: bool = False) -> dict:
+    text = _all_text(pdf_path)
+
+    f = ORDER_RULES.scan(text)
+    po_ack, web_id, order_date = f["po_ack"], f["web_id"], f["order_date"]
+    sales, shipping, tax, total = f["sales"], f["shipping"], f["tax"], f["total"]
 
     if debug:
         print(f"[DIGIKEY] invoice(po_ack)={po_ack} web_order_id={web_id} date={order_date} sales={sales} ship={shipping} tax={tax} total={total}")
@@ -155,17 +165,4 @@ def parse_line_items(pdf_path: str, debug: bool = False) -> list[dict]:
 # -------------------------------------------------
 
 def _all_text(pdf_path: str) -> str:
-    with pdfplumber.open(pdf_path) as pdf:
-        return "\n".join(page.extract_text() or "" for page in pdf.pages)
-
-
-def _find(pattern: str, text: str) -> Optional[str]:
-    m = re.search(pattern, text, re.I)
-    return m.group(1).strip() if m else None
-
-
-def _money_after(label: str, text: str) -> Optional[float]:
-    m = re.search(label + r"\s*([0-9]+(?:,[0-9]{3})*\.[0-9]{2})", text, re.I)
-    if not m:
-        return None
-    return float(m.group(1).replace(",", ""))
+    return all_text(pdf_path, vendor="digikey")
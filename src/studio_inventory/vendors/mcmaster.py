@@ -1,20 +1,20 @@
 from __future__ import annotations
 
 from typing import List, Dict, Any
-import pdfplumber
 
+from studio_inventory.pdf_text import first_page_text
 from studio_inventory.Read_Order_Details import extract_order_info_by_page
 from studio_inventory.Read_Line_Items import parse_receipt
 
 
 def detect(pdf_path: str) -> bool:
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            t0 = (pdf.pages[0].extract_text() or "").lower()
-        # cheap but effective
-        return ("mcmaster" in t0) or ("mcmaster.com" in t0)
-    except Exception:
-        return False
+    return detect_text(first_page_text(pdf_path, vendor="mcmaster"))
+
+
+def detect_text(text: str) -> bool:
+    t0 = text.lower()
+    # cheap but effective
+    return ("mcmaster" in t0) or ("mcmaster.com" in t0)
 
 
 def parse_order(pdf_path: str, debug: bool = False) -> Dict[str, Any]:
@@ -1,21 +1,65 @@
+"""
+McMaster-Carr Product Information API client.
+
+One requests.Session per client with the PKCS#12 client certificate mounted as an adapter, so
+the TLS context is built once and connections are kept alive and pooled across calls (the
+module-level requests_pkcs12 helpers rebuild both on every request).
+
+The bearer token is cached in the workspace secrets/ folder with its expiry and reused by
+later processes; a 401 (expired or revoked token) logs in again and retries the call once.
+A client is safe to share between threads (logins are serialized).
+
+Pass guard=ApiGuard(...) (vendors.resilience) for rate limiting, retries with backoff, a
+circuit breaker and per-endpoint metrics.
+
+MCMASTER_API_BASE (or base_url=) points the client elsewhere, e.g. at the local stub in
+vendors.mcmaster_stub; plain http:// bases need no client certificate. transport= swaps the
+session's adapters, e.g. for recording calls to a cassette or replaying them offline
+(vendors.cassette).
+"""
 from __future__ import annotations
 
 import os
 import json
+import threading
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
 from pathlib import Path
 from dotenv import load_dotenv
-from requests_pkcs12 import post, put, get
+import requests
+from requests_pkcs12 import Pkcs12Adapter
+
+from studio_inventory.paths import secrets_dir
+from studio_inventory.vendors.resilience import ApiGuard, endpoint_key
 
 BASE = "https://api.mcmaster.com/v1"
 
+TIMEOUT = 30
+
+# Used when the login response carries no expiry
+DEFAULT_TOKEN_TTL = timedelta(hours=12)
+
+# Treat a cached token as expired this long before it really is
+TOKEN_MARGIN = timedelta(minutes=5)
+
+TOKEN_CACHE_NAME = "mcmaster_token.json"
+
 
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
 
+def _parse_utc(s: Any) -> Optional[datetime]:
+    if not s:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(s).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
 @dataclass
 class McMasterCreds:
     username: str
@@ -36,53 +80,183 @@ class McMasterCreds:
         )
 
 
+class TokenCache:
+    """Bearer token + expiry in a JSON file (mode 0600), keyed by API user name."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else secrets_dir() / TOKEN_CACHE_NAME
+
+    def load(self, username: str, base: str = BASE) -> Optional[str]:
+        try:
+            d = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(d, dict) or d.get("username") != username or d.get("base", BASE) != base or not d.get("token"):
+            return None
+        expires = _parse_utc(d.get("expires_utc"))
+        if expires is None or expires - TOKEN_MARGIN <= datetime.now(timezone.utc):
+            return None
+        return str(d["token"])
+
+    def save(self, username: str, token: str, expires: datetime, base: str = BASE) -> None:
+        d = {
+            "username": username,
+            "base": base,
+            "token": token,
+            "expires_utc": expires.astimezone(timezone.utc).replace(microsecond=0).isoformat(),
+            "saved_utc": utc_now_iso(),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(d, fh)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
 class McMasterClient:
-    def __init__(self, creds: McMasterCreds):
+    """
+    Usable as a context manager; close() releases the pooled connections.
+    - base_url: API root (default MCMASTER_API_BASE, else the live API)
+    - pool_size: keep-alive connections kept per host (size it to the number of threads sharing the client)
+    - token_cache: None for the default secrets/ file, False to keep the token in memory only
+    - guard: resilience layer every call goes through (None: plain calls, errors surface at once)
+    - transport: called with each mounted adapter, returns the adapter to use instead
+      (cassette.Recorder / cassette.Replayer)
+    """
+
+    def __init__(
+        self,
+        creds: McMasterCreds,
+        *,
+        base_url: Optional[str] = None,
+        pool_size: int = 10,
+        token_cache: TokenCache | bool | None = None,
+        guard: Optional[ApiGuard] = None,
+        transport: Optional[Callable[[requests.adapters.BaseAdapter], requests.adapters.BaseAdapter]] = None,
+    ):
         self.creds = creds
+        self.guard = guard
+        self.base = (base_url or os.environ.get("MCMASTER_API_BASE") or BASE).rstrip("/")
         self._token: Optional[str] = None
+        self._login_lock = threading.Lock()
+        if token_cache is None or token_cache is True:
+            token_cache = TokenCache()
+        self.token_cache: Optional[TokenCache] = token_cache or None
+
+        self.session = requests.Session()
+        self.session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        if creds.pfx_path:
+            self.session.mount(
+                "https://",
+                Pkcs12Adapter(
+                    pkcs12_filename=creds.pfx_path,
+                    pkcs12_password=creds.pfx_password,
+                    pool_connections=1,
+                    pool_maxsize=pool_size,
+                ),
+            )
+        if transport is not None:
+            for prefix, adapter in list(self.session.adapters.items()):
+                self.session.mount(prefix, transport(adapter))
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "McMasterClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _send(self, method: str, path: str, **kw) -> requests.Response:
+        url = f"{self.base}{path}"
+        if self.guard is None:
+            return self.session.request(method, url, **kw)
+        return self.guard.call(endpoint_key(method, path), lambda: self.session.request(method, url, **kw))
 
     # -------- Auth --------
     def login(self) -> None:
-        r = post(
-            f"{BASE}/login",
+        r = self._send(
+            "POST",
+            "/login",
             json={
                 "UserName": self.creds.username,
                 "Password": self.creds.password,
             },
-            pkcs12_filename=self.creds.pfx_path,
-            pkcs12_password=self.creds.pfx_password,
-            timeout=30,
+            timeout=TIMEOUT,
         )
         r.raise_for_status()
-        self._token = r.json()["AuthToken"]
+        d = r.json()
+        self._token = d["AuthToken"]
+        if self.token_cache is not None:
+            expires = _parse_utc(d.get("ExpirationTS")) or datetime.now(timezone.utc) + DEFAULT_TOKEN_TTL
+            self.token_cache.save(self.creds.username, self._token, expires, self.base)
 
     def headers(self) -> Dict[str, str]:
         if not self._token:
-            self.login()
+            with self._login_lock:
+                if not self._token and self.token_cache is not None:
+                    self._token = self.token_cache.load(self.creds.username, self.base)
+                if not self._token:
+                    self.login()
         return {"Authorization": f"Bearer {self._token}"}
 
+    def _relogin(self, stale: Optional[str]) -> None:
+        with self._login_lock:
+            if self._token != stale:
+                return  # another thread already replaced it
+            self._token = None
+            if self.token_cache is not None:
+                self.token_cache.clear()
+            self.login()
+
+    def _request(self, method: str, path: str, **kw) -> requests.Response:
+        """Authenticated call; on 401 the token is dropped, re-issued and the call retried once."""
+        kw.setdefault("timeout", TIMEOUT)
+        extra = kw.pop("extra_headers", None) or {}
+        headers = self.headers()
+        r = self._send(method, path, headers={**headers, **extra}, **kw)
+        if r.status_code == 401:
+            r.close()
+            self._relogin(headers["Authorization"].removeprefix("Bearer "))
+            r = self._send(method, path, headers={**self.headers(), **extra}, **kw)
+        return r
+
     # -------- API calls --------
     def add_product(self, part_number: str) -> None:
         # Required subscription step
-        r = put(
-            f"{BASE}/products",
-            headers=self.headers(),
-            json={"PartNumber": part_number},
-            pkcs12_filename=self.creds.pfx_path,
-            pkcs12_password=self.creds.pfx_password,
-            timeout=30,
-        )
+        r = self._request("PUT", "/products", json={"PartNumber": part_number})
         # 409 = already subscribed (fine)
         if r.status_code not in (200, 201, 409):
             r.raise_for_status()
 
     def product_info(self, part_number: str) -> Dict[str, Any]:
-        r = get(
-            f"{BASE}/products/{part_number}",
-            headers=self.headers(),
-            pkcs12_filename=self.creds.pfx_path,
-            pkcs12_password=self.creds.pfx_password,
-            timeout=30,
-        )
+        r = self._request("GET", f"/products/{part_number}")
         r.raise_for_status()
         return r.json()
+
+    def product_price(self, part_number: str) -> List[Dict[str, Any]]:
+        r = self._request("GET", f"/products/{part_number}/price")
+        r.raise_for_status()
+        return r.json()
+
+    def conditional_get(
+        self, path: str, *, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> requests.Response:
+        """
+        GET without raising for status. With a validator from an earlier response the server
+        may answer 304 Not Modified (no body), meaning the cached copy is still current.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return self._request("GET", path, extra_headers=headers)
@@ -0,0 +1,266 @@
+"""
+Bulk McMaster product enrichment.
+
+Every mcmaster:* part in parts_received is subscribed (add_product) and its product info
+fetched by a bounded thread pool sharing one McMasterClient (one pooled keep-alive session)
+and one ApiGuard, so throughput is set by the rate limit rather than by per-call latency. The
+guard's adaptive rate climbs until the API pushes back (429/503) and its retries and circuit
+breaker ride out transient failures, so one bad minute doesn't sink a long run.
+Results land in the product_info cache (vendors.product_cache), written from the calling
+thread in batches (one transaction per batch).
+
+A part is pending when it has no cache row, its last fetch failed, or its info has expired;
+expired entries are revalidated with their ETag/Last-Modified, so an unchanged product costs
+one 304 and no re-subscription. Known 404s are skipped until their negative TTL runs out.
+refresh=True re-fetches everything unconditionally.
+"""
+from __future__ import annotations
+
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Callable, Optional
+
+from studio_inventory.vendors.product_cache import (
+    DEFAULT_TTLS,
+    CacheTtls,
+    Fetch,
+    ensure_product_info_schema,
+    fetch_info,
+    fetch_prices,
+    store,
+    utc_now_iso,
+)
+
+if TYPE_CHECKING:
+    from studio_inventory.vendors.mcmaster_api import McMasterClient
+
+VENDOR = "mcmaster"
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 10.0  # starting API calls per second (two per new part, one per revalidation)
+DEFAULT_BATCH = 200
+
+
+def part_number_for(part_key: str, sku: Optional[str]) -> str:
+    pn = (sku or "").strip() or part_key.split(":", 1)[-1]
+    return pn.strip().upper()
+
+
+@dataclass(frozen=True)
+class Pending:
+    part_key: str
+    part_number: str
+    subscribed: bool = False             # has cached info, so add_product already happened
+    etag: Optional[str] = None           # validators for revalidating cached info
+    last_modified: Optional[str] = None
+    info_due: bool = True
+    prices_due: bool = True
+    prices_etag: Optional[str] = None
+    prices_last_modified: Optional[str] = None
+
+
+def pending_parts(
+    conn: sqlite3.Connection,
+    *,
+    refresh: bool = False,
+    prices: bool = False,
+    limit: Optional[int] = None,
+) -> list[Pending]:
+    """mcmaster parts whose cached info (or, with prices=True, price tiers) is missing or expired."""
+    ensure_product_info_schema(conn)
+    rows = conn.execute("""
+        SELECT part_key, sku
+        FROM parts_received
+        WHERE part_key LIKE 'mcmaster:%'
+        ORDER BY part_key;
+    """).fetchall()
+    cached = {
+        r[0]: r[1:]
+        for r in conn.execute("""
+            SELECT part_number, status, info_json IS NOT NULL, info_expires_utc,
+                   info_etag, info_last_modified, prices_expires_utc,
+                   prices_json IS NOT NULL, prices_etag, prices_last_modified
+            FROM product_info WHERE vendor = ?;
+        """, (VENDOR,)).fetchall()
+    }
+    now = utc_now_iso()
+
+    out: dict[str, Pending] = {}
+    for part_key, sku in rows:
+        pn = part_number_for(part_key, sku)
+        if not pn or pn in out:
+            continue
+        c = cached.get(pn)
+        if c is None:
+            out[pn] = Pending(part_key, pn)
+            continue
+        status, has_info, info_exp, etag, last_modified, prices_exp, has_prices, prices_etag, prices_lm = c
+        good = status == "ok" and bool(has_info)
+        info_due = refresh or status == "error" or not info_exp or info_exp <= now
+        prices_due = prices and status != "not_found" and (refresh or not prices_exp or prices_exp <= now)
+        if info_due or prices_due:
+            revalidate = good and info_due and not refresh
+            revalidate_prices = has_prices and prices_due and not refresh
+            out[pn] = Pending(
+                part_key, pn,
+                subscribed=good,
+                etag=etag if revalidate else None,
+                last_modified=last_modified if revalidate else None,
+                info_due=info_due,
+                prices_due=prices_due,
+                prices_etag=prices_etag if revalidate_prices else None,
+                prices_last_modified=prices_lm if revalidate_prices else None,
+            )
+    todo = list(out.values())
+    return todo[:limit] if limit else todo
+
+
+@dataclass
+class EnrichResult:
+    part_key: str
+    part_number: str
+    status: str  # ok | not_modified | not_found | error (of the info fetch; "ok" when only prices were due)
+    fetches: list[Fetch] = field(default_factory=list)
+    error: str = ""
+    seconds: float = 0.0
+
+
+@dataclass
+class EnrichStats:
+    total: int = 0
+    ok: int = 0
+    unchanged: int = 0
+    not_found: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    error_samples: list[str] = field(default_factory=list)
+    final_rate: Optional[float] = None
+    circuit_opened: int = 0
+    paused_s: float = 0.0
+    endpoints: list[dict] = field(default_factory=list)  # ApiMetrics.snapshot()
+
+    @property
+    def per_second(self) -> float:
+        return self.total / self.seconds if self.seconds else 0.0
+
+
+def _write_results(conn: sqlite3.Connection, results: list[EnrichResult], ttls: CacheTtls) -> None:
+    now = datetime.now(timezone.utc)
+    for r in results:
+        for f in r.fetches:
+            store(conn, r.part_number, r.part_key, f, vendor=VENDOR, ttls=ttls, now=now)
+    conn.commit()
+
+
+# ----------------------------
+# Workers
+# ----------------------------
+
+def enrich_one(client: McMasterClient, p: Pending, *, prices: bool = False) -> EnrichResult:
+    """Fetch one part (runs on a pool thread; HTTP/network errors are returned, not raised)."""
+    t0 = time.perf_counter()
+    fetches: list[Fetch] = []
+    status = "ok"
+    if p.info_due:
+        f = fetch_info(
+            client, p.part_number,
+            etag=p.etag, last_modified=p.last_modified,
+            subscribe=not p.subscribed,
+        )
+        fetches.append(f)
+        status = f.status
+    if prices and p.prices_due and status in ("ok", "not_modified"):
+        fetches.append(fetch_prices(
+            client, p.part_number,
+            etag=p.prices_etag, last_modified=p.prices_last_modified,
+        ))
+    error = "; ".join(f"{f.kind}: {f.error}" for f in fetches if f.status == "error")
+    return EnrichResult(p.part_key, p.part_number, status, fetches, error, time.perf_counter() - t0)
+
+
+def enrich_mcmaster(
+    conn: sqlite3.Connection,
+    client: McMasterClient,
+    *,
+    workers: int = DEFAULT_WORKERS,
+    rate: float = DEFAULT_RATE,
+    burst: Optional[float] = None,
+    max_rate: Optional[float] = None,
+    batch_size: int = DEFAULT_BATCH,
+    refresh: bool = False,
+    prices: bool = False,
+    limit: Optional[int] = None,
+    ttls: CacheTtls = DEFAULT_TTLS,
+    progress: Optional[Callable[[EnrichResult], None]] = None,
+) -> EnrichStats:
+    """
+    Enrich pending mcmaster parts into product_info.
+    - workers: pool threads (size the client's pool_size to match)
+    - rate/burst/max_rate: starting API calls per second across all workers, how many may go back
+      to back, and the ceiling the adaptive rate may climb to (default 10x rate). Ignored when the
+      client already has a guard, which is then used as is.
+    - prices: also fetch price tiers (on their own, shorter TTL)
+    - progress: called on the calling thread with each result as it completes
+    """
+    from studio_inventory.vendors.resilience import ApiGuard  # pulls in requests; not needed to list pending parts
+
+    todo = pending_parts(conn, refresh=refresh, prices=prices, limit=limit)
+    stats = EnrichStats()
+    if not todo:
+        return stats
+
+    own_guard = client.guard is None
+    if own_guard:
+        client.guard = ApiGuard.adaptive(rate, burst, max_rate)
+    guard = client.guard
+    workers = max(1, int(workers))
+    max_in_flight = workers * 2  # keeps the pool fed without queueing thousands of futures
+    batch: list[EnrichResult] = []
+    t0 = time.perf_counter()
+
+    def collect(fut: Future) -> None:
+        r: EnrichResult = fut.result()
+        stats.total += 1
+        if r.status == "not_modified":
+            stats.unchanged += 1
+        elif r.status == "not_found":
+            stats.not_found += 1
+        elif r.status == "ok" and not r.error:
+            stats.ok += 1
+        if r.error:
+            stats.errors += 1
+            if len(stats.error_samples) < 5:
+                stats.error_samples.append(f"{r.part_number}: {r.error}")
+        batch.append(r)
+        if len(batch) >= batch_size:
+            _write_results(conn, batch, ttls)
+            batch.clear()
+        if progress is not None:
+            progress(r)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mcmaster") as pool:
+            in_flight: set[Future] = set()
+            for p in todo:
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        collect(fut)
+                in_flight.add(pool.submit(enrich_one, client, p, prices=prices))
+            for fut in wait(in_flight).done:
+                collect(fut)
+    finally:
+        # an interrupted run keeps what it already fetched
+        if batch:
+            _write_results(conn, batch, ttls)
+        if own_guard:
+            client.guard = None
+    stats.seconds = time.perf_counter() - t0
+    stats.final_rate = guard.rate
+    stats.circuit_opened = guard.breaker.opened
+    stats.paused_s = guard.breaker.paused_s
+    stats.endpoints = guard.metrics.snapshot()
+    return stats
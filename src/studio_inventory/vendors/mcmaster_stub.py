@@ -0,0 +1,325 @@
+"""
+Local stand-in for the McMaster-Carr Product Information API.
+
+Serves the endpoints McMasterClient uses (login, product subscription, product info and
+price) over plain HTTP with synthetic but deterministic data, so enrichment can be developed
+and timed offline:
+
+    python -m studio_inventory.vendors.mcmaster_stub --port 8765 --latency 0.05
+    MCMASTER_API_BASE=http://127.0.0.1:8765/v1 studio-inventory enrich
+
+Part numbers that don't look like McMaster numbers (digits, letter(s), digits, e.g.
+91290A115) are 404s. Like the real API, products must be subscribed (PUT /products) before
+GET /products/{pn} returns them (403 otherwise). Product and price responses carry an ETag
+and Last-Modified and answer conditional requests with 304.
+
+StubApi.handle() is a plain function of (method, path, headers, body), kept separate from
+the HTTP server so it can be wrapped or driven directly. FaultyApi wraps it to inject the
+failures the client's resilience layer has to ride out (random 5xx, a server-side rate limit
+answering 429 + Retry-After, periodic outages, slow responses):
+
+    python -m studio_inventory.vendors.mcmaster_stub --rate-limit 40 --error-rate 0.02 \
+        --outage-every 30 --outage-for 3
+
+--cassette serves responses recorded from the real API (vendors.cassette) instead of
+synthetic ones, at their recorded latencies scaled by --speed; the fault options apply on top.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import Counter
+from typing import Optional, Protocol
+
+PART_NUMBER_RE = re.compile(r"^\d{2,6}[A-Z]{1,2}\d{1,6}(-[A-Z0-9]+)?$")
+
+_MATERIALS = ["18-8 Stainless Steel", "Zinc-Plated Steel", "Black-Oxide Alloy Steel", "Brass", "Nylon", "Aluminum"]
+_FAMILIES = ["Socket Head Screw", "Hex Nut", "Flat Washer", "Shoulder Screw", "Standoff", "Set Screw"]
+
+Response = tuple[int, dict[str, str], bytes]
+
+
+# Every synthetic product "last changed" at the same moment
+LAST_MODIFIED = "Mon, 05 Jan 2026 12:00:00 GMT"
+
+
+def _json(status: int, obj) -> Response:
+    return status, {"Content-Type": "application/json"}, json.dumps(obj).encode("utf-8")
+
+
+def _cacheable(obj, headers: dict[str, str]) -> Response:
+    """200 with validators, or 304 when the request's validators still match."""
+    body = json.dumps(obj, sort_keys=True).encode("utf-8")
+    etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+    validators = {"ETag": etag, "Last-Modified": LAST_MODIFIED}
+    inm = headers.get("If-None-Match")
+    if (inm and etag in [t.strip() for t in inm.split(",")]) or (not inm and headers.get("If-Modified-Since") == LAST_MODIFIED):
+        return 304, validators, b""
+    return 200, {"Content-Type": "application/json", **validators}, body
+
+
+def synthetic_product(pn: str) -> dict:
+    """Product info shaped like the API's response, derived from a hash of the part number."""
+    h = int.from_bytes(hashlib.blake2b(pn.encode("utf-8"), digest_size=8).digest(), "big")
+    family = _FAMILIES[h % len(_FAMILIES)]
+    material = _MATERIALS[(h >> 8) % len(_MATERIALS)]
+    length = 4 + (h >> 16) % 60
+    return {
+        "PartNumber": pn,
+        "DetailDescription": f"{family}, {material}, M{3 + (h >> 24) % 6} x {length} mm",
+        "FamilyDescription": f"{material} {family}s",
+        "ProductCategory": "Fasteners",
+        "ProductStatus": "Active",
+        "Specifications": [
+            {"Attribute": "Material", "Values": [material]},
+            {"Attribute": "Length", "Values": [f"{length} mm"]},
+            {"Attribute": "Thread Type", "Values": ["Metric"]},
+        ],
+        "Links": [
+            {"Key": "Price", "Value": f"/v1/products/{pn}/price"},
+            {"Key": "ProductDetail", "Value": f"https://www.mcmaster.com/{pn}/"},
+        ],
+    }
+
+
+def synthetic_price(pn: str) -> list[dict]:
+    h = int.from_bytes(hashlib.blake2b(pn.encode("utf-8"), digest_size=8).digest(), "big")
+    unit = round(0.05 + (h % 2000) / 100.0, 2)
+    return [
+        {"Amount": unit, "MinimumQuantity": 1, "UnitOfMeasure": "Each"},
+        {"Amount": round(unit * 0.85, 2), "MinimumQuantity": 25, "UnitOfMeasure": "Each"},
+    ]
+
+
+class StubApi:
+    """
+    In-memory API state.
+    - latency: seconds added to every response (a crude stand-in for the network)
+    """
+
+    def __init__(self, latency: float = 0.0, token_ttl: timedelta = timedelta(hours=1)):
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self._tokens: set[str] = set()
+        self._subscribed: set[str] = set()
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def handle(self, method: str, path: str, headers: dict[str, str], body: bytes) -> Response:
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        path = path.split("?", 1)[0].rstrip("/")
+        if not path.startswith("/v1/"):
+            return _json(404, {"ErrorMessage": "Not found"})
+        parts = path[len("/v1/"):].split("/")
+
+        if method == "POST" and parts == ["login"]:
+            return self._login()
+
+        auth = headers.get("Authorization", "")
+        with self._lock:
+            ok = auth.startswith("Bearer ") and auth[len("Bearer "):] in self._tokens
+        if not ok:
+            return _json(401, {"ErrorMessage": "Authorization token is invalid or expired"})
+
+        if method == "PUT" and parts == ["products"]:
+            try:
+                pn = str(json.loads(body or b"{}")["PartNumber"]).strip().upper()
+            except (ValueError, KeyError, TypeError):
+                return _json(400, {"ErrorMessage": "PartNumber is required"})
+            if not PART_NUMBER_RE.match(pn):
+                return _json(404, {"ErrorMessage": f"Part number {pn} was not found"})
+            with self._lock:
+                if pn in self._subscribed:
+                    return _json(409, {"ErrorMessage": "Already subscribed"})
+                self._subscribed.add(pn)
+            return _json(201, {"PartNumber": pn})
+
+        if method == "GET" and len(parts) in (2, 3) and parts[0] == "products":
+            pn = parts[1].upper()
+            if not PART_NUMBER_RE.match(pn):
+                return _json(404, {"ErrorMessage": f"Part number {pn} was not found"})
+            with self._lock:
+                subscribed = pn in self._subscribed
+            if not subscribed:
+                return _json(403, {"ErrorMessage": "Product is not in your subscription"})
+            if len(parts) == 2:
+                return _cacheable(synthetic_product(pn), headers)
+            if parts[2] == "price":
+                return _cacheable(synthetic_price(pn), headers)
+
+        return _json(404, {"ErrorMessage": "Not found"})
+
+    def _login(self) -> Response:
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._tokens.add(token)
+        expires = datetime.now(timezone.utc) + self.token_ttl
+        return _json(200, {"AuthToken": token, "ExpirationTS": expires.replace(microsecond=0).isoformat()})
+
+
+class FaultyApi:
+    """
+    A StubApi (or any other handle() API) with injected faults (all off by default).
+    - error_rate: fraction of calls answered with a bare 503
+    - rate_limit: calls per second accepted; the rest get 429 with Retry-After
+    - outage_every/outage_for: every `outage_every` seconds the API is down (503 + Retry-After)
+      for `outage_for` seconds
+    - slow_rate/slow_s: fraction of calls delayed by an extra slow_s seconds
+    """
+
+    def __init__(
+        self,
+        api: Optional[_Api] = None,
+        *,
+        error_rate: float = 0.0,
+        rate_limit: Optional[float] = None,
+        outage_every: float = 0.0,
+        outage_for: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_s: float = 1.0,
+        seed: Optional[int] = None,
+    ):
+        self.api = api or StubApi()
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.outage_every = outage_every
+        self.outage_for = outage_for
+        self.slow_rate = slow_rate
+        self.slow_s = slow_s
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._t0 = time.monotonic()
+        self._window = -1
+        self._window_calls = 0
+        self.injected: Counter = Counter()
+
+    def _inject(self, kind: str, status: int, retry_after: Optional[float] = None) -> Response:
+        self.injected[kind] += 1
+        headers = {"Content-Type": "application/json"}
+        if retry_after is not None:
+            headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return status, headers, json.dumps({"ErrorMessage": f"injected {kind}"}).encode("utf-8")
+
+    def handle(self, method: str, path: str, headers: dict[str, str], body: bytes) -> Response:
+        with self._lock:
+            now = time.monotonic() - self._t0
+            if self.outage_every and self.outage_for:
+                into = now % self.outage_every
+                if into >= self.outage_every - self.outage_for:
+                    return self._inject("outage", 503, self.outage_every - into)
+            if self.rate_limit:
+                window = int(now)
+                if window != self._window:
+                    self._window, self._window_calls = window, 0
+                self._window_calls += 1
+                if self._window_calls > self.rate_limit:
+                    return self._inject("rate_limit", 429, window + 1 - now)
+            roll, slow = self._rng.random(), self._rng.random() < self.slow_rate
+        if roll < self.error_rate:
+            return self._inject("error", 503)
+        if slow:
+            self.injected["slow"] += 1
+            time.sleep(self.slow_s)
+        return self.api.handle(method, path, headers, body)
+
+
+class _Api(Protocol):
+    def handle(self, method: str, path: str, headers: dict[str, str], body: bytes) -> Response: ...
+
+
+def _handler_for(api: _Api) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def _dispatch(self) -> None:
+            n = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(n) if n else b""
+            status, headers, payload = api.handle(self.command, self.path, dict(self.headers.items()), body)
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_PUT = do_POST = _dispatch
+
+    return Handler
+
+
+def serve(api: Optional[_Api] = None, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """
+    Start the stub on a daemon thread and return the server (port 0 picks a free port).
+    The API root is f"http://{host}:{server.server_address[1]}/v1"; call shutdown() when done.
+    """
+    server = ThreadingHTTPServer((host, port), _handler_for(api or StubApi()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Local McMaster API stub")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds added to each response")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered 503")
+    ap.add_argument("--rate-limit", type=float, default=None, help="calls/s accepted before 429 + Retry-After")
+    ap.add_argument("--outage-every", type=float, default=0.0, help="seconds between simulated outages")
+    ap.add_argument("--outage-for", type=float, default=0.0, help="length of each outage in seconds")
+    ap.add_argument("--slow-rate", type=float, default=0.0, help="fraction of calls delayed by --slow-s")
+    ap.add_argument("--slow-s", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--cassette", default=None, help="serve a recorded cassette instead of synthetic data")
+    ap.add_argument("--speed", type=float, default=1.0, help="multiplier on cassette latencies (0: none)")
+    args = ap.parse_args(argv)
+
+    api: _Api
+    if args.cassette:
+        from studio_inventory.vendors.cassette import Cassette, CassetteApi
+
+        api = CassetteApi(Cassette.load(args.cassette), speed=args.speed)
+    else:
+        api = StubApi(latency=args.latency)
+    if args.error_rate or args.rate_limit or (args.outage_every and args.outage_for) or args.slow_rate:
+        api = FaultyApi(
+            api,
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+            outage_every=args.outage_every,
+            outage_for=args.outage_for,
+            slow_rate=args.slow_rate,
+            slow_s=args.slow_s,
+            seed=args.seed,
+        )
+    server = ThreadingHTTPServer((args.host, args.port), _handler_for(api))
+    server.daemon_threads = True
+    print(f"McMaster API stub on http://{args.host}:{server.server_address[1]}/v1 (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
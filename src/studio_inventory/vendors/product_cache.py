@@ -0,0 +1,414 @@
+"""
+Read-through vendor product-info cache (SQLite table product_info).
+
+One row per (vendor, part_number) holds the raw API JSON plus the fields the app actually
+reads (description, family, specs, price tiers), so labels and lookups never wait on the
+network. Each group of fields has its own TTL: product info changes rarely, prices more
+often, and a 404 is remembered (negative caching) so unknown part numbers aren't re-asked on
+every run.
+
+When a field group expires it is revalidated with If-None-Match / If-Modified-Since from the
+last response; a 304 only pushes the expiry out. A failed refresh keeps serving the last good
+copy. Network fetches (fetch_info/fetch_prices) are kept apart from the SQLite writes (store),
+so a thread pool can fetch while one thread writes, as vendors.mcmaster_enrich does.
+
+    cache = ProductInfoCache(conn, client)        # read-through
+    rec = cache.get("91290A115", prices=True)
+    rec = cached_product(conn, "mcmaster:91290A115")  # local only, never touches the network
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    import requests
+
+    from studio_inventory.vendors.mcmaster_api import McMasterClient
+
+VENDOR = "mcmaster"
+
+
+@dataclass(frozen=True)
+class CacheTtls:
+    info: timedelta = timedelta(days=30)      # description, family, specs, raw JSON
+    prices: timedelta = timedelta(days=1)
+    not_found: timedelta = timedelta(days=7)  # how long a 404 is believed
+
+
+DEFAULT_TTLS = CacheTtls()
+
+# Added to product_info tables created before the cache existed
+_CACHE_COLUMNS = {
+    "description": "TEXT",
+    "family": "TEXT",
+    "specs_json": "TEXT",
+    "info_etag": "TEXT",
+    "info_last_modified": "TEXT",
+    "info_expires_utc": "TEXT",
+    "prices_json": "TEXT",
+    "prices_etag": "TEXT",
+    "prices_last_modified": "TEXT",
+    "prices_fetched_utc": "TEXT",
+    "prices_expires_utc": "TEXT",
+}
+
+
+def utc_now_iso(now: Optional[datetime] = None) -> str:
+    return (now or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(microsecond=0).isoformat()
+
+
+# ----------------------------
+# SQLite
+# ----------------------------
+
+def ensure_product_info_schema(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS product_info (
+            vendor TEXT NOT NULL,
+            part_number TEXT NOT NULL,
+            part_key TEXT,
+            status TEXT NOT NULL,          -- ok | not_found | error
+            http_status INTEGER,
+            info_json TEXT,
+            error TEXT,
+            fetched_utc TEXT,
+            PRIMARY KEY (vendor, part_number)
+        );
+    """)
+    have = {r[1] for r in conn.execute("PRAGMA table_info(product_info);").fetchall()}
+    for col, coltype in _CACHE_COLUMNS.items():
+        if col not in have:
+            conn.execute(f'ALTER TABLE product_info ADD COLUMN "{col}" {coltype};')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_product_info_part_key ON product_info(part_key);")
+
+
+# ----------------------------
+# Field extraction
+# ----------------------------
+
+def extract_info(info: dict) -> dict[str, Any]:
+    """description / family / specs ({attribute: [values]}) from a product-info response."""
+    specs: dict[str, list[str]] = {}
+    for s in info.get("Specifications") or []:
+        name = str(s.get("Attribute") or "").strip()
+        if name:
+            specs[name] = [str(v) for v in (s.get("Values") or [])]
+    return {
+        "description": str(info.get("DetailDescription") or "").strip(),
+        "family": str(info.get("FamilyDescription") or "").strip(),
+        "specs": specs,
+    }
+
+
+def extract_prices(prices: Any) -> list[dict[str, Any]]:
+    """Price tiers as [{"min_qty", "amount", "uom"}], lowest quantity first."""
+    tiers = []
+    for p in prices if isinstance(prices, list) else []:
+        try:
+            tiers.append({
+                "min_qty": int(p.get("MinimumQuantity") or 1),
+                "amount": float(p["Amount"]),
+                "uom": str(p.get("UnitOfMeasure") or ""),
+            })
+        except (KeyError, TypeError, ValueError):
+            continue
+    return sorted(tiers, key=lambda t: t["min_qty"])
+
+
+# ----------------------------
+# Network (thread-safe; no SQLite)
+# ----------------------------
+
+@dataclass
+class Fetch:
+    kind: str                    # info | prices
+    status: str                  # ok | not_modified | not_found | error
+    http_status: Optional[int] = None
+    body: Any = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    error: str = ""
+
+
+def _to_fetch(kind: str, r: requests.Response) -> Fetch:
+    etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+    if r.status_code == 304:
+        return Fetch(kind, "not_modified", 304, etag=etag, last_modified=last_modified)
+    if r.status_code == 404:
+        return Fetch(kind, "not_found", 404)
+    if r.status_code != 200:
+        return Fetch(kind, "error", r.status_code, error=f"{r.status_code} {r.reason}")
+    try:
+        body = r.json()
+    except ValueError as e:
+        return Fetch(kind, "error", 200, error=f"invalid JSON: {e}")
+    return Fetch(kind, "ok", 200, body=body, etag=etag, last_modified=last_modified)
+
+
+def fetch_info(
+    client: McMasterClient,
+    part_number: str,
+    *,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    subscribe: bool = False,
+) -> Fetch:
+    """
+    Product info for one part. subscribe=True runs the add_product step first (needed once per
+    part); a 403 "not subscribed" answer also triggers it.
+    """
+    import requests  # loaded by the client already; kept out of module scope for cached-only readers
+
+    try:
+        if subscribe:
+            client.add_product(part_number)
+        r = client.conditional_get(f"/products/{part_number}", etag=etag, last_modified=last_modified)
+        if r.status_code == 403 and not subscribe:
+            client.add_product(part_number)
+            r = client.conditional_get(f"/products/{part_number}", etag=etag, last_modified=last_modified)
+        return _to_fetch("info", r)
+    except requests.HTTPError as e:  # from add_product
+        code = e.response.status_code if e.response is not None else None
+        return Fetch("info", "not_found" if code == 404 else "error", code, error="" if code == 404 else str(e))
+    except requests.RequestException as e:
+        return Fetch("info", "error", error=f"{type(e).__name__}: {e}")
+
+
+def fetch_prices(
+    client: McMasterClient,
+    part_number: str,
+    *,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> Fetch:
+    import requests
+
+    try:
+        r = client.conditional_get(f"/products/{part_number}/price", etag=etag, last_modified=last_modified)
+        return _to_fetch("prices", r)
+    except requests.RequestException as e:
+        return Fetch("prices", "error", error=f"{type(e).__name__}: {e}")
+
+
+# ----------------------------
+# Writes (caller commits)
+# ----------------------------
+
+def store(
+    conn: sqlite3.Connection,
+    part_number: str,
+    part_key: Optional[str],
+    f: Fetch,
+    *,
+    vendor: str = VENDOR,
+    ttls: CacheTtls = DEFAULT_TTLS,
+    now: Optional[datetime] = None,
+) -> None:
+    """Apply one fetch outcome to the cache row."""
+    now = now or datetime.now(timezone.utc)
+    ts = utc_now_iso(now)
+    key = (vendor, part_number)
+
+    if f.kind == "prices":
+        if f.status == "ok":
+            conn.execute("""
+                UPDATE product_info
+                SET prices_json = ?, prices_etag = ?, prices_last_modified = ?,
+                    prices_fetched_utc = ?, prices_expires_utc = ?
+                WHERE vendor = ? AND part_number = ?;
+            """, (json.dumps(extract_prices(f.body)), f.etag, f.last_modified, ts, utc_now_iso(now + ttls.prices), *key))
+        elif f.status in ("not_modified", "not_found"):
+            ttl = ttls.prices if f.status == "not_modified" else ttls.not_found
+            conn.execute("""
+                UPDATE product_info
+                SET prices_json = CASE WHEN ? THEN '[]' ELSE prices_json END,
+                    prices_fetched_utc = ?, prices_expires_utc = ?
+                WHERE vendor = ? AND part_number = ?;
+            """, (f.status == "not_found", ts, utc_now_iso(now + ttl), *key))
+        return  # errors: keep the stale tiers, retry next time
+
+    if f.status == "ok":
+        x = extract_info(f.body if isinstance(f.body, dict) else {})
+        conn.execute("""
+            INSERT INTO product_info(
+                vendor, part_number, part_key, status, http_status, info_json, error, fetched_utc,
+                description, family, specs_json, info_etag, info_last_modified, info_expires_utc
+            )
+            VALUES (?, ?, ?, 'ok', ?, ?, NULL, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(vendor, part_number) DO UPDATE SET
+                part_key = COALESCE(excluded.part_key, product_info.part_key),
+                status = 'ok', http_status = excluded.http_status, info_json = excluded.info_json,
+                error = NULL, fetched_utc = excluded.fetched_utc,
+                description = excluded.description, family = excluded.family, specs_json = excluded.specs_json,
+                info_etag = excluded.info_etag, info_last_modified = excluded.info_last_modified,
+                info_expires_utc = excluded.info_expires_utc;
+        """, (
+            *key, part_key, f.http_status, json.dumps(f.body, sort_keys=True), ts,
+            x["description"], x["family"], json.dumps(x["specs"]), f.etag, f.last_modified,
+            utc_now_iso(now + ttls.info),
+        ))
+    elif f.status == "not_modified":
+        conn.execute("""
+            UPDATE product_info
+            SET status = 'ok', http_status = 304, error = NULL, fetched_utc = ?, info_expires_utc = ?,
+                info_etag = COALESCE(?, info_etag), info_last_modified = COALESCE(?, info_last_modified)
+            WHERE vendor = ? AND part_number = ?;
+        """, (ts, utc_now_iso(now + ttls.info), f.etag, f.last_modified, *key))
+    elif f.status == "not_found":
+        conn.execute("""
+            INSERT INTO product_info(vendor, part_number, part_key, status, http_status, fetched_utc, info_expires_utc)
+            VALUES (?, ?, ?, 'not_found', 404, ?, ?)
+            ON CONFLICT(vendor, part_number) DO UPDATE SET
+                part_key = COALESCE(excluded.part_key, product_info.part_key),
+                status = 'not_found', http_status = 404, error = NULL,
+                fetched_utc = excluded.fetched_utc, info_expires_utc = excluded.info_expires_utc;
+        """, (*key, part_key, ts, utc_now_iso(now + ttls.not_found)))
+    else:
+        # a good copy stays 'ok' (and expired, so it's retried); otherwise the row records the error
+        conn.execute("""
+            INSERT INTO product_info(vendor, part_number, part_key, status, http_status, error, fetched_utc)
+            VALUES (?, ?, ?, 'error', ?, ?, ?)
+            ON CONFLICT(vendor, part_number) DO UPDATE SET
+                part_key = COALESCE(excluded.part_key, product_info.part_key),
+                status = CASE WHEN product_info.status = 'ok' THEN 'ok' ELSE 'error' END,
+                http_status = excluded.http_status, error = excluded.error;
+        """, (*key, part_key, f.http_status, f.error or "error", ts))
+
+
+# ----------------------------
+# Reads
+# ----------------------------
+
+@dataclass(frozen=True)
+class ProductRecord:
+    vendor: str
+    part_number: str
+    part_key: Optional[str]
+    status: str
+    description: str = ""
+    family: str = ""
+    specs: dict[str, list[str]] = field(default_factory=dict)
+    prices: Optional[list[dict[str, Any]]] = None  # None = never fetched
+    raw: Optional[dict[str, Any]] = None
+    fetched_utc: Optional[str] = None
+    info_expires_utc: Optional[str] = None
+    prices_expires_utc: Optional[str] = None
+    info_etag: Optional[str] = None
+    info_last_modified: Optional[str] = None
+    prices_etag: Optional[str] = None
+    prices_last_modified: Optional[str] = None
+
+    @property
+    def found(self) -> bool:
+        return self.raw is not None and self.status != "not_found"
+
+    def info_fresh(self, now: Optional[datetime] = None) -> bool:
+        return self.status in ("ok", "not_found") and bool(self.info_expires_utc) and self.info_expires_utc > utc_now_iso(now)
+
+    def prices_fresh(self, now: Optional[datetime] = None) -> bool:
+        return bool(self.prices_expires_utc) and self.prices_expires_utc > utc_now_iso(now)
+
+    def unit_price(self, qty: int = 1) -> Optional[float]:
+        """Price per unit at qty (the best tier whose minimum qty is met)."""
+        tiers = [t for t in (self.prices or []) if t["min_qty"] <= max(1, qty)]
+        return tiers[-1]["amount"] if tiers else None
+
+
+_RECORD_SQL = """
+    SELECT vendor, part_number, part_key, status, description, family, specs_json, prices_json, info_json,
+           fetched_utc, info_expires_utc, prices_expires_utc,
+           info_etag, info_last_modified, prices_etag, prices_last_modified
+    FROM product_info
+"""
+
+
+def _record(row) -> ProductRecord:
+    (vendor, pn, part_key, status, description, family, specs_json, prices_json, info_json,
+     fetched, info_exp, prices_exp, info_etag, info_lm, prices_etag, prices_lm) = row
+    return ProductRecord(
+        vendor=vendor,
+        part_number=pn,
+        part_key=part_key,
+        status=status,
+        description=description or "",
+        family=family or "",
+        specs=json.loads(specs_json) if specs_json else {},
+        prices=json.loads(prices_json) if prices_json else None,
+        raw=json.loads(info_json) if info_json else None,
+        fetched_utc=fetched,
+        info_expires_utc=info_exp,
+        prices_expires_utc=prices_exp,
+        info_etag=info_etag,
+        info_last_modified=info_lm,
+        prices_etag=prices_etag,
+        prices_last_modified=prices_lm,
+    )
+
+
+def cached_product(conn: sqlite3.Connection, ident: str, vendor: str = VENDOR) -> Optional[ProductRecord]:
+    """Cached record by part number or part_key, possibly stale; never touches the network."""
+    ensure_product_info_schema(conn)
+    row = conn.execute(_RECORD_SQL + " WHERE vendor = ? AND (part_number = ? OR part_key = ?);",
+                       (vendor, ident.strip().upper(), ident.strip())).fetchone()
+    return _record(row) if row else None
+
+
+class ProductInfoCache:
+    """
+    Read-through cache over product_info. Without a client it is read-only (stale entries
+    are returned as they are).
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        client: Optional[McMasterClient] = None,
+        *,
+        vendor: str = VENDOR,
+        ttls: CacheTtls = DEFAULT_TTLS,
+    ):
+        self.conn, self.client, self.vendor, self.ttls = conn, client, vendor, ttls
+        ensure_product_info_schema(conn)
+
+    def lookup(self, part_number: str) -> Optional[ProductRecord]:
+        row = self.conn.execute(_RECORD_SQL + " WHERE vendor = ? AND part_number = ?;",
+                                (self.vendor, part_number.strip().upper())).fetchone()
+        return _record(row) if row else None
+
+    def get(self, part_number: str, *, prices: bool = False, part_key: Optional[str] = None) -> Optional[ProductRecord]:
+        """
+        The product (None if it's unknown to the API, or nothing could be fetched). Expired
+        field groups are revalidated first; if that fails the stale copy is returned.
+        """
+        pn = part_number.strip().upper()
+        rec = self.lookup(pn)
+        if self.client is not None:
+            now = datetime.now(timezone.utc)
+            wrote = False
+            if rec is None or not rec.info_fresh(now):
+                good = rec is not None and rec.raw is not None and rec.status == "ok"
+                f = fetch_info(
+                    self.client, pn,
+                    etag=rec.info_etag if good else None,
+                    last_modified=rec.info_last_modified if good else None,
+                    subscribe=not good,
+                )
+                store(self.conn, pn, part_key, f, vendor=self.vendor, ttls=self.ttls, now=now)
+                wrote = True
+            rec2 = self.lookup(pn) if wrote else rec
+            if prices and rec2 is not None and rec2.found and not rec2.prices_fresh(now):
+                f = fetch_prices(
+                    self.client, pn,
+                    etag=rec2.prices_etag if rec2.prices is not None else None,
+                    last_modified=rec2.prices_last_modified if rec2.prices is not None else None,
+                )
+                store(self.conn, pn, part_key, f, vendor=self.vendor, ttls=self.ttls, now=now)
+                wrote = True
+            if wrote:
+                self.conn.commit()
+                rec = self.lookup(pn)
+        return rec if rec is not None and rec.found else None
@@ -0,0 +1,104 @@
+"""
+Client-side rate limiting for vendor APIs.
+
+TokenBucket is shared by every worker thread of a job: each call takes one token, tokens refill
+at `rate` per second up to `burst`, and a caller that finds the bucket empty reserves its token
+and sleeps (outside the lock) until it is due, so waiting threads are served in arrival order.
+
+AdaptiveRate wraps a bucket with AIMD control: every accepted call nudges the rate up
+(about +increase calls/s per second of traffic; default a tenth of the starting rate) and a
+throttling answer (429) cuts it by `decrease`, at most once per second so one burst of
+rejections counts as one signal. A long job settles just under whatever rate the API is
+currently willing to accept.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive (got {rate})")
+        self.rate = float(rate)
+        self.burst = float(burst) if burst is not None else max(1.0, self.rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._stamp = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, n: float = 1.0) -> float:
+        """Take n tokens, blocking until they're available. Returns the seconds waited."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= n  # may go negative: that's this caller's place in the queue
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def set_rate(self, rate: float) -> None:
+        """Change the refill rate; tokens already accrued are kept."""
+        if rate <= 0:
+            raise ValueError(f"rate must be positive (got {rate})")
+        with self._lock:
+            self._refill(self._clock())
+            self.rate = float(rate)
+
+
+class AdaptiveRate:
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        *,
+        min_rate: float = 1.0,
+        max_rate: Optional[float] = None,
+        increase: Optional[float] = None,
+        decrease: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.bucket = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate * 10
+        self.increase = increase if increase is not None else max(1.0, rate / 10)
+        self.decrease = decrease
+        self._clock = clock
+        self._last_cut = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def acquire(self, n: float = 1.0) -> float:
+        return self.bucket.acquire(n)
+
+    def on_success(self) -> None:
+        with self._lock:
+            rate = self.bucket.rate
+            if rate < self.max_rate:
+                self.bucket.set_rate(min(self.max_rate, rate + self.increase / rate))
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            now = self._clock()
+            if now - self._last_cut < 1.0:
+                return
+            self._last_cut = now
+            self.bucket.set_rate(max(self.min_rate, self.bucket.rate * self.decrease))
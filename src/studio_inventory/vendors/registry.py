@@ -1,21 +1,149 @@
+"""
+Vendor receipt parser registry.
+
+Parsers are described by ParserSpecs: a name, the module that implements them, a version,
+what they can parse, and cheap detection signatures (lowercase substrings of the first
+page's text). pick_parser() extracts page 1 once, and only parsers whose signatures match are
+imported and asked to confirm, so a receipt costs one PDF open and one parser import instead
+of opening the PDF in every parser.
+
+Besides the built-in parsers, any installed distribution can add (or replace, by name)
+parsers through the "studio_inventory.parsers" entry point group. The entry point should
+name a ParserSpec, or a function returning one, in a module that is cheap to import; the
+parser itself goes in ParserSpec.module and is only imported on a match:
+
+    [project.entry-points."studio_inventory.parsers"]
+    acme = "acme_receipts.spec:ACME"     # ACME = ParserSpec("acme", "acme_receipts.parser", ...)
+
+A plugin parser module that fails to import is logged and skipped for the rest of the run; a
+built-in one raises, since that is a bug in this package.
+
+A parser module provides parse_order(pdf_path, debug) and parse_line_items(pdf_path, debug),
+plus detect_text(text) (page-1 text; preferred) or detect(pdf_path). text_needs says what it
+reads from the PDF: plain page text (from any pdf_text backend) and/or words with coordinates
+(pdfplumber).
+"""
 from __future__ import annotations
 
-from . import stepperonline, arduino, digikey, mcmaster, sendcutsend
+import logging
+from dataclasses import dataclass, field
+from importlib import import_module
+from importlib.metadata import entry_points
+from types import ModuleType
+from typing import Iterable, Optional
+
+from studio_inventory.pdf_text import TEXT, WORDS, first_page_text
+
+log = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "studio_inventory.parsers"
+
+# capability -> function the parser module must provide for it
+CAPABILITIES = {
+    "order": "parse_order",
+    "line_items": "parse_line_items",
+}
+
+
+@dataclass(frozen=True)
+class ParserSpec:
+    name: str
+    module: str                                  # dotted module path, imported on first match
+    version: str = "1"
+    signatures: tuple[str, ...] = ()             # any one found in page-1 text (lowercase); () = always ask
+    capabilities: frozenset[str] = frozenset(CAPABILITIES)
+    priority: int = 100                          # lower runs first (more specific detectors first)
+    text_needs: frozenset[str] = frozenset({TEXT})
+    source: str = field(default="builtin", compare=False)
+
+    def matches(self, text_lower: str) -> bool:
+        return not self.signatures or any(sig in text_lower for sig in self.signatures)
+
 
 # Order matters: more-specific detectors first if needed
-PARSERS = [
-    stepperonline,
-    arduino,
-    digikey,
-    sendcutsend,
-    mcmaster,
-]
+BUILTIN_PARSERS = (
+    ParserSpec("stepperonline", f"{__package__}.stepperonline", signatures=("omc corporation limited", "stepperonline"), priority=10),
+    ParserSpec("arduino", f"{__package__}.arduino", signatures=("arduino",), priority=20),
+    ParserSpec("digikey", f"{__package__}.digikey", signatures=("digi-key electronics", "digikey"), priority=30),
+    ParserSpec("sendcutsend", f"{__package__}.sendcutsend", signatures=("sendcutsend",), priority=40),
+    ParserSpec("mcmaster", f"{__package__}.mcmaster", signatures=("mcmaster",), priority=50, text_needs=frozenset({TEXT, WORDS})),
+)
 
-def pick_parser(pdf_path: str):
-    for mod in PARSERS:
+
+def _plugin_specs() -> list[ParserSpec]:
+    specs = []
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
         try:
-            if mod.detect(pdf_path):
-                return mod
-        except Exception:
+            obj = ep.load()
+            spec = obj() if callable(obj) and not isinstance(obj, ParserSpec) else obj
+            if not isinstance(spec, ParserSpec):
+                raise TypeError(f"expected a ParserSpec, got {type(spec).__name__}")
+        except Exception as e:
+            log.warning("Skipping parser entry point %r (%s): %s", ep.name, ep.value, e)
             continue
-    return None
+        dist = getattr(ep, "dist", None)
+        specs.append(ParserSpec(
+            spec.name, spec.module, spec.version, tuple(s.lower() for s in spec.signatures),
+            frozenset(spec.capabilities), spec.priority, frozenset(spec.text_needs),
+            source=f"plugin:{dist.name}" if dist is not None else "plugin",
+        ))
+    return specs
+
+
+class ParserRegistry:
+    def __init__(self, specs: Optional[Iterable[ParserSpec]] = None, *, plugins: bool = True):
+        by_name = {s.name: s for s in (BUILTIN_PARSERS if specs is None else specs)}
+        if plugins:
+            by_name.update((s.name, s) for s in _plugin_specs())  # a plugin may replace a built-in
+        self.specs = sorted(by_name.values(), key=lambda s: (s.priority, s.name))
+        self._modules: dict[str, ModuleType] = {}
+        self._broken: set[str] = set()  # plugin parsers that failed to import (logged once)
+
+    def load(self, spec: ParserSpec) -> ModuleType:
+        mod = self._modules.get(spec.name)
+        if mod is None:
+            mod = import_module(spec.module)
+            missing = [fn for cap, fn in CAPABILITIES.items() if cap in spec.capabilities and not hasattr(mod, fn)]
+            if missing or not (hasattr(mod, "detect_text") or hasattr(mod, "detect")):
+                raise ImportError(f"parser {spec.name!r} ({spec.module}) is missing {', '.join(missing) or 'detect'}")
+            self._modules[spec.name] = mod
+        return mod
+
+    def candidates(self, text: str) -> list[ParserSpec]:
+        t = text.lower()
+        return [s for s in self.specs if s.matches(t)]
+
+    def pick(self, pdf_path: str) -> Optional[tuple[ParserSpec, ModuleType]]:
+        text = first_page_text(pdf_path)
+        for spec in self.candidates(text):
+            if spec.name in self._broken:
+                continue
+            try:
+                mod = self.load(spec)
+            except ImportError as e:
+                if spec.source == "builtin":
+                    raise  # a broken built-in parser is a bug, not "no match"
+                # a plugin whose dependencies aren't installed mustn't stop the whole ingest
+                log.warning("Skipping parser %r from %s (%s): %s", spec.name, spec.source, spec.module, e)
+                self._broken.add(spec.name)
+                continue
+            try:
+                hit = mod.detect_text(text) if hasattr(mod, "detect_text") else mod.detect(pdf_path)
+            except Exception:
+                continue
+            if hit:
+                return spec, mod
+        return None
+
+
+_default: Optional[ParserRegistry] = None
+
+def default_registry() -> ParserRegistry:
+    global _default
+    if _default is None:
+        _default = ParserRegistry()
+    return _default
+
+def pick_parser(pdf_path: str):
+    hit = default_registry().pick(pdf_path)
+    return hit[1] if hit else None
@@ -0,0 +1,294 @@
+"""
+Resilience layer for vendor API clients.
+
+ApiGuard wraps each HTTP call with:
+  - rate limiting: a TokenBucket or AdaptiveRate (AIMD, driven by 429s) shared by all threads
+  - retries: exponential backoff with full jitter for 429/5xx and connection errors,
+    waiting exactly as long as a Retry-After header asks when there is one
+  - a circuit breaker: after `failure_threshold` consecutive failures, or as soon as the API
+    sends Retry-After, every thread using the guard pauses until the cool-down ends; then a
+    single probe call decides between closing the circuit and a longer pause
+  - per-endpoint metrics: calls, retries, errors, status counts and latency percentiles
+
+One guard is meant to be shared by everything talking to one API, so a struggling API sees
+the whole worker pool back off at once instead of each thread hammering it independently.
+"""
+from __future__ import annotations
+
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional, Union
+
+import requests
+
+from studio_inventory.vendors.ratelimit import AdaptiveRate, TokenBucket
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or an HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+_ID_SEGMENT = re.compile(r"\d")
+
+
+def endpoint_key(method: str, path: str) -> str:
+    """Metrics bucket for a call: ids folded away, e.g. 'GET /products/{id}/price'."""
+    segs = [("{id}" if _ID_SEGMENT.search(s) else s) for s in path.split("?", 1)[0].strip("/").split("/")]
+    return f"{method.upper()} /{'/'.join(segs)}"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    statuses: frozenset = RETRY_STATUSES
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter backoff before retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    closed → (failures) → open → (cool-down) → half-open → one probe → closed / open again.
+
+    Only the probe's own outcome moves a half-open circuit; answers to calls that were already
+    in flight when it opened can extend a pause (Retry-After) but not escalate it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown: float = 5.0,
+        max_cooldown: float = 120.0,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._clock = clock
+        self._cond = threading.Condition()
+        self.state = "closed"
+        self._failures = 0
+        self._cooldown = cooldown
+        self._open_until = 0.0
+        self._probe: Optional[int] = None  # thread id of the half-open probe
+        self.opened = 0          # times the circuit opened
+        self.paused_s = 0.0      # total time callers spent waiting on it
+
+    def wait(self) -> None:
+        """Block while the circuit is open (or another thread is probing)."""
+        t0 = self._clock()
+        with self._cond:
+            while True:
+                if self.state == "closed":
+                    break
+                now = self._clock()
+                if self.state == "open":
+                    if now < self._open_until:
+                        self._cond.wait(self._open_until - now)
+                        continue
+                    self.state = "half_open"
+                if self._probe is None:
+                    self._probe = threading.get_ident()  # this caller is the probe
+                    break
+                self._cond.wait(1.0)
+            waited = self._clock() - t0
+            if waited > 0.001:
+                self.paused_s += waited
+
+    def success(self) -> None:
+        with self._cond:
+            self._failures = 0
+            if self._probe == threading.get_ident():
+                self._probe = None  # free the slot even if an in-flight call reopened the circuit
+                self._cond.notify_all()
+            if self.state == "open":
+                return  # a call that was already in flight doesn't cut a pause short
+            if self.state != "closed":
+                self.state = "closed"
+                self._cooldown = self.base_cooldown
+                self._cond.notify_all()
+
+    def failure(self, pause: Optional[float] = None) -> None:
+        """Record a failed call; pause (e.g. Retry-After) opens the circuit for at least that long."""
+        with self._cond:
+            self._failures += 1
+            if self._probe == threading.get_ident():
+                self._probe = None
+                self._cooldown = min(self.max_cooldown, self._cooldown * 2)
+                self._open(max(self._cooldown, pause or 0.0))
+            elif pause is not None:
+                self._open(pause)
+            elif self.state == "closed" and self._failures >= self.failure_threshold:
+                self._open(self._cooldown)
+            self._cond.notify_all()
+
+    def release(self) -> None:
+        """Give up the probe slot without a verdict (the probe call ended in an unexpected error)."""
+        with self._cond:
+            if self._probe == threading.get_ident():
+                self._probe = None
+                self._cond.notify_all()
+
+    def _open(self, seconds: float) -> None:
+        until = self._clock() + seconds
+        if self.state != "open":
+            self.opened += 1
+        self.state = "open"
+        self._open_until = max(self._open_until, until)
+
+
+@dataclass
+class EndpointStats:
+    calls: int = 0
+    retries: int = 0
+    errors: int = 0       # calls that ended without a usable answer (retryable status or exception)
+    statuses: Counter = field(default_factory=Counter)
+    latencies: list[float] = field(default_factory=list)
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        xs = sorted(self.latencies)
+        return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+class ApiMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.endpoints: dict[str, EndpointStats] = {}
+
+    def _get(self, endpoint: str) -> EndpointStats:
+        st = self.endpoints.get(endpoint)
+        if st is None:
+            st = self.endpoints[endpoint] = EndpointStats()
+        return st
+
+    def record(self, endpoint: str, status: Union[int, str], seconds: float, *, error: bool = False) -> None:
+        with self._lock:
+            st = self._get(endpoint)
+            st.calls += 1
+            st.errors += int(error)
+            st.statuses[status] += 1
+            st.latencies.append(seconds)
+
+    def record_retry(self, endpoint: str) -> None:
+        with self._lock:
+            self._get(endpoint).retries += 1
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "endpoint": ep,
+                    "calls": st.calls,
+                    "retries": st.retries,
+                    "errors": st.errors,
+                    "p50_ms": st.percentile(0.50) * 1000,
+                    "p95_ms": st.percentile(0.95) * 1000,
+                    "max_ms": max(st.latencies, default=0.0) * 1000,
+                    "statuses": dict(sorted(st.statuses.items(), key=lambda kv: str(kv[0]))),
+                }
+                for ep, st in sorted(self.endpoints.items())
+            ]
+
+
+class ApiGuard:
+    def __init__(
+        self,
+        *,
+        limiter: Union[TokenBucket, AdaptiveRate, None] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        metrics: Optional[ApiMetrics] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.limiter = limiter
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = metrics or ApiMetrics()
+        self._sleep = sleep
+
+    @classmethod
+    def adaptive(cls, rate: float, burst: Optional[float] = None, max_rate: Optional[float] = None) -> "ApiGuard":
+        return cls(limiter=AdaptiveRate(rate, burst, max_rate=max_rate))
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self.limiter.rate if self.limiter is not None else None
+
+    def call(self, endpoint: str, send: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Run send() under the guard. Returns the first non-retryable response, or the last
+        response once attempts run out; re-raises the last connection error likewise.
+        """
+        attempts = max(1, self.retry.max_attempts)
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            self.breaker.wait()
+            if self.limiter is not None:
+                self.limiter.acquire()
+
+            t0 = time.perf_counter()
+            try:
+                r = send()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.metrics.record(endpoint, type(e).__name__, time.perf_counter() - t0, error=True)
+                self.breaker.failure()
+                if last:
+                    raise
+                self.metrics.record_retry(endpoint)
+                self._sleep(self.retry.delay(attempt))
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+
+            elapsed = time.perf_counter() - t0
+            if r.status_code not in self.retry.statuses:
+                self.metrics.record(endpoint, r.status_code, elapsed)
+                self.breaker.success()
+                if isinstance(self.limiter, AdaptiveRate):
+                    self.limiter.on_success()
+                return r
+
+            self.metrics.record(endpoint, r.status_code, elapsed, error=True)
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+            # 429 is the API saying "slower"; 5xx (outages included) are left to retries and the breaker
+            if r.status_code == 429 and isinstance(self.limiter, AdaptiveRate):
+                self.limiter.on_throttle()
+            self.breaker.failure(pause=retry_after)
+            if last:
+                return r
+            r.close()
+            self.metrics.record_retry(endpoint)
+            if retry_after is None:
+                self._sleep(self.retry.delay(attempt))
+            # with Retry-After the breaker is now open and holds this thread (and the pool) back
+        raise AssertionError("unreachable")
+
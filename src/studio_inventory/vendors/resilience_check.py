@@ -0,0 +1,64 @@
+"""
+Concurrency checks for the circuit breaker in vendors.resilience.
+
+These races don't show up in a single-threaded run, so each check drives real threads
+through the breaker and reports whether they all get through:
+
+    python -m studio_inventory.vendors.resilience_check   # exit 1 if a check fails
+
+Every wait is bounded by `timeout`, so a regression shows up as a failed check, not a hang.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+
+from studio_inventory.vendors.resilience import CircuitBreaker
+
+
+def check_probe_handoff(timeout: float = 5.0) -> bool:
+    """
+    A probe that succeeds after an in-flight call reopened the circuit must free the probe
+    slot, or every later wait() blocks forever. True if the next caller gets through.
+    """
+    breaker = CircuitBreaker(cooldown=0.05)
+    breaker.failure(pause=0.05)
+
+    probe_ready, reopened = threading.Event(), threading.Event()
+
+    def probe() -> None:
+        breaker.wait()          # becomes the half-open probe
+        probe_ready.set()
+        reopened.wait(timeout)
+        breaker.success()       # its own call succeeded, but the circuit is open again
+
+    a = threading.Thread(target=probe, daemon=True)
+    a.start()
+    if not probe_ready.wait(timeout):
+        return False
+    breaker.failure(pause=0.05)  # an in-flight call's 429/503 with Retry-After
+    reopened.set()
+    a.join(timeout)
+
+    c = threading.Thread(target=breaker.wait, daemon=True)
+    c.start()
+    c.join(timeout)
+    return not c.is_alive()
+
+
+CHECKS = {
+    "circuit breaker probe handoff": check_probe_handoff,
+}
+
+
+def main() -> int:
+    failed = False
+    for name, check in CHECKS.items():
+        ok = check()
+        failed = failed or not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
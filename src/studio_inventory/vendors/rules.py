@@ -0,0 +1,115 @@
+"""
+Declarative field rules for receipt headers and totals.
+
+A vendor lists its order-level fields as FieldRules: a regex plus a converter that turns the
+match into the stored value. A RuleSet fills every field in one pass over the text: each rule
+keeps its next match, the pass jumps from one to the next, and it stops as soon as nothing is
+left to find:
+
+    ORDER_RULES = RuleSet("acme", [
+        FieldRule("invoice", r"Invoice\s*#\s*([0-9]+)"),
+        FieldRule("invoice_date", r"Order\s*Date:\s*([0-9/]+)"),
+        FieldRule("invoice_date", r"\b([0-9]{2}/[0-9]{2}/[0-9]{4})\b"),   # fallback
+        FieldRule("total", r"\bTotal:\s*\$?([0-9,]+\.[0-9]{2})", as_money()),
+    ])
+    ORDER_RULES.scan(text)   # {"invoice": "1234", "invoice_date": "09/01/2025", "total": 56.0}
+
+Each rule finds what re.search(pattern, text, flags) would: its first match in the text.
+When a field has several rules, the first one listed wins wherever it matches; the later ones
+only count when the earlier ones never match. A converter that returns None means "not this
+match", and the scan keeps looking, unless the rule is first_only: then its first match
+settles the field (as re.search + convert did), even when the value is None.
+
+Rules that share a `claim` never take the same position: the first one listed that is still
+looking and matches there gets it, like an if/elif chain over the lines of a totals block.
+A scan for some fields always includes the rest of their claim groups, so a line is claimed
+the same way as in a full scan.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+Convert = Callable[[re.Match], Any]
+
+
+def as_text(group: int = 1) -> Convert:
+    return lambda m: m.group(group).strip()
+
+
+def as_money(group: int = 1) -> Convert:
+    return lambda m: float(m.group(group).replace(",", ""))
+
+
+def as_money_or_free(group: int = 1) -> Convert:
+    """"FREE" -> 0.0, "$ 1,234.50" -> 1234.5."""
+    def convert(m: re.Match) -> Optional[float]:
+        val = m.group(group).strip()
+        if val.upper().startswith("FREE"):
+            return 0.0
+        try:
+            return float(val.replace("$", "").replace(",", "").strip())
+        except ValueError:
+            return None
+    return convert
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    field: str
+    pattern: str
+    convert: Convert = as_text()
+    flags: int = re.I
+    claim: str = ""   # rules with the same claim don't share a match position
+    first_only: bool = False  # the first match settles the field, even if convert returns None
+
+
+class RuleSet:
+    def __init__(self, vendor: str, rules: Iterable[FieldRule]):
+        self.vendor = vendor
+        self.rules = tuple(rules)
+        self.fields = tuple(dict.fromkeys(r.field for r in self.rules))
+        self._regexes = [re.compile(r.pattern, r.flags) for r in self.rules]  # bad patterns fail at import
+
+    def scan(self, text: str, fields: Optional[Iterable[str]] = None) -> dict[str, Any]:
+        """field -> value (None if not found) for every field, or the given ones plus their claim groups."""
+        if fields is None:
+            wanted = self.fields
+        else:
+            fields = set(fields)
+            claims = {r.claim for r in self.rules if r.claim and r.field in fields}
+            fields |= {r.field for r in self.rules if r.claim in claims}
+            wanted = tuple(f for f in self.fields if f in fields)
+        found: dict[int, Any] = {}
+
+        # Each rule's next match at or after the scan position. A search only ever resumes past a
+        # position the scan has finished with, so every match is the one re.search would find.
+        ahead = {i: self._regexes[i].search(text) for i, r in enumerate(self.rules) if r.field in wanted}
+        pending = [i for i, m in ahead.items() if m is not None]
+        while pending:
+            pos = min(ahead[i].start() for i in pending)
+            claimed: set[str] = set()
+            for i in pending:
+                rule, m = self.rules[i], ahead[i]
+                if m.start() != pos or (rule.claim and rule.claim in claimed):
+                    continue
+                if rule.claim:
+                    claimed.add(rule.claim)
+                value = rule.convert(m)
+                if value is not None or rule.first_only:
+                    found[i] = value
+            # a found rule also retires the later (fallback) rules for its field
+            pending = [
+                i for i in pending
+                if i not in found and not any(j < i and self.rules[j].field == self.rules[i].field for j in found)
+            ]
+            for i in pending:
+                if ahead[i].start() == pos:
+                    ahead[i] = self._regexes[i].search(text, pos + 1)
+            pending = [i for i in pending if ahead[i] is not None]
+
+        out: dict[str, Any] = dict.fromkeys(wanted)
+        for i in sorted(found, reverse=True):
+            out[self.rules[i].field] = found[i]
+        return out
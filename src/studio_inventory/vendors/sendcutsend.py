@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import re
-from typing import Optional, List, Dict, Any
+from typing import List, Dict, Any
 
-import pdfplumber
+from studio_inventory.pdf_text import all_text, first_page_text
+from studio_inventory.vendors.rules import FieldRule, RuleSet, as_money, as_money_or_free
 
 
 # -------------------------------------------------
@@ -17,44 +18,51 @@ def detect(pdf_path: str) -> bool:
       - sendcutsend.com
       - "Invoice" header with an order id like SC93C716
     """
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            txt = (pdf.pages[0].extract_text() or "").lower()
-        return ("sendcutsend" in txt) or ("support@sendcutsend.com" in txt)
-    except Exception:
-        return False
+    return detect_text(first_page_text(pdf_path, vendor="sendcutsend"))
+
+
+def detect_text(text: str) -> bool:
+    txt = text.lower()
+    return ("sendcutsend" in txt) or ("support@sendcutsend.com" in txt)
 
 
 # -------------------------------------------------
 # Order-level parsing
 # -------------------------------------------------
 
+def _credit_card(m: re.Match) -> str:
+    brand = re.sub(r"\s+", " ", m.group(1).strip())
+    return f"{brand} (x{m.group(2)})"
+
+
+# Money after a label, where the label may share a line with other labels
+# (SendCutSend compacts the footer).
+_MONEY = r"\$?\s*([0-9]+(?:,[0-9]{3})*\.[0-9]{2})"
+
+ORDER_RULES = RuleSet("sendcutsend", [
+    FieldRule("invoice", r"\b(S[A-Z0-9]{7})\b"),  # e.g., SC93C716, SZ47Z879, SW194224, SV74V197
+    # Dates come in two common formats:
+    #   "Invoice Date: Aug 25, 2025"
+    #   "May 6, 2025 6:12 PM"
+    FieldRule("invoice_date", r"Invoice\s*Date:\s*([A-Za-z]{3,9}\s+\d{1,2},\s*\d{4})"),
+    FieldRule("invoice_date", r"\b([A-Za-z]{3,9}\s+\d{1,2},\s*\d{4}(?:\s+\d{1,2}:\d{2}\s*[AP]M)?)\b"),
+    FieldRule("subtotal", r"Subtotal:\s*" + _MONEY, as_money()),
+    FieldRule("shipping", r"Shipping\s*(?:\+|and)?\s*Handling:\s*(FREE|\$?\s*[0-9]+(?:,[0-9]{3})*\.[0-9]{2})", as_money_or_free()),
+    FieldRule("tax", r"Tax:\s*" + _MONEY, as_money()),
+    FieldRule("total", r"(?<!Item\s)\bTotal:\s*" + _MONEY, as_money()),
+    FieldRule("credit_card", r"\b(MasterCard|Visa|Discover|American\s*Express|AmEx)\s*\(x(\d{4})", _credit_card),
+])
+
+
 def parse_order(pdf_path: str, debug: bool = False) -> Dict[str, Any]:
     text = _all_text(pdf_path)
     # Normalize odd glyph placeholders (\x00) seen in some PDFs
     text = re.sub(r"\x00(?=\d)", "(", text)
     text = text.replace("\x00", " ")
 
-    invoice = _find(r"\b(S[A-Z0-9]{7})\b", text)  # e.g., SC93C716, SZ47Z879, SW194224, SV74V197
-
-    # Dates come in two common formats:
-    #   "Invoice Date: Aug 25, 2025"
-    #   "May 6, 2025 6:12 PM"
-    invoice_date = _find(r"Invoice\s*Date:\s*([A-Za-z]{3,9}\s+\d{1,2},\s*\d{4})", text)
-    if not invoice_date:
-        invoice_date = _find(r"\b([A-Za-z]{3,9}\s+\d{1,2},\s*\d{4}(?:\s+\d{1,2}:\d{2}\s*[AP]M)?)\b", text)
-
-    subtotal = _money_after(r"Subtotal:\s*", text)
-    shipping = _money_or_free_after(r"Shipping\s*(?:\+|and)?\s*Handling:\s*", text)
-    tax = _money_after(r"Tax:\s*", text)
-    total = _money_after(r"(?<!Item\s)\bTotal:\s*", text)
-
-    credit_card = None
-    cc = re.search(r"\b(MasterCard|Visa|Discover|American\s*Express|AmEx)\s*\(x(\d{4})", text, re.I)
-    if cc:
-        brand = cc.group(1).strip()
-        brand = re.sub(r"\s+", " ", brand)
-        credit_card = f"{brand} (x{cc.group(2)})"
+    f = ORDER_RULES.scan(text)
+    invoice, invoice_date, credit_card = f["invoice"], f["invoice_date"], f["credit_card"]
+    subtotal, shipping, tax, total = f["subtotal"], f["shipping"], f["tax"], f["total"]
 
     if debug:
         print(f"[SENDCUTSEND] invoice={invoice} date={invoice_date} sub={subtotal} ship={shipping} tax={tax} total={total} cc={credit_card}")
@@ -265,35 +273,4 @@ def parse_line_items(pdf_path: str, debug: bool = False) -> List[Dict[str, Any]]
 # -------------------------------------------------
 
 def _all_text(pdf_path: str) -> str:
-    with pdfplumber.open(pdf_path) as pdf:
-        return "\n".join((page.extract_text() or "") for page in pdf.pages)
-
-
-def _find(pattern: str, text: str) -> Optional[str]:
-    m = re.search(pattern, text, re.I)
-    return m.group(1).strip() if m else None
-
-
-def _money_after(prefix_pattern: str, text: str) -> Optional[float]:
-    """
-    Find a money value after a label, where the label may appear on the same line
-    as other labels (SendCutSend compacts the footer).
-    """
-    m = re.search(prefix_pattern + r"\$?\s*([0-9]+(?:,[0-9]{3})*\.[0-9]{2})", text, re.I)
-    if not m:
-        return None
-    return float(m.group(1).replace(",", ""))
-
-
-def _money_or_free_after(prefix_pattern: str, text: str) -> Optional[float]:
-    m = re.search(prefix_pattern + r"(FREE|\$?\s*[0-9]+(?:,[0-9]{3})*\.[0-9]{2})", text, re.I)
-    if not m:
-        return None
-    val = m.group(1).strip()
-    if val.upper().startswith("FREE"):
-        return 0.0
-    val = val.replace("$", "").replace(",", "").strip()
-    try:
-        return float(val)
-    except ValueError:
-        return None
+    return all_text(pdf_path, vendor="sendcutsend")
@@ -3,7 +3,8 @@ from __future__ import annotations
 import re
 from typing import Optional
 
-import pdfplumber
+from studio_inventory.pdf_text import all_text, first_page_text
+from studio_inventory.vendors.rules import FieldRule, RuleSet, as_money
 
 
 # -------------------------------------------------
@@ -11,8 +12,11 @@ import pdfplumber
 # -------------------------------------------------
 
 def detect(pdf_path: str) -> bool:
-    with pdfplumber.open(pdf_path) as pdf:
-        t0 = (pdf.pages[0].extract_text() or "").upper()
+    return detect_text(first_page_text(pdf_path, vendor="stepperonline"))
+
+
+def detect_text(text: str) -> bool:
+    t0 = text.upper()
     return "OMC CORPORATION LIMITED" in t0 or "STEPPERONLINE" in t0
 
 
@@ -20,16 +24,24 @@ def detect(pdf_path: str) -> bool:
 # Order-level parsing
 # -------------------------------------------------
 
+_MONEY = r"\s*\$([0-9]+\.[0-9]{2})"
+
+ORDER_RULES = RuleSet("stepperonline", [
+    FieldRule("invoice_date", r"Date Added:\s*([0-9/]+)"),
+    FieldRule("order_id", r"Order ID:\s*(\d+)"),
+    FieldRule("subtotal", r"Sub-Total:" + _MONEY, as_money()),
+    FieldRule("shipping", r"USPS Ground:" + _MONEY, as_money()),
+    FieldRule("packing", r"Packing Fee:" + _MONEY, as_money()),
+    FieldRule("total", r"^Total:" + _MONEY, as_money(), flags=re.I | re.M),
+])
+
+
 def parse_order(pdf_path: str, debug: bool = False) -> dict:
     text = _all_text(pdf_path)
 
-    invoice_date = _find(r"Date Added:\s*([0-9/]+)", text)
-    order_id = _find(r"Order ID:\s*(\d+)", text)
-
-    subtotal = _money_after(r"Sub-Total:", text)
-    shipping = _money_after(r"USPS Ground:", text)
-    packing = _money_after(r"Packing Fee:", text)
-    total = _money_after(r"^Total:", text, multiline=True)
+    f = ORDER_RULES.scan(text)
+    invoice_date, order_id = f["invoice_date"], f["order_id"]
+    subtotal, shipping, packing, total = f["subtotal"], f["shipping"], f["packing"], f["total"]
 
     # StepperOnline invoices generally do NOT include tax as a line item
     merchandise = subtotal
@@ -177,16 +189,4 @@ def parse_line_items(pdf_path: str, debug: bool = False) -> list[dict]:
 # -------------------------------------------------
 
 def _all_text(pdf_path: str) -> str:
-    with pdfplumber.open(pdf_path) as pdf:
-        return "\n".join(page.extract_text() or "" for page in pdf.pages)
-
-
-def _find(pattern: str, text: str, group: int = 1) -> Optional[str]:
-    m = re.search(pattern, text, re.I)
-    return m.group(group).strip() if m else None
-
-
-def _money_after(label_pattern: str, text: str, multiline: bool = False) -> Optional[float]:
-    flags = re.I | (re.M if multiline else 0)
-    m = re.search(label_pattern + r"\s*\$([0-9]+\.[0-9]{2})", text, flags)
-    return float(m.group(1)) if m else None
+    return all_text(pdf_path, vendor="stepperonline")